@@ -0,0 +1,69 @@
+"""Compare head-limited metadata extraction against the legacy full-parse helpers.
+
+Usage: python benchmarks/bench_html_metadata.py [--repeat N]
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import os
+import time
+
+from reader_sync.html_utils import choose_url_from_html, extract_local_title, extract_metadata
+
+
+def _article(paragraphs: int) -> str:
+    return "".join(f"<p>Paragraph {i} with some <a href='/x/{i}'>links</a> and text.</p>" for i in range(paragraphs))
+
+
+def _image(size: int) -> str:
+    data = base64.b64encode(os.urandom(size)).decode("ascii")
+    return f"<img src='data:image/png;base64,{data}'>"
+
+
+def build_samples() -> dict[str, str]:
+    head = "<head><meta charset='utf-8'><title>Sample</title>{extra}</head>"
+    return {
+        "small canonical": "<html>" + head.format(extra="<link rel='canonical' href='https://e.com/a'>")
+        + "<body>" + _article(50) + "</body></html>",
+        "og:url only": "<html>" + head.format(extra="<meta property='og:url' content='https://e.com/b'>")
+        + "<body>" + _article(2000) + "</body></html>",
+        "singlefile 5MB images": "<!-- saved from url=https://e.com/c -->\n<html>"
+        + head.format(extra="<style>" + "p{margin:0}" * 2000 + "</style>")
+        + "<body>" + _article(500) + _image(2 * 1024 * 1024) + _image(2 * 1024 * 1024) + "</body></html>",
+        "no url, 3MB body": "<html>" + head.format(extra="") + "<body>" + _article(40000) + "</body></html>",
+    }
+
+
+def _legacy(html: str) -> tuple[tuple[str, str], str | None]:
+    return choose_url_from_html(html), extract_local_title(html)
+
+
+def _current(html: str) -> tuple[tuple[str, str], str | None]:
+    meta = extract_metadata(html)
+    return meta.best_url(), meta.title
+
+
+def _time(fn, html: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'sample':<24}{'size':>10}{'legacy ms':>12}{'head ms':>10}{'speedup':>9}")
+    for name, html in build_samples().items():
+        assert _legacy(html) == _current(html), name
+        legacy = _time(_legacy, html, args.repeat)
+        current = _time(_current, html, args.repeat)
+        print(f"{name:<24}{len(html) / 1024:>8.0f}KB{legacy * 1000:>12.2f}{current * 1000:>10.2f}{legacy / current:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
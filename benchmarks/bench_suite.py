@@ -0,0 +1,186 @@
+"""Time the discovery and preparation hot paths over synthetic inboxes of 1k-100k files.
+
+Each function is timed over the whole corpus ``--repeat`` times and the best
+pass is kept. Results are written as JSON, tagged with the git commit, so
+runs from different commits can be compared with ``--compare``.
+
+Usage: python benchmarks/bench_suite.py [--sizes 1000,10000,100000] [--repeat N]
+       [--corpus-dir DIR] [--output FILE] [--compare BASELINE.json] [--threshold 0.1]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from corpus import generate
+
+from reader_sync.config import load_settings
+from reader_sync.filesystem import discover_files
+from reader_sync.html_utils import choose_url_from_html, extract_local_title, infer_from_filename, normalize_url
+from reader_sync.models import FileMeta
+from reader_sync.sync import SyncService
+
+BENCH_DIR = Path(__file__).resolve().parent
+FUNCTIONS = (
+    "discover_files",
+    "infer_from_filename",
+    "choose_url_from_html",
+    "extract_local_title",
+    "normalize_url",
+    "_prepare_document",
+)
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _entry(items: int, seconds: float) -> dict[str, float | int]:
+    return {"items": items, "seconds": round(seconds, 6), "us_per_item": round(seconds * 1e6 / items, 3) if items else 0}
+
+
+def run_size(root: Path, service: SyncService, repeat: int) -> dict[str, dict[str, float | int]]:
+    settings = service.settings
+    results: dict[str, dict[str, float | int]] = {}
+
+    metas: list[FileMeta] = []
+
+    def _discover() -> None:
+        metas[:] = discover_files(root, settings.patterns, exclude=settings.exclude)
+
+    seconds = _best(_discover, repeat)
+    results["discover_files"] = _entry(len(metas), seconds)
+
+    names = [meta.path.name for meta in metas]
+    results["infer_from_filename"] = _entry(len(names), _best(lambda: [infer_from_filename(n) for n in names], repeat))
+    # normalize_url gets every URL the corpus yields, from filenames and from heads.
+    urls = [inferred[0] for inferred in map(infer_from_filename, names) if inferred]
+
+    # The HTML helpers take text: read each file once, untimed, and time every pass on it.
+    html_totals = {"choose_url_from_html": [0.0] * repeat, "extract_local_title": [0.0] * repeat}
+    for meta in metas:
+        html = meta.path.read_text(encoding="utf-8", errors="ignore")
+        for name, fn in (("choose_url_from_html", choose_url_from_html), ("extract_local_title", extract_local_title)):
+            totals = html_totals[name]
+            for index in range(repeat):
+                start = time.perf_counter()
+                value = fn(html)
+                totals[index] += time.perf_counter() - start
+            if name == "choose_url_from_html" and value[0]:
+                urls.append(value[0])
+    for name, totals in html_totals.items():
+        results[name] = _entry(len(metas), min(totals))
+
+    keep, drop = settings.keep_params, settings.drop_params
+    results["normalize_url"] = _entry(len(urls), _best(lambda: [normalize_url(u, keep, drop) for u in urls], repeat))
+    results["_prepare_document"] = _entry(
+        len(metas), _best(lambda: [service._prepare_document(meta) for meta in metas], repeat)
+    )
+    return results
+
+
+def _service(corpus: Path, state: Path) -> SyncService:
+    os.environ.setdefault("READWISE_TOKEN", "bench")
+    os.environ.pop("RW_SYNC_WATCH_DIR", None)
+    os.environ.pop("RW_SYNC_DB_PATH", None)
+    cfg = state / ".rw-sync.yaml"
+    cfg.write_text(json.dumps({"watch": {"dir": str(corpus)}}), encoding="utf-8")
+    return SyncService(load_settings(cfg))
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print per-function changes against ``baseline``; return whether anything regressed."""
+    print(f"\nvs {baseline.get('commit') or '?'} ({baseline.get('created_at', '?')})")
+    print(f"{'files':>8}  {'function':<22}{'base us':>10}{'now us':>10}{'change':>9}")
+    regressed = False
+    for size, functions in current["results"].items():
+        for name, entry in functions.items():
+            old = baseline.get("results", {}).get(size, {}).get(name)
+            if not old or not old.get("us_per_item"):
+                continue
+            change = (entry["us_per_item"] - old["us_per_item"]) / old["us_per_item"]
+            flag = "  REGRESSED" if change > threshold else ""
+            regressed |= bool(flag)
+            print(f"{size:>8}  {name:<22}{old['us_per_item']:>10.2f}{entry['us_per_item']:>10.2f}{change:>+8.0%}{flag}")
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated corpus sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image-kb", type=int, default=256, help="size of inlined images in big_image pages")
+    parser.add_argument("--corpus-dir", type=Path, default=BENCH_DIR / ".corpus", help="where corpora are cached")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<stamp>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    repeat = max(1, args.repeat)
+
+    commit = _git_commit()
+    report: dict = {
+        "version": 1,
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "seed": args.seed,
+        "corpus": {},
+        "results": {},
+    }
+    print(f"{'files':>8}  {'function':<22}{'items':>8}{'total s':>10}{'us/item':>10}")
+    for size in sizes:
+        corpus = args.corpus_dir / f"{size}-seed{args.seed}"
+        manifest = generate(corpus, size, seed=args.seed, image_bytes=args.image_kb * 1024)
+        report["corpus"][str(size)] = {"bytes": manifest["bytes"], "kinds": manifest["kinds"]}
+        with tempfile.TemporaryDirectory(prefix="rw-sync-bench-") as state:
+            service = _service(corpus, Path(state))
+            try:
+                results = run_size(corpus, service, repeat)
+            finally:
+                asyncio.run(service.close())
+        report["results"][str(size)] = results
+        for name in FUNCTIONS:
+            entry = results[name]
+            print(f"{size:>8}  {name:<22}{entry['items']:>8}{entry['seconds']:>10.3f}{entry['us_per_item']:>10.2f}")
+
+    output = args.output or BENCH_DIR / "results" / f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Measure Reader transport options (JSON encoder, gzip bodies, warm-up) against a local stand-in.
+
+The stand-in accepts saves like Reader, adds ``--latency`` seconds per request
+and reads request bodies at ``--bandwidth`` MB/s to mimic a constrained uplink.
+HTTP/2 needs TLS with ALPN, so it is only exercised against ``--url``.
+
+Usage: python benchmarks/bench_transport.py [--docs N] [--size KB] [--bandwidth MB/s] [--url URL]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from reader_sync import readwise_client
+from reader_sync.readwise_client import ReaderClient, encode_json
+
+
+def _page(index: int, size: int) -> str:
+    rng = random.Random(index)
+    words = ["reader", "sync", "archive", "page", "link", "text", "“quoted”", "naïve", "data", "html"]
+    parts, length = [], 0
+    while length < size:
+        paragraph = f"<p>{' '.join(rng.choice(words) for _ in range(40))} <a href='/x/{rng.random()}'>more</a></p>"
+        parts.append(paragraph)
+        length += len(paragraph)
+    return "<html><head><title>Doc</title></head><body>" + "".join(parts) + "</body></html>"
+
+
+def _stand_in(latency: float, bandwidth: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def _reply(self, status: int, body: bytes = b"") -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            self._reply(204)
+
+        def do_POST(self) -> None:
+            raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency + len(raw) / (bandwidth * 1024 * 1024))
+            if self.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            json.loads(raw)
+            self._reply(201, b'{"id": "1"}')
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _time_encoders(payload: dict, repeat: int = 5) -> dict[str, float]:
+    results = {}
+    encoders = {"json": lambda p: json.dumps(p, ensure_ascii=False).encode("utf-8"), "fast": encode_json}
+    for name, encode in encoders.items():
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            encode(payload)
+            best = min(best, time.perf_counter() - start)
+        results[name] = best
+    return results
+
+
+async def _upload(base_url: str, docs: list[str], *, gzip_on: bool, warm: bool, http2: bool) -> tuple[float, float, int]:
+    client = ReaderClient(
+        "token",
+        rpm_save=100_000,
+        rpm_update=100_000,
+        concurrency=4,
+        http2=http2,
+        gzip_min_bytes=1024 if gzip_on else None,
+        base_url=base_url,
+    )
+    try:
+        if warm:
+            await client.warm_up(4)
+        start = time.perf_counter()
+        first = None
+        semaphore = asyncio.Semaphore(4)
+
+        async def _one(html: str) -> None:
+            nonlocal first
+            async with semaphore:
+                await client.save({"url": "https://example.com", "html": html, "should_clean_html": True})
+                first = first if first is not None else time.perf_counter() - start
+
+        await asyncio.gather(*(_one(html) for html in docs))
+        return time.perf_counter() - start, first or 0.0, client.bytes_sent
+    finally:
+        await client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=40)
+    parser.add_argument("--size", type=int, default=512, help="document size in KB")
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--bandwidth", type=float, default=20.0, help="stand-in upload bandwidth in MB/s")
+    parser.add_argument("--url", help="benchmark an existing server instead of the local stand-in")
+    args = parser.parse_args()
+
+    docs = [_page(i, args.size * 1024) for i in range(args.docs)]
+    encoders = _time_encoders({"html": docs[0]})
+    fast = "orjson" if readwise_client.orjson is not None else "json (orjson not installed)"
+    print(f"encode {args.size}KB: json {encoders['json'] * 1000:.2f} ms, {fast} {encoders['fast'] * 1000:.2f} ms")
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = _stand_in(args.latency, args.bandwidth)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    variants = [("baseline", False, False, False), ("gzip", True, False, False), ("warm-up", False, True, False)]
+    variants.append(("gzip+warm-up", True, True, False))
+    if base_url.startswith("https://"):
+        variants.append(("http2+gzip+warm-up", True, True, True))
+    print(f"{'variant':<22}{'total s':>9}{'first s':>9}{'sent KB':>10}")
+    try:
+        for name, gzip_on, warm, http2 in variants:
+            total, first, sent = asyncio.run(_upload(base_url, docs, gzip_on=gzip_on, warm=warm, http2=http2))
+            print(f"{name:<22}{total:>9.2f}{first:>9.3f}{sent / 1024:>10.0f}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Deterministic synthetic inbox of SingleFile-style HTML archives for benchmarks.
+
+The same ``count`` and ``seed`` always produce byte-identical files with the
+same names and mtimes. A manifest in the corpus directory lets later runs
+reuse an existing corpus instead of regenerating it.
+
+Usage: python benchmarks/corpus.py DIR [--count N] [--seed S] [--origins URL,...]
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import random
+import shutil
+from collections.abc import Sequence
+from pathlib import Path
+from urllib.parse import quote
+
+# Relative frequency of each page shape.
+KINDS = {
+    "singlefile": 30,  # "saved from url" comment plus canonical link, inlined styles
+    "canonical": 20,  # canonical link only
+    "og_only": 10,  # no canonical, og:url meta in the head
+    "url_filename": 25,  # plain page; the URL is in the "[URL]" filename
+    "malformed": 10,  # unterminated head/title, unquoted attributes, no URL at all
+    "big_image": 2,  # SingleFile page with a large inlined base64 image
+}
+FILES_PER_DIR = 500
+MANIFEST = "corpus.json"
+BASE_MTIME = 1_700_000_000
+
+_WORDS = "reader sync archive page article note link data text html news blog guide review".split()
+ORIGINS = (
+    "https://example.com",
+    "https://news.example.org",
+    "https://blog.example.net",
+    "https://twitter.com",
+    "https://docs.example.io",
+)
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(count))
+
+
+def _url(rng: random.Random, index: int, origins: Sequence[str]) -> str:
+    origin = rng.choice(origins)
+    query = rng.choice(["", f"?utm_source=feed&id={index}", f"?page={index % 7}&fbclid=abc{index}", "?ref=home"])
+    return f"{origin}/{rng.choice(_WORDS)}/{index}{query}"
+
+
+def _body(rng: random.Random, paragraphs: int) -> str:
+    return "".join(f"<p>{_words(rng, 30)} <a href='/x/{rng.randrange(10**6)}'>more</a></p>" for _ in range(paragraphs))
+
+
+def _page(kind: str, rng: random.Random, index: int, url: str, image_bytes: int) -> str:
+    title = f"{_words(rng, 4).title()} {index}"
+    body = _body(rng, rng.randint(5, 40))
+    style = "<style>" + "p{margin:0 0 1em}.x{color:#333}" * rng.randint(10, 60) + "</style>"
+    if kind == "singlefile":
+        return (
+            f"<!DOCTYPE html> <html><!--\n Page saved with SingleFile \n url: {url} \n-->"
+            f"<!-- saved from url=({len(url):04d}){url} -->"
+            f"<head><meta charset='utf-8'><title>{title}</title><link rel='canonical' href='{url}'>{style}</head>"
+            f"<body>{body}</body></html>"
+        )
+    if kind == "canonical":
+        return (
+            f"<html><head><meta charset='utf-8'><title>{title}</title>"
+            f'<link rel="canonical" href="{url}"/></head><body>{body}</body></html>'
+        )
+    if kind == "og_only":
+        return (
+            f"<html><head><title>{title}</title><meta property='og:url' content='{url}'>{style}</head>"
+            f"<body>{body}</body></html>"
+        )
+    if kind == "url_filename":
+        return f"<html><head><title>{title}</title></head><body>{body}</body></html>"
+    if kind == "malformed":
+        broken = rng.choice(
+            [
+                f"<html><head><title>{title}<meta charset=utf-8><body>{body}",
+                f"<html><head><title>{title}</title><link rel=canonical href={url}><p>{body}</html>",
+                f"<head><meta property=og:url content={url}><title>{title}</title><div>{body}",
+                f"<html><title>{title}</title>{style}{body}<!-- saved from url=",
+            ]
+        )
+        return broken
+    data = base64.b64encode(rng.randbytes(image_bytes)).decode("ascii")
+    return (
+        f"<!-- saved from url=({len(url):04d}){url} -->"
+        f"<html><head><meta charset='utf-8'><title>{title}</title><link rel='canonical' href='{url}'>{style}</head>"
+        f"<body>{body}<img src='data:image/png;base64,{data}'>{body}</body></html>"
+    )
+
+
+def _filename(kind: str, rng: random.Random, index: int, url: str) -> str:
+    if kind == "url_filename":
+        title = _words(rng, 3).title()
+        if index % 2:
+            return f"{title} 20250101_{index % 240000:06d} [URL] {quote(url, safe='')}.html"
+        return f"{title.replace(' ', '_')}_20250101_{index % 240000:06d}_[URL]_{quote(url, safe='')}.html"
+    return f"{kind}-{index:06d}.html"
+
+
+def generate(
+    root: Path,
+    count: int,
+    *,
+    seed: int = 0,
+    image_bytes: int = 256 * 1024,
+    origins: Sequence[str] = ORIGINS,
+) -> dict[str, object]:
+    """Create ``count`` files under ``root`` (reusing a matching existing corpus); return the manifest.
+
+    Page URLs point at ``origins`` (scheme and host), e.g. a local title server.
+    """
+    params = {"count": count, "seed": seed, "image_bytes": image_bytes, "kinds": KINDS, "origins": list(origins)}
+    manifest_path = root / MANIFEST
+    if manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except ValueError:
+            manifest = {}
+        if manifest.get("params") == params:
+            return manifest
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    rng = random.Random(seed)
+    names, weights = zip(*KINDS.items())
+    counts = dict.fromkeys(names, 0)
+    total_bytes = 0
+    for index in range(count):
+        kind = rng.choices(names, weights)[0]
+        counts[kind] += 1
+        url = _url(rng, index, origins)
+        directory = root / f"d{index // FILES_PER_DIR:03d}"
+        directory.mkdir(exist_ok=True)
+        path = directory / _filename(kind, rng, index, url)
+        data = _page(kind, rng, index, url, image_bytes).encode("utf-8")
+        path.write_bytes(data)
+        mtime = BASE_MTIME + index * 60
+        os.utime(path, (mtime, mtime))
+        total_bytes += len(data)
+
+    manifest = {"params": params, "files": count, "bytes": total_bytes, "kinds": counts}
+    manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", type=Path)
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--image-kb", type=int, default=256, help="size of inlined images in big_image pages")
+    parser.add_argument("--origins", default=",".join(ORIGINS), help="comma-separated page origins, e.g. a fake title server")
+    args = parser.parse_args()
+    origins = [origin.strip().rstrip("/") for origin in args.origins.split(",") if origin.strip()]
+    manifest = generate(args.root, args.count, seed=args.seed, image_bytes=args.image_kb * 1024, origins=origins)
+    print(json.dumps(manifest, indent=2))
+
+
+if __name__ == "__main__":
+    main()
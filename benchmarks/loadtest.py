@@ -0,0 +1,130 @@
+"""Run `push` end to end against a local fake Reader and title origin, with injected faults.
+
+A synthetic inbox (see ``corpus.py``) whose page URLs live on the fake
+origin is pushed through ``SyncService`` with the given client limits while
+the fake Reader enforces its own rpm limit, latency and 5xx bursts. Use it to
+tune concurrency and limiter settings offline and to reproduce throttling.
+
+Usage: python benchmarks/loadtest.py [--files N] [--passes N] [--rpm 50] [--latency lognormal:0.2:0.6]
+       [--client-rpm 50] [--upload-concurrency 6] [--burst-every 100 --burst-length 5] [--json FILE]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from corpus import generate
+
+from reader_sync.config import load_settings
+from reader_sync.fake_reader import FakeOriginServer, FakeReaderServer, Faults, Latency, add_fault_arguments, faults_from_args
+from reader_sync.sync import SyncService
+
+BENCH_DIR = Path(__file__).resolve().parent
+
+
+def _config(args: argparse.Namespace, corpus: Path, reader: FakeReaderServer) -> dict:
+    return {
+        "watch": {"dir": str(corpus)},
+        "readwise": {"base_url": reader.url},
+        "network": {
+            "rpm_save": args.client_rpm,
+            "rpm_update": args.client_rpm,
+            "rpm_floor": args.rpm_floor,
+            "concurrency": args.concurrency,
+            "upload_concurrency": args.upload_concurrency or args.concurrency,
+            "max_retries": args.max_retries,
+            "retry_budget": args.retry_budget,
+            "backoff_base": args.backoff_base,
+            "backoff_cap": args.backoff_cap,
+            "gzip_requests": args.gzip,
+        },
+    }
+
+
+async def _push(service: SyncService, passes: int) -> list[dict]:
+    results = []
+    try:
+        for _ in range(passes):
+            started = time.perf_counter()
+            stats = await service.push("all")
+            wall = time.perf_counter() - started
+            # Linked copies are already counted in skipped.
+            processed = stats.created + stats.updated + stats.skipped + stats.failed
+            summary = stats.summary()
+            summary.update(
+                wall_seconds=round(wall, 2),
+                docs_per_min=round(processed * 60 / wall, 1) if wall else None,
+                save_rpm=round(service.reader.save_rpm, 1),
+                update_rpm=round(service.reader.update_rpm, 1),
+            )
+            results.append(summary)
+    finally:
+        await service.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--passes", type=int, default=2, help="push runs; later ones exercise updates and skips")
+    parser.add_argument("--image-kb", type=int, default=64, help="size of inlined images in big_image pages")
+    parser.add_argument("--corpus-dir", type=Path, default=BENCH_DIR / ".corpus", help="where corpora are cached")
+    parser.add_argument("--client-rpm", type=int, default=50, help="rpm_save/rpm_update ceilings of the client")
+    parser.add_argument("--rpm-floor", type=float, default=5.0)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--upload-concurrency", type=int, default=None)
+    parser.add_argument("--max-retries", type=int, default=4)
+    parser.add_argument("--retry-budget", type=int, default=1000)
+    parser.add_argument("--backoff-base", type=float, default=1.0)
+    parser.add_argument("--backoff-cap", type=float, default=60.0)
+    parser.add_argument("--gzip", action="store_true", help="send gzip request bodies")
+    parser.add_argument("--origin-latency", default="uniform:0.02:0.2", help="latency spec of the title origin")
+    parser.add_argument("--origin-error-rate", type=float, default=0.0)
+    parser.add_argument("--json", type=Path, help="also write the results here")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    origin = FakeOriginServer(Faults(latency=Latency.parse(args.origin_latency), error_rate=args.origin_error_rate))
+    reader = FakeReaderServer(faults_from_args(args), seed=args.seed)
+    origin.start()
+    reader.start()
+    try:
+        # Origin ports change per run, so this corpus is regenerated rather than cached.
+        corpus = args.corpus_dir / f"loadtest-{args.files}"
+        manifest = generate(corpus, args.files, image_bytes=args.image_kb * 1024, origins=(origin.url,))
+        with tempfile.TemporaryDirectory(prefix="rw-sync-loadtest-") as root:
+            cfg = Path(root) / ".rw-sync.yaml"
+            cfg.write_text(json.dumps(_config(args, corpus, reader)), encoding="utf-8")
+            os.environ.setdefault("READWISE_TOKEN", "loadtest")
+            for name in ("RW_SYNC_WATCH_DIR", "RW_SYNC_DB_PATH", "RW_SYNC_READER_URL"):
+                os.environ.pop(name, None)
+            settings = load_settings(cfg)
+            settings.ensure_data_dirs()
+            runs = asyncio.run(_push(SyncService(settings), max(1, args.passes)))
+    finally:
+        reader.stop()
+        origin.stop()
+
+    print(f"corpus: {manifest['files']} files, {manifest['bytes'] / 1e6:.1f} MB")
+    print(f"{'pass':>4}{'created':>9}{'updated':>9}{'skipped':>9}{'failed':>8}{'retries':>9}{'wall s':>9}{'docs/min':>10}{'save rpm':>10}")
+    for index, run in enumerate(runs, 1):
+        print(
+            f"{index:>4}{run['created']:>9}{run['updated']:>9}{run['skipped']:>9}{run['failed']:>8}{run['retries']:>9}"
+            f"{run['wall_seconds']:>9.1f}{run['docs_per_min'] or 0:>10.0f}{run['save_rpm']:>10.1f}"
+        )
+    print("reader:", json.dumps(reader.stats.summary()))
+    print("origin:", json.dumps(origin.stats.summary()))
+    if args.json:
+        args.json.write_text(
+            json.dumps({"runs": runs, "reader": reader.stats.summary(), "origin": origin.stats.summary()}, indent=2),
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
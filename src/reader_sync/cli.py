@@ -2,6 +2,9 @@ from __future__ import annotations
 
 import asyncio
 import os
+import signal
+import time
+from collections import Counter
 from dataclasses import dataclass
 from datetime import date, datetime
 from pathlib import Path
@@ -10,6 +13,12 @@ import typer
 
 from .config import Settings, load_settings
 from .logging_setup import setup_logging
+from .database import Database
+from .models import SyncStats
+from .outbox import Outbox
+from .planner import Planner, format_duration
+from .profiling import StageProfiler, profile_name
+from .reports import load_reports, run_kind, trends
 from .sync import SyncService
 
 app = typer.Typer(help="Local HTML → Readwise Reader sync CLI")
@@ -39,6 +48,7 @@ def main(
     config: Path = typer.Option(None, "--config", exists=True, help="Path to .rw-sync.yaml"),
     dry_run: bool = typer.Option(False, "--dry-run", help="Preview actions without calling Readwise"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Enable debug logging"),
+    profile: bool = typer.Option(False, "--profile", help="Profile CPU and memory per stage into data/reports"),
 ) -> None:
     cfg_path = _resolve_config_path(config)
     settings = load_settings(cfg_path)
@@ -56,6 +66,24 @@ def main(
     )
     if dry_run:
         typer.secho("Running in dry-run mode", fg="yellow", err=True)
+    if profile:
+        profiler = StageProfiler()
+        profiler.start()
+        ctx.call_on_close(lambda: _write_profile(profiler, settings, ctx.invoked_subcommand))
+
+
+def _write_profile(profiler: StageProfiler, settings: Settings, command: str | None) -> None:
+    profiler.stop()
+    try:
+        output = profiler.write(settings.reports_dir, profile_name(command))
+    except OSError as exc:
+        typer.secho(f"Could not write profile: {exc}", fg="red", err=True)
+        return
+    shares = ", ".join(f"{stage} {count}" for stage, count in profiler.stage_samples().items())
+    typer.secho(f"Profile samples by stage: {shares or 'none'}", fg="cyan", err=True)
+    for path in (output.cpu, output.folded, output.memory):
+        if path is not None:
+            typer.secho(f"Profile written to {path}", fg="cyan", err=True)
 
 
 def _get_state(ctx: typer.Context) -> AppState:
@@ -98,18 +126,23 @@ def push(
     ),
     max: int | None = typer.Option(None, "--max", min=1, help="Maximum files to process"),
     since: datetime | None = typer.Option(None, "--since", formats=["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"], help="Only process files modified on/after this timestamp"),
+    resume: bool = typer.Option(False, "--resume", help="Continue the last interrupted push from its checkpoint"),
 ) -> None:
     state = _get_state(ctx)
-    if all == new:
+    if resume:
+        if all or new or max is not None or since is not None:
+            typer.secho("--resume reuses the interrupted run's options; don't combine it with others", fg="red", err=True)
+            raise typer.Exit(code=2)
+    elif all == new:
         typer.secho("Use exactly one of --all or --new", fg="red", err=True)
         raise typer.Exit(code=2)
     mode = "all" if all else "new"
     epoch = since.timestamp() if since else None
 
-    async def _run() -> dict[str, int]:
+    async def _run() -> dict[str, str | int | float | None]:
         service = SyncService(state.settings)
         try:
-            stats = await service.push(mode=mode, dry_run=state.dry_run, max_items=max, since=epoch)
+            stats = await service.push(mode=mode, dry_run=state.dry_run, max_items=max, since=epoch, resume=resume)
             return stats.summary()
         finally:
             await service.close()
@@ -118,11 +151,185 @@ def push(
     typer.echo(summary)
 
 
+@app.command()
+def plan(
+    ctx: typer.Context,
+    all: bool = typer.Option(False, "--all", help="Plan a push of every matching file"),
+    new: bool = typer.Option(False, "--new", help="Plan an incremental push (the default)"),
+    max: int | None = typer.Option(None, "--max", min=1, help="Maximum files to process"),
+    since: datetime | None = typer.Option(None, "--since", formats=["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"], help="Only plan files modified on/after this timestamp"),
+    exact: bool = typer.Option(False, "--exact", help="Read unindexed files locally instead of guessing from filenames"),
+    latency: float = typer.Option(1.0, "--latency", min=0.0, help="Assumed seconds per Reader API call"),
+) -> None:
+    """Estimate API calls and duration of a push from local state, without network access."""
+    state = _get_state(ctx)
+    if all and new:
+        typer.secho("Use at most one of --all or --new", fg="red", err=True)
+        raise typer.Exit(code=2)
+    settings = state.settings
+    db = Database(settings.db_path, batch_size=settings.db_batch_size, batch_interval=settings.db_batch_interval)
+    try:
+        result = Planner(settings, db, exact=exact, request_latency=latency).plan(
+            "all" if all else "new",
+            since=since.timestamp() if since else None,
+            max_items=max,
+        )
+    finally:
+        db.close()
+
+    typer.echo(f"Candidates: {result.candidates} (unindexed: {result.unindexed})")
+    typer.echo(f"  create={result.create} update={result.update} skip={result.skip} (linked={result.linked})")
+    typer.echo(
+        f"API calls: save={result.save_calls} update={result.update_calls} "
+        f"title_fetch={result.title_fetches} (cached titles: {result.title_cache_hits})"
+    )
+    typer.echo(
+        f"Limits: rpm_save={settings.rpm_save} rpm_update={settings.rpm_update} "
+        f"upload_concurrency={settings.upload_concurrency} title_concurrency={settings.title_concurrency}"
+    )
+    for name, seconds in result.bounds.items():
+        typer.echo(f"  {name}: {format_duration(seconds)}")
+    bottleneck = f" (bound by {result.bottleneck})" if result.bottleneck else ""
+    typer.secho(f"ETA: {format_duration(result.eta_seconds)}{bottleneck}", fg="green")
+    if result.unindexed and not exact:
+        typer.secho(
+            f"{result.unindexed} files are not indexed yet and were classified from their filenames; "
+            "use --exact for a precise count",
+            fg="yellow",
+            err=True,
+        )
+
+
+@app.command()
+def watch(
+    ctx: typer.Context,
+    debounce: float | None = typer.Option(None, "--debounce", min=0.0, help="Seconds a file must be quiet before syncing"),
+    catch_up: bool = typer.Option(True, "--catch-up/--no-catch-up", help="Run an incremental push before watching"),
+) -> None:
+    """Sync new or changed files as soon as they are written."""
+    state = _get_state(ctx)
+    if debounce is not None:
+        state.settings.watch_debounce = debounce
+    stats = SyncStats()
+
+    async def _run() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        service = SyncService(state.settings)
+        try:
+            await service.watch(dry_run=state.dry_run, catch_up=catch_up, stop=stop, stats=stats)
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(_run())
+    except RuntimeError as exc:
+        typer.secho(str(exc), fg="red", err=True)
+        raise typer.Exit(code=1) from None
+    except KeyboardInterrupt:
+        pass
+    typer.echo(stats.summary())
+
+
+@app.command()
+def flush(
+    ctx: typer.Context,
+    force: bool = typer.Option(False, "--force", help="Also retry entries still waiting out their backoff"),
+) -> None:
+    """Retry every failed file in the outbox in one concurrent pass."""
+    state = _get_state(ctx)
+
+    async def _run() -> dict[str, str | int | float | None]:
+        service = SyncService(state.settings)
+        try:
+            stats = await service.flush(dry_run=state.dry_run, force=force)
+            return stats.summary()
+        finally:
+            await service.close()
+
+    summary = asyncio.run(_run())
+    typer.echo(summary)
+
+
+@app.command()
+def outbox(
+    ctx: typer.Context,
+    export: Path | None = typer.Option(None, "--export", help="Write all outbox rows to this CSV file"),
+) -> None:
+    """Show pending failures by error class, optionally exporting them as CSV."""
+    settings = _get_state(ctx).settings
+    db = Database(settings.db_path, batch_size=settings.db_batch_size, batch_interval=settings.db_batch_interval)
+    try:
+        entries = db.all_outbox()
+        if export is not None:
+            count = Outbox(db).export_csv(export)
+            typer.secho(f"Exported {count} outbox rows to {export}", fg="green", err=True)
+    finally:
+        db.close()
+    now = time.time()
+    by_class = Counter(entry.error_class for entry in entries)
+    due = sum(1 for entry in entries if entry.next_attempt_at <= now)
+    typer.echo({"pending": len(entries), "due": due, **dict(sorted(by_class.items()))})
+
+
+@app.command()
+def stats(
+    ctx: typer.Context,
+    last: int = typer.Option(10, "--last", min=2, help="Number of recent run reports to summarize"),
+    threshold: float = typer.Option(0.2, "--threshold", min=0.0, help="Relative change flagged as a regression"),
+) -> None:
+    """Summarize recent run reports from data/reports and flag performance regressions."""
+    settings = _get_state(ctx).settings
+    history = load_reports(settings.reports_dir)
+    reports = history[-last:]
+    if not reports:
+        typer.secho(f"No run reports in {settings.reports_dir}", fg="yellow", err=True)
+        raise typer.Exit(code=1)
+
+    typer.echo(f"{'started':<20}{'command':<14}{'files':>8}{'wall':>9}{'docs/min':>10}{'discover':>10}{'save p95':>10}{'MiB up':>8}")
+    for report in reports:
+        counts = report["counts"]
+        discover = report["stages"].get("discover", {}).get("wall")
+        save_p95 = report["latency"].get("save", {}).get("p95")
+        started = datetime.fromisoformat(report["started_at"]).astimezone().strftime("%Y-%m-%d %H:%M")
+        command = report["command"] if report["command"] == report["mode"] else f"{report['command']} {report['mode']}"
+        typer.echo(
+            f"{started:<20}{command + (' *' if report['dry_run'] else ''):<14}{counts['processed']:>8}"
+            f"{format_duration(report['wall_seconds']):>9}{report['docs_per_min'] or 0:>10.1f}"
+            f"{_seconds(discover):>10}{_seconds(save_p95):>10}{report['uploaded_bytes'] / (1024 * 1024):>8.1f}"
+        )
+
+    changes = trends(history, window=last)
+    if not changes:
+        return
+    command, mode, dry_run = run_kind(history[-1])
+    kind = command if command == mode else f"{command} {mode}"
+    typer.echo(f"Latest run vs. median of earlier {kind}{' dry' if dry_run else ''} runs:")
+    for trend in changes:
+        change = trend.change
+        line = f"  {trend.name:<22}{trend.latest:>10.3f} (median {trend.baseline:.3f}"
+        line += f", {change:+.0%})" if change is not None else ")"
+        if trend.regressed(threshold):
+            typer.secho(line + "  regression", fg="red")
+        else:
+            typer.echo(line)
+
+
+def _seconds(value: float | None) -> str:
+    return "-" if value is None else f"{value:.2f}s"
+
+
 @app.command()
 def replay(
     ctx: typer.Context,
     date_option: str | None = typer.Option(None, "--date", help="Replay failures from this date (YYYY-MM-DD)"),
 ) -> None:
+    """Replay a legacy per-day failures CSV (new failures go to the outbox; see `flush`)."""
     state = _get_state(ctx)
     if date_option:
         try:
@@ -133,7 +340,7 @@ def replay(
     else:
         target_date = date.today()
 
-    async def _run() -> dict[str, int]:
+    async def _run() -> dict[str, str | int | float | None]:
         service = SyncService(state.settings)
         try:
             stats = await service.replay(date=target_date, dry_run=state.dry_run)
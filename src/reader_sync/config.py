@@ -23,6 +23,8 @@ _DEFAULT_DROP_PARAMS = (
     "ref",
 )
 
+_DEFAULT_SLIM_ELEMENTS = {"script": 0, "style": 0, "noscript": 0, "template": 0}
+
 
 @dataclass(slots=True)
 class Settings:
@@ -40,6 +42,57 @@ class Settings:
     default_category: str
     keep_params: frozenset[str]
     drop_params: frozenset[str]
+    exclude: tuple[str, ...] = ()
+    max_depth: int | None = None
+    watch_debounce: float = 2.0
+    # Pipeline stage workers and queue bound; load_settings defaults them to `concurrency`.
+    prepare_concurrency: int = 6
+    title_concurrency: int = 6
+    upload_concurrency: int = 6
+    queue_size: int = 24
+    # >0 runs document preparation in a process pool of this size instead of threads.
+    prepare_workers: int = 0
+    # Remote <title> cache lifetimes in seconds for fetched titles and for failures.
+    title_cache_ttl: float = 7 * 24 * 3600
+    title_negative_ttl: float = 24 * 3600
+    # Stop reading a source page after this many bytes if </title> has not appeared.
+    title_max_bytes: int = 256 * 1024
+    # Per-host title fetch concurrency and circuit breaker (consecutive failures, seconds open).
+    title_per_host: int = 2
+    title_breaker_threshold: int = 5
+    title_breaker_cooldown: float = 1800.0
+    # Reader API retries for 429/5xx/connection errors.
+    max_retries: int = 4
+    retry_budget: int = 100
+    backoff_base: float = 1.0
+    backoff_cap: float = 60.0
+    # Lowest rate the adaptive save/update limiters may back off to (requests/min).
+    rpm_floor: float = 5.0
+    # Reader transport: HTTP/2, gzip request bodies from this size up, connections opened during discovery.
+    http2: bool = False
+    gzip_requests: bool = False
+    gzip_min_bytes: int = 8 * 1024
+    warm_connections: int = 1
+    # Reader API origin; point it at a local fake server for offline load tests.
+    reader_base_url: str = "https://readwise.io"
+    # State DB write-behind: commit after this many queued writes or seconds, whichever first.
+    db_batch_size: int = 200
+    db_batch_interval: float = 0.5
+    # Seconds between durable progress checkpoints of a push run (see `push --resume`).
+    checkpoint_interval: float = 2.0
+    # Failed files wait base * 2**(attempts-1) seconds (capped) before `flush` retries them.
+    outbox_backoff_base: float = 300.0
+    outbox_backoff_cap: float = 6 * 3600
+    # Optional pre-upload HTML slimming: tag -> size threshold in bytes (0 always removes).
+    slim_html: bool = False
+    slim_elements: dict[str, int] = field(default_factory=lambda: dict(_DEFAULT_SLIM_ELEMENTS))
+    slim_max_data_uri: int = 32 * 1024
+    slim_strip_fonts: bool = True
+    # Metrics export: node-exporter textfile path and/or a local /metrics port (watch only).
+    metrics_textfile: Path | None = None
+    metrics_port: int | None = None
+    metrics_host: str = "127.0.0.1"
+    metrics_interval: float = 15.0
     token: str = ""
     log_level: str = "INFO"
     config_path: Path | None = None
@@ -51,6 +104,10 @@ class Settings:
         for sub in ("failures", "out", "reports", "state"):
             (root_data / sub).mkdir(parents=True, exist_ok=True)
 
+    @property
+    def reports_dir(self) -> Path:
+        return self.root / "data" / "reports"
+
     @property
     def has_token(self) -> bool:
         return bool(self.token)
@@ -83,6 +140,8 @@ def load_settings(path: str | os.PathLike[str] | None) -> Settings:
     net = data.get("network", {}) if isinstance(data, dict) else {}
     rw = data.get("readwise", {}) if isinstance(data, dict) else {}
     norm = data.get("url_norm", {}) if isinstance(data, dict) else {}
+    slim = data.get("slim", {}) if isinstance(data, dict) else {}
+    metrics = data.get("metrics", {}) if isinstance(data, dict) else {}
 
     watch_dir = (root / _coerce_path(watch, "dir", "./inbox")).resolve()
     # Allow environment override for watch directory to avoid committing user-specific paths.
@@ -90,8 +149,17 @@ def load_settings(path: str | os.PathLike[str] | None) -> Settings:
     if env_watch_dir:
         watch_dir = Path(env_watch_dir).expanduser().resolve()
     patterns = _tuple_from(_coerce_list(watch, "patterns"), _DEFAULT_PATTERNS)
+    exclude = _tuple_from(_coerce_list(watch, "exclude"), ())
+    raw_depth = _coerce_value(watch, "max_depth", None)
+    max_depth = int(raw_depth) if raw_depth is not None else None
+    watch_debounce = float(_coerce_value(watch, "debounce", 2.0))
 
     db_path = (root / _coerce_path(state, "db_path", "./data/state/rw_sync.db")).resolve()
+    db_batch_size = max(1, int(_coerce_value(state, "batch_size", 200)))
+    db_batch_interval = max(0.0, float(_coerce_value(state, "batch_interval", 0.5)))
+    checkpoint_interval = max(0.1, float(_coerce_value(state, "checkpoint_interval", 2.0)))
+    outbox_backoff_base = max(0.0, float(_coerce_value(state, "outbox_backoff_base", 300.0)))
+    outbox_backoff_cap = max(outbox_backoff_base, float(_coerce_value(state, "outbox_backoff_cap", 6 * 3600)))
     # Allow environment override for database path as it may be user-specific.
     env_db_path = os.getenv("RW_SYNC_DB_PATH")
     if env_db_path:
@@ -101,9 +169,45 @@ def load_settings(path: str | os.PathLike[str] | None) -> Settings:
     concurrency = int(_coerce_value(net, "concurrency", 6))
     rpm_save = int(_coerce_value(net, "rpm_save", 50))
     rpm_update = int(_coerce_value(net, "rpm_update", 50))
+    prepare_concurrency = max(1, int(_coerce_value(net, "prepare_concurrency", concurrency)))
+    title_concurrency = max(1, int(_coerce_value(net, "title_concurrency", concurrency)))
+    upload_concurrency = max(1, int(_coerce_value(net, "upload_concurrency", concurrency)))
+    queue_size = max(1, int(_coerce_value(net, "queue_size", concurrency * 4)))
+    prepare_workers = max(0, int(_coerce_value(net, "prepare_workers", 0)))
+    title_cache_ttl = float(_coerce_value(net, "title_cache_ttl", 7 * 24 * 3600))
+    title_negative_ttl = float(_coerce_value(net, "title_negative_ttl", 24 * 3600))
+    title_max_bytes = max(1024, int(_coerce_value(net, "title_max_bytes", 256 * 1024)))
+    title_per_host = max(1, int(_coerce_value(net, "title_per_host", 2)))
+    title_breaker_threshold = max(1, int(_coerce_value(net, "title_breaker_threshold", 5)))
+    title_breaker_cooldown = float(_coerce_value(net, "title_breaker_cooldown", 1800.0))
+    max_retries = max(0, int(_coerce_value(net, "max_retries", 4)))
+    retry_budget = max(0, int(_coerce_value(net, "retry_budget", 100)))
+    backoff_base = max(0.0, float(_coerce_value(net, "backoff_base", 1.0)))
+    backoff_cap = max(backoff_base, float(_coerce_value(net, "backoff_cap", 60.0)))
+    rpm_floor = max(0.1, float(_coerce_value(net, "rpm_floor", 5.0)))
+    http2 = bool(_coerce_value(net, "http2", False))
+    gzip_requests = bool(_coerce_value(net, "gzip_requests", False))
+    gzip_min_bytes = max(0, int(_coerce_value(net, "gzip_min_bytes", 8 * 1024)))
+    warm_connections = max(0, int(_coerce_value(net, "warm_connections", 1)))
 
     should_clean_html = bool(_coerce_value(rw, "should_clean_html", True))
     default_category = str(_coerce_value(rw, "default_category", "article"))
+    reader_base_url = str(_coerce_value(rw, "base_url", "https://readwise.io")).rstrip("/")
+    env_reader_url = os.getenv("RW_SYNC_READER_URL")
+    if env_reader_url:
+        reader_base_url = env_reader_url.strip().rstrip("/")
+
+    slim_html = bool(_coerce_value(slim, "enabled", False))
+    slim_elements = _coerce_thresholds(slim, "elements", _DEFAULT_SLIM_ELEMENTS)
+    slim_max_data_uri = max(0, int(_coerce_value(slim, "max_data_uri_bytes", 32 * 1024)))
+    slim_strip_fonts = bool(_coerce_value(slim, "strip_fonts", True))
+
+    raw_textfile = _coerce_value(metrics, "textfile", None)
+    metrics_textfile = (root / Path(str(raw_textfile))).resolve() if raw_textfile else None
+    raw_port = _coerce_value(metrics, "port", None)
+    metrics_port = int(raw_port) if raw_port is not None else None
+    metrics_host = str(_coerce_value(metrics, "host", "127.0.0.1"))
+    metrics_interval = max(1.0, float(_coerce_value(metrics, "interval", 15.0)))
 
     keep_params = frozenset(_tuple_from(_coerce_list(norm, "keep_params"), _DEFAULT_KEEP_PARAMS))
     drop_params = frozenset(_tuple_from(_coerce_list(norm, "drop_params"), _DEFAULT_DROP_PARAMS))
@@ -123,6 +227,43 @@ def load_settings(path: str | os.PathLike[str] | None) -> Settings:
         default_category=default_category,
         keep_params=keep_params,
         drop_params=drop_params,
+        exclude=exclude,
+        max_depth=max_depth,
+        watch_debounce=watch_debounce,
+        prepare_concurrency=prepare_concurrency,
+        title_concurrency=title_concurrency,
+        upload_concurrency=upload_concurrency,
+        queue_size=queue_size,
+        prepare_workers=prepare_workers,
+        title_cache_ttl=title_cache_ttl,
+        title_negative_ttl=title_negative_ttl,
+        title_max_bytes=title_max_bytes,
+        title_per_host=title_per_host,
+        title_breaker_threshold=title_breaker_threshold,
+        title_breaker_cooldown=title_breaker_cooldown,
+        max_retries=max_retries,
+        retry_budget=retry_budget,
+        backoff_base=backoff_base,
+        backoff_cap=backoff_cap,
+        rpm_floor=rpm_floor,
+        http2=http2,
+        gzip_requests=gzip_requests,
+        gzip_min_bytes=gzip_min_bytes,
+        warm_connections=warm_connections,
+        reader_base_url=reader_base_url,
+        db_batch_size=db_batch_size,
+        db_batch_interval=db_batch_interval,
+        checkpoint_interval=checkpoint_interval,
+        outbox_backoff_base=outbox_backoff_base,
+        outbox_backoff_cap=outbox_backoff_cap,
+        slim_html=slim_html,
+        slim_elements=slim_elements,
+        slim_max_data_uri=slim_max_data_uri,
+        slim_strip_fonts=slim_strip_fonts,
+        metrics_textfile=metrics_textfile,
+        metrics_port=metrics_port,
+        metrics_host=metrics_host,
+        metrics_interval=metrics_interval,
         token=token,
         config_path=cfg_path,
     )
@@ -144,6 +285,18 @@ def _coerce_list(section: object, key: str) -> list[str] | None:
     return None
 
 
+def _coerce_thresholds(section: object, key: str, default: dict[str, int]) -> dict[str, int]:
+    """Read a tag -> bytes mapping; a plain list means "always remove" (threshold 0)."""
+    if not isinstance(section, dict) or key not in section or section[key] is None:
+        return dict(default)
+    raw = section[key]
+    if isinstance(raw, dict):
+        return {str(tag).lower(): max(0, int(limit or 0)) for tag, limit in raw.items() if tag}
+    if isinstance(raw, list):
+        return {str(tag).lower(): 0 for tag in raw if tag}
+    return {str(raw).lower(): 0}
+
+
 def _coerce_value(section: object, key: str, default: object) -> object:
     if isinstance(section, dict) and key in section:
         value = section[key]
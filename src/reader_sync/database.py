@@ -1,13 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import logging
+import queue
 import sqlite3
-from contextlib import contextmanager
-from dataclasses import asdict
+import threading
+import time
+from concurrent.futures import Future
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterator
+from typing import Any, Callable, TypeVar
 
-from .models import DocumentState
+from .models import DocumentState, FileIndexEntry, HostBreaker, OutboxEntry, RemoteTitle, RunRecord
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 SCHEMA = """
 PRAGMA journal_mode=WAL;
@@ -23,61 +32,262 @@ CREATE TABLE IF NOT EXISTS documents (
     last_status INTEGER,
     last_error TEXT,
     created_at TEXT,
-    updated_at TEXT
+    updated_at TEXT,
+    sha1 TEXT
 );
 CREATE TABLE IF NOT EXISTS meta (
     key TEXT PRIMARY KEY,
     value TEXT
 );
+CREATE TABLE IF NOT EXISTS file_index (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    inode INTEGER,
+    sha1 TEXT NOT NULL,
+    norm_url TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    url_source TEXT NOT NULL,
+    local_title TEXT,
+    indexed_at TEXT
+);
+CREATE TABLE IF NOT EXISTS remote_titles (
+    norm_url TEXT PRIMARY KEY,
+    title TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL,
+    checked_at REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    file_path TEXT PRIMARY KEY,
+    norm_url TEXT,
+    source_url TEXT,
+    action TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    error_class TEXT NOT NULL,
+    status INTEGER,
+    last_error TEXT,
+    first_failed_at REAL NOT NULL,
+    last_failed_at REAL NOT NULL,
+    next_attempt_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_next_attempt ON outbox(next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_outbox_norm_url ON outbox(norm_url);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL,
+    done INTEGER NOT NULL DEFAULT 0,
+    checkpoint TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+CREATE TABLE IF NOT EXISTS host_breakers (
+    host TEXT PRIMARY KEY,
+    failures INTEGER NOT NULL DEFAULT 0,
+    opened_until REAL,
+    updated_at TEXT
+);
 """
 
+# Columns added after a table first shipped; older state DBs are altered on open.
+_ADDED_COLUMNS = (("documents", "sha1", "TEXT"),)
+# Content lookups are served from DocumentCache; the old sha1 index only slowed writes.
+_INDEXES = "DROP INDEX IF EXISTS idx_documents_sha1;"
+
 
 class Database:
-    """Thin wrapper around sqlite3 for document state persistence."""
+    """SQLite document state store with a write-behind writer thread.
 
-    def __init__(self, path: Path) -> None:
+    The connection lives on a dedicated thread. Writes are queued without
+    blocking the caller and grouped into one transaction per ``batch_size``
+    statements or ``batch_interval`` seconds, whichever comes first. Reads go
+    through the same queue, so they always observe earlier writes but also
+    wait for them: hot paths should read from a preloaded copy (see
+    :class:`DocumentCache`) or await the ``*_async`` variants. Use
+    :meth:`flush` (or :meth:`wait_durable` from async code) to wait until
+    everything queued so far is committed; it raises the first statement or
+    commit error since the previous flush. ``observe`` is called on the
+    writer thread with ``"db_write"`` and the seconds each committed batch
+    spent executing.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        batch_size: int = 200,
+        batch_interval: float = 0.5,
+        observe: Callable[[str, float], None] | None = None,
+    ) -> None:
         self.path = path
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self._conn = sqlite3.connect(
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = max(0.0, batch_interval)
+        self._queue: queue.SimpleQueue[tuple[str, Any, Any]] = queue.SimpleQueue()
+        self._observe = observe
+        self._closed = False
+        # First failed statement or commit since the last flush; only touched on the writer thread.
+        self._write_error: sqlite3.Error | None = None
+        ready: Future[None] = Future()
+        self._thread = threading.Thread(target=self._writer, args=(ready,), name="rw-sync-db", daemon=True)
+        self._thread.start()
+        ready.result()
+
+    # --- writer thread plumbing ---
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
             self.path,
             timeout=30,
             isolation_level=None,
             detect_types=sqlite3.PARSE_DECLTYPES,
         )
-        self._conn.row_factory = sqlite3.Row
-        self._conn.executescript(SCHEMA)
+        conn.row_factory = sqlite3.Row
+        conn.executescript(SCHEMA)
+        for table, column, decl in _ADDED_COLUMNS:
+            existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+        conn.executescript(_INDEXES)
+        return conn
+
+    def _writer(self, ready: Future[None]) -> None:
+        try:
+            conn = self._connect()
+        except BaseException as exc:  # noqa: BLE001
+            ready.set_exception(exc)
+            return
+        ready.set_result(None)
+        pending = 0
+        busy = 0.0
+        deadline: float | None = None
+
+        def commit() -> None:
+            nonlocal pending, busy, deadline
+            if conn.in_transaction:
+                started = time.perf_counter()
+                conn.execute("COMMIT")
+                if self._observe is not None and pending:
+                    self._observe("db_write", busy + time.perf_counter() - started)
+            pending = 0
+            busy = 0.0
+            deadline = None
+
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                kind, payload, future = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._guard(commit)
+                continue
+            if kind == "write":
+                sql, params = payload
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                    deadline = time.monotonic() + self.batch_interval
+                started = time.perf_counter()
+                try:
+                    conn.execute(sql, params)
+                except sqlite3.Error as exc:
+                    logger.exception("Database write failed: %s", sql.split("(", 1)[0].strip())
+                    self._write_error = self._write_error or exc
+                busy += time.perf_counter() - started
+                pending += 1
+                if pending >= self.batch_size:
+                    self._guard(commit)
+            elif kind == "read":
+                self._resolve(future, payload, conn)
+            elif kind == "flush":
+                self._resolve(future, lambda _conn: self._durable(commit), conn)
+            elif kind == "close":
+                self._guard(commit)
+                conn.close()
+                future.set_result(None)
+                return
+
+    def _guard(self, fn: Callable[[], None]) -> None:
+        try:
+            fn()
+        except sqlite3.Error as exc:
+            logger.exception("Database commit failed")
+            self._write_error = self._write_error or exc
+
+    def _durable(self, commit: Callable[[], None]) -> None:
+        self._guard(commit)
+        error, self._write_error = self._write_error, None
+        if error is not None:
+            raise error
 
-    @contextmanager
-    def cursor(self) -> Iterator[sqlite3.Cursor]:
-        cur = self._conn.cursor()
+    @staticmethod
+    def _resolve(future: Future[Any], fn: Callable[[sqlite3.Connection], Any], conn: sqlite3.Connection) -> None:
         try:
-            yield cur
-        finally:
-            cur.close()
+            future.set_result(fn(conn))
+        except BaseException as exc:  # noqa: BLE001
+            future.set_exception(exc)
 
+    def _write(self, sql: str, params: tuple[Any, ...]) -> None:
+        if self._closed:
+            raise RuntimeError("database is closed")
+        self._queue.put(("write", (sql, params), None))
+
+    def _submit(self, fn: Callable[[sqlite3.Connection], T]) -> Future[T]:
+        if self._closed:
+            raise RuntimeError("database is closed")
+        future: Future[T] = Future()
+        self._queue.put(("read", fn, future))
+        return future
+
+    def _read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return self._submit(fn).result()
+
+    async def _read_async(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return await asyncio.wrap_future(self._submit(fn))
+
+    def flush(self) -> Future[None]:
+        """Commit everything queued so far; the returned future resolves once durable.
+
+        It fails with the first write error since the previous flush, if any.
+        """
+        future: Future[None] = Future()
+        if self._closed:
+            future.set_result(None)
+            return future
+        self._queue.put(("flush", None, future))
+        return future
+
+    async def wait_durable(self) -> None:
+        await asyncio.wrap_future(self.flush())
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        future: Future[None] = Future()
+        self._queue.put(("close", None, future))
+        future.result()
+        self._thread.join()
+
+    # --- documents ---
     def lookup(self, norm_url: str) -> DocumentState | None:
-        with self.cursor() as cur:
-            cur.execute(
-                "SELECT norm_url, source_url, title, title_source, file_path, file_mtime, readwise_id, "
-                "last_status, last_error, created_at, updated_at FROM documents WHERE norm_url = ?",
-                (norm_url,),
-            )
-            row = cur.fetchone()
-            if not row:
-                return None
-            return DocumentState(
-                norm_url=row["norm_url"],
-                source_url=row["source_url"],
-                title=row["title"],
-                title_source=row["title_source"],
-                file_path=row["file_path"],
-                file_mtime=row["file_mtime"],
-                readwise_id=row["readwise_id"],
-                last_status=row["last_status"],
-                last_error=row["last_error"],
-                created_at=_parse_dt(row["created_at"]),
-                updated_at=_parse_dt(row["updated_at"]),
-            )
+        def _op(conn: sqlite3.Connection) -> DocumentState | None:
+            row = conn.execute(f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE norm_url = ?", (norm_url,)).fetchone()
+            return _document_from_row(row) if row else None
+
+        return self._read(_op)
+
+    def all_documents(self) -> list[DocumentState]:
+        """Every stored document state, read in one query."""
+
+        def _op(conn: sqlite3.Connection) -> list[DocumentState]:
+            return [_document_from_row(row) for row in conn.execute(f"SELECT {_DOCUMENT_COLUMNS} FROM documents")]
+
+        return self._read(_op)
 
     def upsert(
         self,
@@ -91,66 +301,342 @@ class Database:
         readwise_id: str | None,
         last_status: int | None,
         last_error: str | None,
+        sha1: str | None = None,
     ) -> None:
         now = datetime.now(timezone.utc).isoformat()
-        with self.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO documents (
-                    norm_url, source_url, title, title_source, file_path, file_mtime,
-                    readwise_id, last_status, last_error, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(norm_url) DO UPDATE SET
-                    source_url=excluded.source_url,
-                    title=excluded.title,
-                    title_source=excluded.title_source,
-                    file_path=excluded.file_path,
-                    file_mtime=excluded.file_mtime,
-                    readwise_id=COALESCE(excluded.readwise_id, documents.readwise_id),
-                    last_status=excluded.last_status,
-                    last_error=excluded.last_error,
-                    updated_at=excluded.updated_at
-                """,
-                (
-                    norm_url,
-                    source_url,
-                    title,
-                    title_source,
-                    file_path,
-                    file_mtime,
-                    readwise_id,
-                    last_status,
-                    last_error,
-                    now,
-                    now,
-                ),
-            )
+        self._write(
+            """
+            INSERT INTO documents (
+                norm_url, source_url, title, title_source, file_path, file_mtime,
+                readwise_id, last_status, last_error, created_at, updated_at, sha1
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(norm_url) DO UPDATE SET
+                source_url=excluded.source_url,
+                title=excluded.title,
+                title_source=excluded.title_source,
+                file_path=excluded.file_path,
+                file_mtime=excluded.file_mtime,
+                readwise_id=COALESCE(excluded.readwise_id, documents.readwise_id),
+                last_status=excluded.last_status,
+                last_error=excluded.last_error,
+                updated_at=excluded.updated_at,
+                sha1=COALESCE(excluded.sha1, documents.sha1)
+            """,
+            (
+                norm_url,
+                source_url,
+                title,
+                title_source,
+                file_path,
+                file_mtime,
+                readwise_id,
+                last_status,
+                last_error,
+                now,
+                now,
+                sha1,
+            ),
+        )
 
     def update_status(self, norm_url: str, *, status: int | None, error: str | None) -> None:
         now = datetime.now(timezone.utc).isoformat()
-        with self.cursor() as cur:
-            cur.execute(
-                "UPDATE documents SET last_status = ?, last_error = ?, updated_at = ? WHERE norm_url = ?",
-                (status, error, now, norm_url),
+        self._write(
+            "UPDATE documents SET last_status = ?, last_error = ?, updated_at = ? WHERE norm_url = ?",
+            (status, error, now, norm_url),
+        )
+
+    # --- per-file scan index ---
+    def lookup_file(self, path: str) -> FileIndexEntry | None:
+        def _op(conn: sqlite3.Connection) -> FileIndexEntry | None:
+            row = conn.execute(f"SELECT {_FILE_COLUMNS} FROM file_index WHERE path = ?", (path,)).fetchone()
+            return _file_from_row(row) if row else None
+
+        return self._read(_op)
+
+    def all_files(self) -> dict[str, FileIndexEntry]:
+        """The whole scan index keyed by path, read in one query."""
+
+        def _op(conn: sqlite3.Connection) -> dict[str, FileIndexEntry]:
+            return {row["path"]: _file_from_row(row) for row in conn.execute(f"SELECT {_FILE_COLUMNS} FROM file_index")}
+
+        return self._read(_op)
+
+    def upsert_file(self, entry: FileIndexEntry) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        self._write(
+            """
+            INSERT INTO file_index (
+                path, size, mtime, inode, sha1, norm_url, source_url, url_source, local_title, indexed_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                size=excluded.size,
+                mtime=excluded.mtime,
+                inode=excluded.inode,
+                sha1=excluded.sha1,
+                norm_url=excluded.norm_url,
+                source_url=excluded.source_url,
+                url_source=excluded.url_source,
+                local_title=excluded.local_title,
+                indexed_at=excluded.indexed_at
+            """,
+            (
+                entry.path,
+                entry.size,
+                entry.mtime,
+                entry.inode,
+                entry.sha1,
+                entry.norm_url,
+                entry.source_url,
+                entry.url_source,
+                entry.local_title,
+                now,
+            ),
+        )
+
+    # --- remote <title> cache ---
+    def lookup_remote_title(self, norm_url: str) -> RemoteTitle | None:
+        def _op(conn: sqlite3.Connection) -> RemoteTitle | None:
+            row = conn.execute(
+                f"SELECT {_TITLE_COLUMNS} FROM remote_titles WHERE norm_url = ?", (norm_url,)
+            ).fetchone()
+            return _title_from_row(row) if row else None
+
+        return self._read(_op)
+
+    def all_remote_titles(self) -> dict[str, RemoteTitle]:
+        """The whole remote title cache keyed by norm_url, read in one query."""
+
+        def _op(conn: sqlite3.Connection) -> dict[str, RemoteTitle]:
+            rows = conn.execute(f"SELECT {_TITLE_COLUMNS} FROM remote_titles")
+            return {row["norm_url"]: _title_from_row(row) for row in rows}
+
+        return self._read(_op)
+
+    def upsert_remote_title(self, entry: RemoteTitle) -> None:
+        self._write(
+            """
+            INSERT INTO remote_titles (
+                norm_url, title, etag, last_modified, fetched_at, checked_at, failures, last_error
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(norm_url) DO UPDATE SET
+                title=excluded.title,
+                etag=excluded.etag,
+                last_modified=excluded.last_modified,
+                fetched_at=excluded.fetched_at,
+                checked_at=excluded.checked_at,
+                failures=excluded.failures,
+                last_error=excluded.last_error
+            """,
+            (
+                entry.norm_url,
+                entry.title,
+                entry.etag,
+                entry.last_modified,
+                entry.fetched_at,
+                entry.checked_at,
+                entry.failures,
+                entry.last_error,
+            ),
+        )
+
+    # --- per-host circuit breakers for title fetching ---
+    def lookup_host_breaker(self, host: str) -> HostBreaker | None:
+        return self._read(_host_breaker_op(host))
+
+    async def lookup_host_breaker_async(self, host: str) -> HostBreaker | None:
+        return await self._read_async(_host_breaker_op(host))
+
+    def upsert_host_breaker(self, breaker: HostBreaker) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        self._write(
+            """
+            INSERT INTO host_breakers (host, failures, opened_until, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(host) DO UPDATE SET
+                failures=excluded.failures,
+                opened_until=excluded.opened_until,
+                updated_at=excluded.updated_at
+            """,
+            (breaker.host, breaker.failures, breaker.opened_until, now),
+        )
+
+    # --- outbox of failed/pending files ---
+    def all_outbox(self) -> list[OutboxEntry]:
+        def _op(conn: sqlite3.Connection) -> list[OutboxEntry]:
+            rows = conn.execute(f"SELECT {_OUTBOX_COLUMNS} FROM outbox ORDER BY next_attempt_at")
+            return [OutboxEntry(**dict(row)) for row in rows]
+
+        return self._read(_op)
+
+    def outbox_attempts(self, file_path: str) -> int:
+        def _op(conn: sqlite3.Connection) -> int:
+            row = conn.execute("SELECT attempts FROM outbox WHERE file_path = ?", (file_path,)).fetchone()
+            return row[0] if row else 0
+
+        return self._read(_op)
+
+    def upsert_outbox(self, entry: OutboxEntry) -> None:
+        self._write(
+            f"""
+            INSERT INTO outbox ({_OUTBOX_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(file_path) DO UPDATE SET
+                norm_url=COALESCE(excluded.norm_url, outbox.norm_url),
+                source_url=COALESCE(excluded.source_url, outbox.source_url),
+                action=excluded.action,
+                attempts=excluded.attempts,
+                error_class=excluded.error_class,
+                status=excluded.status,
+                last_error=excluded.last_error,
+                last_failed_at=excluded.last_failed_at,
+                next_attempt_at=excluded.next_attempt_at
+            """,
+            (
+                entry.file_path,
+                entry.norm_url,
+                entry.source_url,
+                entry.action,
+                entry.attempts,
+                entry.error_class,
+                entry.status,
+                entry.last_error,
+                entry.first_failed_at,
+                entry.last_failed_at,
+                entry.next_attempt_at,
+            ),
+        )
+
+    def delete_outbox(self, *, file_path: str, norm_url: str | None = None) -> None:
+        self._write("DELETE FROM outbox WHERE file_path = ? OR norm_url = ?", (file_path, norm_url))
+
+    # --- run journal ---
+    def upsert_run(self, record: RunRecord) -> None:
+        self._write(
+            """
+            INSERT INTO runs (run_id, mode, params, status, started_at, updated_at, finished_at, done, checkpoint)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(run_id) DO UPDATE SET
+                status=excluded.status,
+                updated_at=excluded.updated_at,
+                finished_at=excluded.finished_at,
+                done=excluded.done,
+                checkpoint=excluded.checkpoint
+            """,
+            (
+                record.run_id,
+                record.mode,
+                json.dumps(record.params),
+                record.status,
+                record.started_at,
+                record.updated_at,
+                record.finished_at,
+                record.done,
+                json.dumps(record.checkpoint) if record.checkpoint is not None else None,
+            ),
+        )
+
+    def latest_run(self) -> RunRecord | None:
+        def _op(conn: sqlite3.Connection) -> RunRecord | None:
+            row = conn.execute("SELECT * FROM runs ORDER BY started_at DESC LIMIT 1").fetchone()
+            if not row:
+                return None
+            return RunRecord(
+                run_id=row["run_id"],
+                mode=row["mode"],
+                params=json.loads(row["params"]),
+                status=row["status"],
+                started_at=row["started_at"],
+                updated_at=row["updated_at"],
+                finished_at=row["finished_at"],
+                done=row["done"],
+                checkpoint=json.loads(row["checkpoint"]) if row["checkpoint"] else None,
             )
 
-    def close(self) -> None:
-        self._conn.close()
+        return self._read(_op)
 
     # --- lightweight key/value metadata ---
     def get_meta(self, key: str) -> str | None:
-        with self.cursor() as cur:
-            cur.execute("SELECT value FROM meta WHERE key = ?", (key,))
-            row = cur.fetchone()
+        def _op(conn: sqlite3.Connection) -> str | None:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
             return row[0] if row else None
 
+        return self._read(_op)
+
     def set_meta(self, key: str, value: str) -> None:
-        with self.cursor() as cur:
-            cur.execute(
-                "INSERT INTO meta (key, value) VALUES (?, ?)\n"
-                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
-                (key, value),
-            )
+        self._write(
+            "INSERT INTO meta (key, value) VALUES (?, ?)\n"
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value),
+        )
+
+
+_DOCUMENT_COLUMNS = (
+    "norm_url, source_url, title, title_source, file_path, file_mtime, readwise_id, "
+    "last_status, last_error, created_at, updated_at, sha1"
+)
+
+
+def _document_from_row(row: sqlite3.Row) -> DocumentState:
+    return DocumentState(
+        norm_url=row["norm_url"],
+        source_url=row["source_url"],
+        title=row["title"],
+        title_source=row["title_source"],
+        file_path=row["file_path"],
+        file_mtime=row["file_mtime"],
+        readwise_id=row["readwise_id"],
+        last_status=row["last_status"],
+        last_error=row["last_error"],
+        created_at=_parse_dt(row["created_at"]),
+        updated_at=_parse_dt(row["updated_at"]),
+        sha1=row["sha1"],
+    )
+
+
+_FILE_COLUMNS = "path, size, mtime, inode, sha1, norm_url, source_url, url_source, local_title"
+
+
+def _file_from_row(row: sqlite3.Row) -> FileIndexEntry:
+    return FileIndexEntry(
+        path=row["path"],
+        size=row["size"],
+        mtime=row["mtime"],
+        inode=row["inode"],
+        sha1=row["sha1"],
+        norm_url=row["norm_url"],
+        source_url=row["source_url"],
+        url_source=row["url_source"],
+        local_title=row["local_title"],
+    )
+
+
+def _host_breaker_op(host: str) -> Callable[[sqlite3.Connection], HostBreaker | None]:
+    def _op(conn: sqlite3.Connection) -> HostBreaker | None:
+        row = conn.execute("SELECT host, failures, opened_until FROM host_breakers WHERE host = ?", (host,)).fetchone()
+        if not row:
+            return None
+        return HostBreaker(host=row["host"], failures=row["failures"], opened_until=row["opened_until"])
+
+    return _op
+
+
+_OUTBOX_COLUMNS = (
+    "file_path, norm_url, source_url, action, attempts, error_class, status, last_error, "
+    "first_failed_at, last_failed_at, next_attempt_at"
+)
+
+_TITLE_COLUMNS = "norm_url, title, etag, last_modified, fetched_at, checked_at, failures, last_error"
+
+
+def _title_from_row(row: sqlite3.Row) -> RemoteTitle:
+    return RemoteTitle(
+        norm_url=row["norm_url"],
+        title=row["title"],
+        etag=row["etag"],
+        last_modified=row["last_modified"],
+        fetched_at=row["fetched_at"],
+        checked_at=row["checked_at"],
+        failures=row["failures"],
+        last_error=row["last_error"],
+    )
 
 
 def _parse_dt(value: str | None) -> datetime | None:
@@ -0,0 +1,455 @@
+"""Local stand-ins for the Reader API and for title origins, with fault injection.
+
+Point ``readwise.base_url`` (or ``RW_SYNC_READER_URL``) at a
+:class:`FakeReaderServer` to run ``push``/``watch`` at scale without touching
+readwise.io, and generate inbox URLs on a :class:`FakeOriginServer` to load
+the title fetcher too. Run ``python -m reader_sync.fake_reader --help`` for a
+standalone server.
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import gzip
+import hashlib
+import json
+import logging
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from .readwise_client import AUTH_PATH, SAVE_PATH
+
+logger = logging.getLogger(__name__)
+
+UPDATE_PREFIX = "/api/v3/update/"
+_CHUNK = 16 * 1024
+
+
+@dataclass(slots=True, frozen=True)
+class Latency:
+    """A latency distribution in seconds.
+
+    ``fixed`` waits ``a``; ``uniform`` draws from [``a``, ``b``]; ``exp`` has
+    mean ``a``; ``lognormal`` has median ``a`` and shape ``b`` (sigma), which
+    gives the long tail real APIs show.
+    """
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """Parse ``"0.1"``, ``"uniform:0.05:0.3"``, ``"exp:0.2"`` or ``"lognormal:0.2:0.6"``."""
+        kind, _, rest = spec.partition(":") if ":" in spec else ("fixed", "", spec)
+        values = [float(value) for value in rest.split(":") if value]
+        if kind not in ("fixed", "uniform", "exp", "lognormal") or not 1 <= len(values) <= 2:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(self.a, max(self.a, self.b))
+        if self.kind == "exp":
+            return rng.expovariate(1 / self.a) if self.a > 0 else 0.0
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(self.a), self.b) if self.a > 0 else 0.0
+        return self.a
+
+
+@dataclass(slots=True)
+class Faults:
+    """What a fake server does to requests, besides answering them.
+
+    ``rpm`` limits admitted requests per endpoint over a sliding ``window``
+    and answers the excess with 429 and a ``Retry-After`` of the seconds
+    until a slot frees up. ``error_rate`` fails random requests with a 5xx;
+    every ``burst_every`` requests the next ``burst_length`` fail with
+    ``burst_status``. ``body_bandwidth`` (bytes/s) throttles how fast request
+    bodies are read and response bodies written.
+    """
+
+    latency: Latency = field(default_factory=Latency)
+    rpm: int | None = None
+    window: float = 60.0
+    error_rate: float = 0.0
+    burst_every: int = 0
+    burst_length: int = 0
+    burst_status: int = 503
+    body_bandwidth: float | None = None
+
+
+@dataclass(slots=True)
+class ServerStats:
+    requests: collections.Counter = field(default_factory=collections.Counter)
+    statuses: collections.Counter = field(default_factory=collections.Counter)
+    bytes_received: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "requests": dict(self.requests),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "bytes_received": self.bytes_received,
+        }
+
+
+class _FaultState:
+    """Thread-safe bookkeeping for :class:`Faults` shared by a server's handler threads."""
+
+    def __init__(self, faults: Faults, seed: int | None) -> None:
+        self.faults = faults
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._admitted: dict[str, collections.deque[float]] = collections.defaultdict(collections.deque)
+        self._count = 0
+
+    def latency(self) -> float:
+        with self._lock:
+            return self.faults.latency.sample(self._rng)
+
+    def error(self) -> int | None:
+        """5xx status to fail this request with, if any."""
+        faults = self.faults
+        with self._lock:
+            self._count += 1
+            if faults.burst_every and faults.burst_length:
+                position = (self._count - 1) % faults.burst_every
+                if position >= faults.burst_every - faults.burst_length:
+                    return faults.burst_status
+            if faults.error_rate and self._rng.random() < faults.error_rate:
+                return self._rng.choice((500, 502, 503))
+        return None
+
+    def admit(self, endpoint: str) -> float | None:
+        """Record a request against ``endpoint``'s rpm; return seconds to wait if over the limit."""
+        rpm = self.faults.rpm
+        if not rpm:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            admitted = self._admitted[endpoint]
+            while admitted and admitted[0] <= now - self.faults.window:
+                admitted.popleft()
+            if len(admitted) >= rpm:
+                return admitted[0] + self.faults.window - now
+            admitted.append(now)
+        return None
+
+
+class _Server:
+    """A ``ThreadingHTTPServer`` on a background thread, started and stopped like :class:`MetricsServer`."""
+
+    def __init__(self, faults: Faults | None, *, host: str, port: int, seed: int | None) -> None:
+        self.faults = faults or Faults()
+        self.host = host
+        self.port = port
+        self.stats = ServerStats()
+        self._state = _FaultState(self.faults, seed)
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        raise NotImplementedError
+
+    def start(self) -> None:
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        logger.info("%s listening on %s", type(self).__name__, self.url)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "_Server":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    owner: _Server
+
+    def log_message(self, format: str, *args: object) -> None:
+        logger.debug("%s: " + format, type(self.owner).__name__, *args)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        bandwidth = self.owner.faults.body_bandwidth
+        if not bandwidth:
+            body = self.rfile.read(length)
+        else:
+            chunks = []
+            remaining = length
+            while remaining:
+                chunk = self.rfile.read(min(_CHUNK, remaining))
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+                time.sleep(len(chunk) / bandwidth)
+            body = b"".join(chunks)
+        with self.owner._state._lock:
+            self.owner.stats.bytes_received += len(body)
+        return body
+
+    def _reply(self, status: int, body: bytes = b"", *, content_type: str = "application/json", headers: dict[str, str] | None = None) -> None:
+        with self.owner._state._lock:
+            self.owner.stats.statuses[status] += 1
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        bandwidth = self.owner.faults.body_bandwidth
+        if not bandwidth:
+            self.wfile.write(body)
+            return
+        for start in range(0, len(body), _CHUNK):
+            chunk = body[start : start + _CHUNK]
+            self.wfile.write(chunk)
+            self.wfile.flush()
+            time.sleep(len(chunk) / bandwidth)
+
+    def _faulted(self, endpoint: str) -> bool:
+        """Apply latency, 5xx and rate-limit faults; return whether a reply was already sent."""
+        state = self.owner._state
+        with state._lock:
+            self.owner.stats.requests[endpoint] += 1
+        delay = state.latency()
+        if delay > 0:
+            time.sleep(delay)
+        status = state.error()
+        if status is not None:
+            self._reply(status, b'{"detail": "injected failure"}')
+            return True
+        wait = state.admit(endpoint)
+        if wait is not None:
+            retry_after = str(max(1, math.ceil(wait)))
+            self._reply(429, b'{"detail": "Request was throttled."}', headers={"Retry-After": retry_after})
+            return True
+        return False
+
+
+class FakeReaderServer(_Server):
+    """Answers ``/api/v2/auth/``, ``/api/v3/save/`` and ``/api/v3/update/{id}/`` like Reader.
+
+    Saves of a URL already stored answer 200 with the existing ID, new ones
+    201. Updates of unknown IDs answer 404. Requests without an
+    ``Authorization: Token ...`` header get 401. Gzip request bodies are
+    accepted. Faults apply to saves and updates; each endpoint has its own
+    rpm window, as on readwise.io.
+    """
+
+    def __init__(
+        self, faults: Faults | None = None, *, host: str = "127.0.0.1", port: int = 0, seed: int | None = None
+    ) -> None:
+        super().__init__(faults, host=host, port=port, seed=seed)
+        self.documents: dict[str, dict[str, Any]] = {}
+        self._ids: dict[str, str] = {}
+        self._next_id = 0
+
+    def _store(self, payload: dict[str, Any]) -> tuple[int, str]:
+        with self._state._lock:
+            url = str(payload.get("url", ""))
+            existing = self._ids.get(url)
+            if existing is not None:
+                return 200, existing
+            self._next_id += 1
+            reader_id = f"fake{self._next_id:08d}"
+            self._ids[url] = reader_id
+            self.documents[reader_id] = {key: value for key, value in payload.items() if key != "html"}
+            return 201, reader_id
+
+    def _update(self, reader_id: str, payload: dict[str, Any]) -> bool:
+        with self._state._lock:
+            document = self.documents.get(reader_id)
+            if document is None:
+                return False
+            document.update((key, value) for key, value in payload.items() if key != "html")
+            return True
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(_Handler):
+            owner = server
+
+            def _authorized(self) -> bool:
+                if self.headers.get("Authorization", "").startswith("Token "):
+                    return True
+                self._reply(401, b'{"detail": "Authentication credentials were not provided."}')
+                return False
+
+            def _payload(self) -> dict[str, Any] | None:
+                body = self._read_body()
+                try:
+                    if self.headers.get("Content-Encoding") == "gzip":
+                        body = gzip.decompress(body)
+                    payload = json.loads(body)
+                except (OSError, ValueError):
+                    self._reply(400, b'{"detail": "Malformed request body."}')
+                    return None
+                if not isinstance(payload, dict):
+                    self._reply(400, b'{"detail": "Expected a JSON object."}')
+                    return None
+                return payload
+
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                if self.path != AUTH_PATH:
+                    self._reply(404)
+                elif self._authorized():
+                    with server._state._lock:
+                        server.stats.requests["auth"] += 1
+                    self._reply(204)
+
+            def do_POST(self) -> None:  # noqa: N802
+                if self.path != SAVE_PATH:
+                    self._read_body()
+                    self._reply(404)
+                    return
+                payload = self._payload()
+                if payload is None or not self._authorized() or self._faulted("save"):
+                    return
+                if not payload.get("url"):
+                    self._reply(400, b'{"url": ["This field is required."]}')
+                    return
+                status, reader_id = server._store(payload)
+                url = f"https://read.readwise.io/read/{reader_id}"
+                self._reply(status, json.dumps({"id": reader_id, "url": url, "title": payload.get("title")}).encode())
+
+            def do_PATCH(self) -> None:  # noqa: N802
+                if not (self.path.startswith(UPDATE_PREFIX) and self.path.endswith("/")):
+                    self._read_body()
+                    self._reply(404)
+                    return
+                reader_id = self.path[len(UPDATE_PREFIX) : -1]
+                payload = self._payload()
+                if payload is None or not self._authorized() or self._faulted("update"):
+                    return
+                if not server._update(reader_id, payload):
+                    self._reply(404, b'{"detail": "Not found."}')
+                    return
+                self._reply(200, json.dumps({"id": reader_id, **server.documents[reader_id]}).encode())
+
+        return Handler
+
+
+class FakeOriginServer(_Server):
+    """Serves an HTML page with a ``<title>`` derived from the path for any GET.
+
+    Pages are ``page_bytes`` long, carry an ``ETag`` and answer a matching
+    ``If-None-Match`` with 304, so title-cache revalidation can be exercised.
+    """
+
+    def __init__(
+        self,
+        faults: Faults | None = None,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: int | None = None,
+        page_bytes: int = 16 * 1024,
+    ) -> None:
+        super().__init__(faults, host=host, port=port, seed=seed)
+        self.page_bytes = page_bytes
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(_Handler):
+            owner = server
+
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                if self._faulted("page"):
+                    return
+                path = self.path.split("?", 1)[0]
+                etag = '"' + hashlib.sha1(path.encode("utf-8")).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._reply(304, headers={"ETag": etag})
+                    return
+                head = f"<html><head><meta charset='utf-8'><title>Origin {path}</title></head><body>"
+                filler = "<p>" + "lorem ipsum " * 40 + "</p>"
+                body = head + filler * max(1, (server.page_bytes - len(head)) // len(filler)) + "</body></html>"
+                self._reply(200, body.encode("utf-8"), content_type="text/html; charset=utf-8", headers={"ETag": etag})
+
+        return Handler
+
+
+def faults_from_args(args: argparse.Namespace) -> Faults:
+    return Faults(
+        latency=Latency.parse(args.latency),
+        rpm=args.rpm,
+        window=args.window,
+        error_rate=args.error_rate,
+        burst_every=args.burst_every,
+        burst_length=args.burst_length,
+        burst_status=args.burst_status,
+        body_bandwidth=args.body_kbps * 1024 if args.body_kbps else None,
+    )
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency", default="0", help='"0.1", "uniform:0.05:0.3", "exp:0.2" or "lognormal:0.2:0.6"')
+    parser.add_argument("--rpm", type=int, default=None, help="server-side requests/min per endpoint (429 above)")
+    parser.add_argument("--window", type=float, default=60.0, help="rate-limit window in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failed with a random 5xx")
+    parser.add_argument("--burst-every", type=int, default=0, help="fail a burst of requests every N requests")
+    parser.add_argument("--burst-length", type=int, default=0, help="requests failed per burst")
+    parser.add_argument("--burst-status", type=int, default=503)
+    parser.add_argument("--body-kbps", type=float, default=None, help="read request / write response bodies at KB/s")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake Reader API (and optionally a title origin) locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--origin-port", type=int, default=None, help="also serve title origin pages on this port")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    servers: list[_Server] = [FakeReaderServer(faults_from_args(args), host=args.host, port=args.port, seed=args.seed)]
+    if args.origin_port is not None:
+        servers.append(FakeOriginServer(Faults(latency=Latency.parse(args.latency)), host=args.host, port=args.origin_port))
+    for server in servers:
+        server.start()
+    print(f"Set RW_SYNC_READER_URL={servers[0].url} to sync against the fake Reader. Ctrl+C stops.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.stop()
+            print(type(server).__name__, json.dumps(server.stats.summary()))
+
+
+
+__all__ = ["FakeOriginServer", "FakeReaderServer", "Faults", "Latency", "ServerStats"]
+
+
+if __name__ == "__main__":
+    main()
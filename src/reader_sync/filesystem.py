@@ -1,40 +1,133 @@
 from __future__ import annotations
 
 import hashlib
+import logging
+import os
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
 from .models import FileMeta
 
+logger = logging.getLogger(__name__)
 
-def discover_files(root: Path, patterns: Iterable[str]) -> list[FileMeta]:
-    """Return sorted list of candidate HTML files."""
-    metas: list[FileMeta] = []
-    watch_dir = root
-    if not watch_dir.exists():
-        return metas
-    for pattern in patterns:
-        for path in sorted(watch_dir.rglob(pattern)):
-            if path.is_file():
-                stat = path.stat()
-                birth = getattr(stat, "st_birthtime", None)
-                metas.append(
-                    FileMeta(
-                        path=path,
-                        mtime=stat.st_mtime,
-                        size=stat.st_size,
-                        birthtime=birth if isinstance(birth, (int, float)) else None,
-                    )
-                )
-    return metas
+READ_CHUNK = 1 << 20
 
 
-def read_html(path: Path) -> str:
-    return path.read_text(encoding="utf-8", errors="ignore")
+def discover_files(
+    root: Path,
+    patterns: Iterable[str],
+    *,
+    exclude: Iterable[str] = (),
+    max_depth: int | None = None,
+) -> Iterator[FileMeta]:
+    """Yield candidate HTML files from a single walk of ``root``.
+
+    All ``patterns`` are matched against file names in one traversal, and the
+    ``DirEntry`` stat result is reused. ``exclude`` globs are matched against
+    both the entry name and its path relative to ``root``; excluded
+    directories are pruned. ``max_depth`` of 0 limits the walk to ``root``
+    itself. Symlinked directories are not followed, mirroring ``rglob``.
+    """
+    if not root.is_dir():
+        return
+    patterns = tuple(patterns)
+    exclude = tuple(exclude)
+    stack: list[tuple[Path, str, int]] = [(root, "", 0)]
+    while stack:
+        directory, rel_dir, depth = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError as exc:
+            logger.debug("Cannot scan %s: %s", directory, exc)
+            continue
+        subdirs: list[tuple[Path, str, int]] = []
+        for entry in entries:
+            rel = f"{rel_dir}{entry.name}"
+            if exclude and any(fnmatch(entry.name, pat) or fnmatch(rel, pat) for pat in exclude):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if max_depth is None or depth < max_depth:
+                        subdirs.append((directory / entry.name, rel + "/", depth + 1))
+                    continue
+                if not any(fnmatch(entry.name, pat) for pat in patterns) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError as exc:
+                logger.debug("Cannot stat %s: %s", entry.path, exc)
+                continue
+            birth = getattr(stat, "st_birthtime", None)
+            yield FileMeta(
+                path=directory / entry.name,
+                mtime=stat.st_mtime,
+                size=stat.st_size,
+                birthtime=birth if isinstance(birth, (int, float)) else None,
+                inode=stat.st_ino or None,
+            )
+        # Reverse so the stack pops subdirectories in name order.
+        stack.extend(reversed(subdirs))
+
+
+def is_candidate(
+    path: Path,
+    root: Path,
+    patterns: Iterable[str],
+    *,
+    exclude: Iterable[str] = (),
+    max_depth: int | None = None,
+) -> bool:
+    """Apply the matching rules of :func:`discover_files` to a single path."""
+    try:
+        parts = path.relative_to(root).parts
+    except ValueError:
+        return False
+    if not parts or (max_depth is not None and len(parts) - 1 > max_depth):
+        return False
+    exclude = tuple(exclude)
+    for idx, name in enumerate(parts):
+        rel = "/".join(parts[: idx + 1])
+        if any(fnmatch(name, pat) or fnmatch(rel, pat) for pat in exclude):
+            return False
+    return any(fnmatch(parts[-1], pat) for pat in patterns)
+
 
+def stat_file(path: Path) -> FileMeta:
+    stat = path.stat()
+    birth = getattr(stat, "st_birthtime", None)
+    return FileMeta(
+        path=path,
+        mtime=stat.st_mtime,
+        size=stat.st_size,
+        birthtime=birth if isinstance(birth, (int, float)) else None,
+        inode=stat.st_ino or None,
+    )
 
-def compute_sha1(data: str) -> str:
-    return hashlib.sha1(data.encode("utf-8"), usedforsecurity=False).hexdigest()
+
+def read_head(path: Path, limit: int) -> tuple[bytes, str, bool]:
+    """Read the first ``limit`` bytes of a file and hash the whole file.
+
+    Returns ``(head, sha1, complete)``, where ``complete`` says whether the
+    head is the entire file. The rest is streamed through the hash in
+    ``READ_CHUNK`` pieces and not kept. Plain reads are used rather than a
+    memory map: a file truncated or rewritten mid-read (SingleFile or a sync
+    client still writing it) then yields short or mixed data that the next
+    scan corrects, instead of killing the process with SIGBUS.
+    """
+    with open(path, "rb") as fh:
+        head = fh.read(limit)
+        digest = hashlib.sha1(head, usedforsecurity=False)
+        complete = True
+        while chunk := fh.read(READ_CHUNK):
+            digest.update(chunk)
+            complete = False
+    return head, digest.hexdigest(), complete
+
+
+def read_html(path: Path) -> str:
+    """Decode a file as UTF-8 in one pass; invalid bytes are dropped and line endings kept."""
+    return str(path.read_bytes(), "utf-8", "ignore")
 
 
-__all__ = ["discover_files", "read_html", "compute_sha1"]
+__all__ = ["discover_files", "is_candidate", "stat_file", "read_head", "read_html"]
@@ -1,21 +1,139 @@
 from __future__ import annotations
 
+import codecs
 import re
+from html.parser import HTMLParser
 from typing import Iterable
 from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl, unquote
 
 from bs4 import BeautifulSoup
 
-from .models import URLSource
+from .models import HtmlMetadata, URLSource
 
 _CANONICAL_RE = re.compile(r"<link[^>]+rel=['\"]canonical['\"][^>]*href=['\"]([^'\"]+)['\"]", re.I)
 _SINGLEFILE_RE = re.compile(r"<!--\s*saved from url=\(?\s*([^)>\s]+)\s*\)?\s*-->", re.I)
+# Byte twins of the above for scanning raw file bytes without decoding them.
+_CANONICAL_BYTES_RE = re.compile(_CANONICAL_RE.pattern.encode(), re.I)
+_SINGLEFILE_BYTES_RE = re.compile(_SINGLEFILE_RE.pattern.encode(), re.I)
 
 # Filename URL segment patterns
 _EXT_RE = re.compile(r"\.html?$", re.I)
 _TS_SUFFIX_RE = re.compile(r"_(\d{8})_(\d{6})$")
 _URL_MARK_RE = re.compile(r"\[URL\]", re.I)
 
+# Head scanning: feed the parser in chunks and give up on the head after this many characters.
+HEAD_SCAN_LIMIT = 1024 * 1024
+_HEAD_CHUNK = 8 * 1024
+
+
+class _HeadParser(HTMLParser):
+    """Collect canonical/SingleFile/og:url/title until the head ends."""
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.meta = HtmlMetadata()
+        self.head_closed = False
+        self._title_parts: list[str] | None = None
+
+    def handle_starttag(self, tag: str, attrs) -> None:
+        if self.head_closed:
+            return
+        if tag == "body":
+            self._close_head()
+        elif tag == "title" and self.meta.title is None and self._title_parts is None:
+            self._title_parts = []
+        elif tag == "link" and self.meta.canonical is None:
+            # Match the raw tag with the legacy regex so extracted URLs stay byte-identical.
+            match = _CANONICAL_RE.search(self.get_starttag_text() or "")
+            if match:
+                self.meta.canonical = match.group(1).strip()
+        elif tag == "meta" and self.meta.og_url is None:
+            values = dict(attrs)
+            if values.get("property") == "og:url" and values.get("content") is not None:
+                self.meta.og_url = values["content"].strip()
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.head_closed:
+            return
+        if tag == "title":
+            self._finish_title()
+        elif tag == "head":
+            self._close_head()
+
+    def handle_data(self, data: str) -> None:
+        if self._title_parts is not None and not self.head_closed:
+            self._title_parts.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        if self.meta.singlefile is None and not self.head_closed:
+            match = _SINGLEFILE_RE.search(f"<!--{data}-->")
+            if match:
+                self.meta.singlefile = match.group(1).strip()
+
+    def _finish_title(self) -> None:
+        if self._title_parts is not None:
+            self.meta.title = "".join(self._title_parts).strip() or None
+            self._title_parts = None
+
+    def _close_head(self) -> None:
+        self._finish_title()
+        self.head_closed = True
+
+
+def extract_metadata(html: str | bytes, *, head_limit: int = HEAD_SCAN_LIMIT) -> HtmlMetadata:
+    """Extract canonical, SingleFile comment, og:url and title in one pass over the head.
+
+    Parsing stops at ``</head>``/``<body>``, so inlined images and scripts in
+    the body are never touched. If the head does not end within ``head_limit``
+    characters, missing fields fall back to a full-document parse.
+
+    ``html`` may also be the raw bytes of a file. They are then decoded as
+    UTF-8 one chunk at a time, so only the scanned part of the head becomes
+    text, and ``head_limit`` counts bytes.
+    """
+    raw = not isinstance(html, str)
+    decode = codecs.getincrementaldecoder("utf-8")(errors="ignore").decode if raw else None
+    parser = _HeadParser()
+    end = min(len(html), head_limit)
+    pos = 0
+    try:
+        while pos < end and not parser.head_closed:
+            nxt = min(pos + _HEAD_CHUNK, end)
+            chunk = html[pos:nxt]
+            parser.feed(decode(chunk) if decode is not None else chunk)
+            pos = nxt
+        parser._finish_title()
+    except Exception:  # noqa: BLE001 - malformed markup; recover below
+        parser.head_closed = False
+        pos = 0
+    meta = parser.meta
+    if parser.head_closed or pos >= len(html):
+        return meta
+
+    has_url = bool(meta.canonical or meta.singlefile or meta.og_url)
+    if not has_url:
+        canonical = (_CANONICAL_BYTES_RE if raw else _CANONICAL_RE).search(html)
+        singlefile = (_SINGLEFILE_BYTES_RE if raw else _SINGLEFILE_RE).search(html) if not canonical else None
+        if canonical:
+            meta.canonical = _as_text(canonical.group(1)).strip()
+        elif singlefile:
+            meta.singlefile = _as_text(singlefile.group(1)).strip()
+        has_url = bool(canonical or singlefile)
+    if not has_url or meta.title is None:
+        soup = BeautifulSoup(_as_text(html), "lxml")
+        if not has_url:
+            og = soup.find("meta", attrs={"property": "og:url"})
+            if og and og.has_attr("content"):
+                meta.og_url = og["content"].strip()
+        if meta.title is None:
+            tag = soup.find("title")
+            meta.title = (tag.get_text(strip=True) or None) if tag else None
+    return meta
+
+
+def _as_text(value: str | bytes) -> str:
+    return value if isinstance(value, str) else str(value, "utf-8", "ignore")
+
 
 def choose_url_from_html(html: str) -> tuple[str, URLSource]:
     """Extract best-effort URL and its origin from HTML."""
@@ -155,6 +273,8 @@ def extract_local_title(html: str) -> str | None:
 
 
 __all__ = [
+    "HEAD_SCAN_LIMIT",
+    "extract_metadata",
     "choose_url_from_html",
     "tidy_extracted_url",
     "infer_from_filename",
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from .database import Database
+from .models import FileMeta, RunRecord
+
+logger = logging.getLogger(__name__)
+
+
+def walk_order(rel: str) -> tuple[tuple[int, str], ...]:
+    """Sort key reproducing :func:`discover_files` order: files before subdirectories, by name."""
+    parts = rel.split("/")
+    return tuple((1, part) for part in parts[:-1]) + ((0, parts[-1]),)
+
+
+def position(meta: FileMeta, root: Path, add_time: float | None) -> dict[str, Any]:
+    """JSON-friendly place of a file in a run's processing order."""
+    return {"t": add_time, "rel": meta.path.relative_to(root).as_posix()}
+
+
+def _order(pos: dict[str, Any]) -> tuple:
+    key = walk_order(pos["rel"])
+    return key if pos.get("t") is None else (pos["t"], key)
+
+
+def is_after(pos: dict[str, Any], checkpoint: dict[str, Any]) -> bool:
+    return _order(pos) > _order(checkpoint)
+
+
+class RunJournal:
+    """Durable progress of one push run in the ``runs`` table.
+
+    Files are numbered in processing order as they enter the pipeline and
+    reported back as they leave it, in any order. The checkpoint is the last
+    file of the unbroken completed prefix; it is committed every ``interval``
+    seconds, so an interrupted run repeats at most that much work on
+    ``push --resume``. With ``add_times`` (the sorted add times of every
+    file in an incremental run) each checkpoint also calls ``on_mark`` with
+    the newest add time that no unfinished file shares, which is safe to
+    store as the ``--new`` watermark.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        record: RunRecord,
+        *,
+        interval: float = 2.0,
+        add_times: list[float] | None = None,
+        on_mark: Callable[[float], None] | None = None,
+    ) -> None:
+        self.db = db
+        self.record = record
+        self.interval = max(0.1, interval)
+        self._add_times = add_times
+        self._on_mark = on_mark
+        self._positions: dict[int, dict[str, Any]] = {}
+        self._finished: set[int] = set()
+        self._next_seq = 0
+        self._contiguous = 0
+        self._saved = record.done
+        self._base = record.done
+        self._mark: float | None = None
+
+    @classmethod
+    def start(cls, db: Database, mode: str, params: dict[str, Any], **kwargs: Any) -> "RunJournal":
+        now = time.time()
+        run_id = f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:6]}"
+        record = RunRecord(run_id=run_id, mode=mode, params=params, status="running", started_at=now, updated_at=now)
+        db.upsert_run(record)
+        logger.info("Run %s started (%s)", run_id, mode)
+        return cls(db, record, **kwargs)
+
+    @classmethod
+    def resume(cls, db: Database, record: RunRecord, **kwargs: Any) -> "RunJournal":
+        record.status = "running"
+        record.updated_at = time.time()
+        db.upsert_run(record)
+        logger.info("Resuming run %s after %d completed files", record.run_id, record.done)
+        return cls(db, record, **kwargs)
+
+    @property
+    def run_id(self) -> str:
+        return self.record.run_id
+
+    @property
+    def done(self) -> int:
+        return self._base + self._contiguous
+
+    def assign(self, pos: dict[str, Any]) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+        self._positions[seq] = pos
+        return seq
+
+    def complete(self, seq: int) -> None:
+        self._finished.add(seq)
+        while self._contiguous in self._finished:
+            self._finished.discard(self._contiguous)
+            self.record.checkpoint = self._positions.pop(self._contiguous)
+            self._contiguous += 1
+
+    def save(self) -> bool:
+        """Queue a checkpoint write if progress moved; return whether it did."""
+        if self.done == self._saved:
+            return False
+        self.record.done = self.done
+        self.record.updated_at = time.time()
+        self.db.upsert_run(self.record)
+        self._saved = self.done
+        self._advance_mark()
+        return True
+
+    def _advance_mark(self) -> None:
+        if self._add_times is None or self._on_mark is None or not self._contiguous:
+            return
+        # Everything before the next unfinished file is done; files tied with it are not.
+        pending = self._add_times[self._contiguous] if self._contiguous < len(self._add_times) else float("inf")
+        idx = bisect.bisect_left(self._add_times, pending) - 1
+        if idx < 0:
+            return
+        mark = self._add_times[idx]
+        if self._mark is None or mark > self._mark:
+            self._mark = mark
+            self._on_mark(mark)
+
+    async def autosave(self) -> None:
+        """Commit checkpoints every ``interval`` seconds until cancelled.
+
+        Rows queued before a checkpoint are committed first; if any of them
+        failed to write, the error propagates and no checkpoint is saved.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.db.wait_durable()
+            if self.save():
+                await self.db.wait_durable()
+
+    def finish(self, status: str) -> None:
+        self.save()
+        self.record.status = status
+        self.record.updated_at = time.time()
+        if status == "completed":
+            self.record.finished_at = self.record.updated_at
+        self.db.upsert_run(self.record)
+        logger.info("Run %s %s (%d files)", self.run_id, status, self.done)
+
+
+__all__ = ["RunJournal", "is_after", "position", "walk_order"]
@@ -0,0 +1,298 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Mapping
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans sub-millisecond DB commits up to throttled multi-minute saves.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+STAGES = ("prepare", "title", "save", "update", "db_write")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+def _key(labels: Mapping[str, object]) -> _Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    parts = []
+    for name, value in labels:
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{escaped}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str) -> None:
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values: dict[_Labels, float] = {}
+
+    def _family(self, openmetrics: bool) -> str:
+        return self.name
+
+    def render(self, openmetrics: bool = False) -> list[str]:
+        family = self._family(openmetrics)
+        lines = [f"# HELP {family} {self.help}", f"# TYPE {family} {self.kind}"]
+        with self._lock:
+            samples = sorted(self._values.items())
+        lines.extend(f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonic total; ``name`` must end in ``_total``."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def set_total(self, value: float, **labels: object) -> None:
+        """Mirror a cumulative count kept elsewhere (e.g. a client attribute)."""
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def _family(self, openmetrics: bool) -> str:
+        # OpenMetrics names the family without the _total suffix of its sample.
+        return self.name.removesuffix("_total") if openmetrics else self.name
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: object) -> None:
+        with self._lock:
+            self._values[_key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[_Labels, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = _key(labels)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            totals[0] += value
+
+    def render(self, openmetrics: bool = False) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted((key, (list(counts), totals[0])) for key, (counts, totals) in self._series.items())
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                bucket = _format_labels((*labels, ("le", _format_value(bound))))
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        return lines
+
+
+class Registry:
+    """A set of metrics plus collectors that refresh sampled values before each render."""
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def _add(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._add(Counter(name, help))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._add(Gauge(name, help))  # type: ignore[return-value]
+
+    def histogram(self, name: str, help: str, buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, buckets))  # type: ignore[return-value]
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> None:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:  # noqa: BLE001 - a broken collector must not stop the export
+                logger.exception("Metrics collector failed")
+
+    def render(self, *, openmetrics: bool = False) -> str:
+        """Prometheus text exposition (0.0.4), or OpenMetrics 1.0 with ``openmetrics``."""
+        self.collect()
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render(openmetrics))
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class SyncMetrics(Registry):
+    """The metrics exported for sync runs and the pipeline.
+
+    Latencies are observed through :meth:`observe`, which the Reader client,
+    the database writer and the pipeline stages call with a stage name from
+    :data:`STAGES`. Limiter waits, 429s, uploaded bytes, retries and queue
+    depths are sampled by collectors when the metrics are rendered.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.stage_seconds = self.histogram(
+            "rw_sync_stage_seconds", "Latency of pipeline work by stage (save/update include limiter waits and retries)."
+        )
+        self.limiter_wait = self.counter(
+            "rw_sync_limiter_wait_seconds_total", "Seconds requests spent waiting in the Reader rate limiters."
+        )
+        self.rate_limited = self.counter("rw_sync_rate_limited_total", "Reader responses with status 429.")
+        self.retries = self.counter("rw_sync_retries_total", "Reader requests retried after 429, 5xx or transport errors.")
+        self.uploaded_bytes = self.counter(
+            "rw_sync_uploaded_bytes_total", "Request body bytes sent to Reader, after compression."
+        )
+        self.queue_depth = self.gauge("rw_sync_queue_depth", "Items waiting in front of each pipeline stage.")
+        self.last_export = self.gauge("rw_sync_last_export_timestamp_seconds", "Unix time the metrics were rendered.")
+        self.add_collector(lambda: self.last_export.set(time.time()))
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.stage_seconds.observe(seconds, stage=stage)
+
+    def timed(self, stage: str, handler: Callable[..., object]) -> Callable[..., object]:
+        """Wrap an async handler so each call's duration is observed under ``stage``."""
+
+        async def _timed(*args: object) -> object:
+            started = time.perf_counter()
+            try:
+                return await handler(*args)  # type: ignore[misc]
+            finally:
+                self.observe(stage, time.perf_counter() - started)
+
+        return _timed
+
+
+class TextfileExporter:
+    """Rewrite a node-exporter textfile (``*.prom``) every ``interval`` seconds.
+
+    Files are written to a temporary name and renamed into place so the
+    collector never reads a partial file.
+    """
+
+    def __init__(self, registry: Registry, path: Path, *, interval: float = 15.0) -> None:
+        self.registry = registry
+        self.path = path
+        self.interval = max(1.0, interval)
+
+    def write(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.registry.render(), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    async def run(self) -> None:
+        """Write until cancelled."""
+        while True:
+            try:
+                await asyncio.to_thread(self.write)
+            except OSError as exc:
+                logger.warning("Could not write metrics to %s: %s", self.path, exc)
+            await asyncio.sleep(self.interval)
+
+
+class MetricsServer:
+    """Serve ``/metrics`` over HTTP from a background thread.
+
+    Scrapers that accept ``application/openmetrics-text`` get OpenMetrics;
+    everything else gets the Prometheus text format.
+    """
+
+    def __init__(self, registry: Registry, *, host: str = "127.0.0.1", port: int = 9464) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802 - http.server naming
+                if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+                body = registry.render(openmetrics=openmetrics).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: object) -> None:
+                logger.debug("metrics: " + format, *args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="rw-sync-metrics", daemon=True)
+        self._thread.start()
+        logger.info("Serving metrics on http://%s:%d/metrics", self.host, self.port)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsServer",
+    "Registry",
+    "STAGES",
+    "SyncMetrics",
+    "TextfileExporter",
+]
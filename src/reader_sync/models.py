@@ -3,12 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Literal
+from typing import Any, Literal
 
 
 TitleSource = Literal["online", "reader", "local", "unknown"]
 URLSource = Literal["canonical", "singlefile", "og:url", "inferred", "synthetic"]
 SyncAction = Literal["create", "update", "skip"]
+PushMode = Literal["all", "new"]
 
 
 @dataclass(slots=True)
@@ -18,12 +19,55 @@ class FileMeta:
     size: int
     # Prefer creation time when available (e.g., macOS APFS). Fallback to mtime.
     birthtime: float | None = None
+    inode: int | None = None
+
+
+@dataclass(slots=True)
+class HtmlMetadata:
+    """URL and title signals found in a document's head."""
+
+    canonical: str | None = None
+    singlefile: str | None = None
+    og_url: str | None = None
+    title: str | None = None
+
+    def best_url(self) -> tuple[str, URLSource]:
+        if self.canonical:
+            return self.canonical, "canonical"
+        if self.singlefile:
+            return self.singlefile, "singlefile"
+        if self.og_url:
+            return self.og_url, "og:url"
+        return "", "synthetic"
+
+
+@dataclass(slots=True)
+class FileIndexEntry:
+    """Facts derived from a file, valid while its stat tuple is unchanged."""
+
+    path: str
+    size: int
+    mtime: float
+    inode: int | None
+    sha1: str
+    norm_url: str
+    source_url: str
+    url_source: URLSource
+    local_title: str | None
+
+    def matches(self, meta: FileMeta) -> bool:
+        if self.size != meta.size or self.mtime != meta.mtime:
+            return False
+        if self.inode is not None and meta.inode is not None:
+            return self.inode == meta.inode
+        return True
 
 
 @dataclass(slots=True)
 class PreparedDocument:
     file: FileMeta
-    html: str
+    # None when restored from the file index; loaded lazily when a payload needs it.
+    html: str | None
     original_url: str
     original_source: URLSource
     normalized_url: str
@@ -44,6 +88,69 @@ class DocumentState:
     last_error: str | None
     created_at: datetime | None
     updated_at: datetime | None
+    # Content hash of the HTML last synced under this URL.
+    sha1: str | None = None
+
+
+@dataclass(slots=True)
+class RemoteTitle:
+    """Cached outcome of fetching a source page's <title>."""
+
+    norm_url: str
+    title: str | None
+    etag: str | None
+    last_modified: str | None
+    # Last successful fetch or 304 revalidation, and last attempt of any kind.
+    fetched_at: float | None
+    checked_at: float
+    failures: int = 0
+    last_error: str | None = None
+
+
+@dataclass(slots=True)
+class HostBreaker:
+    """Consecutive title-fetch failures for one host and when its breaker closes again."""
+
+    host: str
+    failures: int = 0
+    opened_until: float | None = None
+
+    def is_open(self, now: float) -> bool:
+        return self.opened_until is not None and now < self.opened_until
+
+
+@dataclass(slots=True)
+class OutboxEntry:
+    """A file whose last sync attempt failed and that is waiting to be retried."""
+
+    file_path: str
+    norm_url: str | None
+    source_url: str | None
+    action: str
+    attempts: int
+    error_class: str
+    status: int | None
+    last_error: str | None
+    first_failed_at: float
+    last_failed_at: float
+    next_attempt_at: float
+
+
+@dataclass(slots=True)
+class RunRecord:
+    """Journal row of one push run and its last durable progress checkpoint."""
+
+    run_id: str
+    mode: str
+    params: dict[str, Any]
+    status: str
+    started_at: float
+    updated_at: float
+    finished_at: float | None = None
+    # Files completed in one unbroken prefix of the run's processing order.
+    done: int = 0
+    # Position of the last file in that prefix (see journal.position()).
+    checkpoint: dict[str, Any] | None = None
 
 
 @dataclass(slots=True)
@@ -57,15 +164,42 @@ class SyncResult:
 
 @dataclass(slots=True)
 class SyncStats:
+    run_id: str | None = None
     created: int = 0
     updated: int = 0
     skipped: int = 0
     failed: int = 0
+    retries: int = 0
+    backoff_seconds: float = 0.0
+    # Effective save/update rates of the adaptive limiters when the run ended.
+    save_rpm: float | None = None
+    update_rpm: float | None = None
+    # Size of the in-memory document state and document writes avoided because nothing changed.
+    state_rows: int | None = None
+    state_mib: float | None = None
+    writes_skipped: int = 0
+    # Bytes removed from save payloads by HTML slimming.
+    slimmed_bytes: int = 0
+    # Request body bytes sent to Reader (compressed size when gzip applies, retries included).
+    uploaded_bytes: int = 0
+    # Files skipped because identical content was already in Reader under another URL/path.
+    linked: int = 0
 
-    def summary(self) -> dict[str, int]:
+    def summary(self) -> dict[str, str | int | float | None]:
         return {
+            "run_id": self.run_id,
             "created": self.created,
             "updated": self.updated,
             "skipped": self.skipped,
             "failed": self.failed,
+            "linked": self.linked,
+            "retries": self.retries,
+            "backoff_seconds": round(self.backoff_seconds, 2),
+            "save_rpm": round(self.save_rpm, 1) if self.save_rpm is not None else None,
+            "update_rpm": round(self.update_rpm, 1) if self.update_rpm is not None else None,
+            "state_rows": self.state_rows,
+            "state_mib": round(self.state_mib, 1) if self.state_mib is not None else None,
+            "writes_skipped": self.writes_skipped,
+            "slimmed_bytes": self.slimmed_bytes,
+            "uploaded_bytes": self.uploaded_bytes,
         }
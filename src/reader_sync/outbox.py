@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import csv
+import logging
+import time
+from pathlib import Path
+
+from .database import Database
+from .models import OutboxEntry
+
+logger = logging.getLogger(__name__)
+
+_EXPORT_FIELDS = (
+    "file_path",
+    "norm_url",
+    "source_url",
+    "action",
+    "attempts",
+    "error_class",
+    "status",
+    "last_error",
+    "first_failed_at",
+    "last_failed_at",
+    "next_attempt_at",
+)
+
+
+def classify_error(status: int | None, exc: BaseException | None = None) -> str:
+    """Coarse failure bucket used for reporting and retry scheduling."""
+    if status is not None:
+        if status == 429:
+            return "rate_limited"
+        if status >= 500:
+            return "server"
+        if status in (401, 403):
+            return "auth"
+        return "client"
+    if exc is not None:
+        name = exc.__class__.__name__
+        if "Timeout" in name:
+            return "timeout"
+        if "Connect" in name or "Network" in name or "Protocol" in name:
+            return "network"
+        return name
+    return "unknown"
+
+
+class Outbox:
+    """Failed and pending work, persisted in the ``outbox`` table.
+
+    One row per file path carries the attempt count, the last error class
+    and when the file may be retried (exponential backoff from
+    ``backoff_base`` seconds, capped at ``backoff_cap``). Keys and attempt
+    counts of pending rows are kept in memory once :meth:`load` has run, so
+    successful files only cost a write when they actually had an outbox row
+    and recording a failure never waits on the database.
+    """
+
+    def __init__(self, db: Database, *, backoff_base: float = 300.0, backoff_cap: float = 6 * 3600) -> None:
+        self.db = db
+        self.backoff_base = max(0.0, backoff_base)
+        self.backoff_cap = max(self.backoff_base, backoff_cap)
+        # Pending path -> attempts so far.
+        self._attempts: dict[str, int] = {}
+        # norm_url -> outbox paths recorded under it.
+        self._urls: dict[str, set[str]] = {}
+        self.loaded = False
+
+    def load(self) -> int:
+        entries = self.db.all_outbox()
+        self._attempts = {}
+        self._urls = {}
+        for entry in entries:
+            self._remember(entry.file_path, entry.norm_url, entry.attempts)
+        self.loaded = True
+        if entries:
+            logger.info("Outbox holds %d pending files; run `rw-sync flush` to retry them", len(entries))
+        return len(entries)
+
+    def __len__(self) -> int:
+        return len(self._attempts)
+
+    def record(
+        self,
+        file_path: Path,
+        *,
+        action: str,
+        error: str,
+        error_class: str,
+        status: int | None = None,
+        norm_url: str | None = None,
+        source_url: str | None = None,
+    ) -> None:
+        key = str(file_path)
+        attempts = (self._attempts.get(key, 0) if self.loaded else self.db.outbox_attempts(key)) + 1
+        now = time.time()
+        delay = min(self.backoff_cap, self.backoff_base * 2 ** (attempts - 1))
+        self.db.upsert_outbox(
+            OutboxEntry(
+                file_path=key,
+                norm_url=norm_url,
+                source_url=source_url,
+                action=action,
+                attempts=attempts,
+                error_class=error_class,
+                status=status,
+                last_error=error,
+                first_failed_at=now,
+                last_failed_at=now,
+                next_attempt_at=now + delay,
+            )
+        )
+        self._remember(key, norm_url, attempts)
+
+    def _remember(self, path: str, norm_url: str | None, attempts: int) -> None:
+        self._attempts[path] = attempts
+        if norm_url:
+            self._urls.setdefault(norm_url, set()).add(path)
+
+    def resolve(self, file_path: Path, norm_url: str | None) -> None:
+        """Drop outbox rows for a file, or any copy of its URL, that has now synced."""
+        key = str(file_path)
+        hit_path = key in self._attempts
+        hit_url = bool(norm_url) and norm_url in self._urls
+        if not (hit_path or hit_url):
+            return
+        self._attempts.pop(key, None)
+        if hit_url:
+            for path in self._urls.pop(norm_url):
+                self._attempts.pop(path, None)
+        self.db.delete_outbox(file_path=key, norm_url=norm_url if hit_url else None)
+
+    def drop(self, file_path: str) -> None:
+        self._attempts.pop(file_path, None)
+        self.db.delete_outbox(file_path=file_path)
+
+    def due(self, *, now: float | None = None, include_waiting: bool = False) -> list[OutboxEntry]:
+        """Eligible rows, one per normalized URL (the most recent failure wins)."""
+        now = time.time() if now is None else now
+        chosen: dict[str, OutboxEntry] = {}
+        for entry in self.db.all_outbox():
+            if not include_waiting and entry.next_attempt_at > now:
+                continue
+            key = entry.norm_url or entry.file_path
+            current = chosen.get(key)
+            if current is None or entry.last_failed_at > current.last_failed_at:
+                chosen[key] = entry
+        return list(chosen.values())
+
+    def export_csv(self, path: Path) -> int:
+        """Write every outbox row to ``path`` for auditing; return the row count."""
+        entries = self.db.all_outbox()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(_EXPORT_FIELDS)
+            for entry in entries:
+                writer.writerow([getattr(entry, name) for name in _EXPORT_FIELDS])
+        return len(entries)
+
+
+__all__ = ["Outbox", "classify_error"]
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DONE: Any = object()
+
+
+@dataclass(slots=True)
+class Stage(Generic[T]):
+    """One pipeline step: ``handler`` returns the item to forward, or ``None`` to drop it."""
+
+    name: str
+    workers: int
+    handler: Callable[[T], Awaitable[T | None]]
+
+
+class Pipeline(Generic[T]):
+    """Run items through stages connected by bounded queues.
+
+    Each stage owns its worker tasks and an input queue of ``queue_size``
+    items, so a slow stage applies backpressure to the ones before it instead
+    of letting work pile up in memory. ``on_done`` is called with every item
+    once it leaves the pipeline, whether it finished the last stage, was
+    dropped, or failed. When a handler raises, the exception is logged and
+    the item is first passed to ``on_error`` so callers can record the
+    failure the way their handlers record their own.
+    """
+
+    def __init__(
+        self,
+        stages: Iterable[Stage[T]],
+        *,
+        queue_size: int,
+        on_done: Callable[[T], None] | None = None,
+        on_error: Callable[[T, Exception], None] | None = None,
+    ) -> None:
+        self.stages = list(stages)
+        if not self.stages:
+            raise ValueError("pipeline needs at least one stage")
+        self._on_done = on_done
+        self._on_error = on_error
+        self._queues: list[asyncio.Queue[Any]] = [asyncio.Queue(maxsize=max(1, queue_size)) for _ in self.stages]
+
+    def depths(self) -> dict[str, int]:
+        """Current number of items waiting in front of each stage."""
+        return {stage.name: queue.qsize() for stage, queue in zip(self.stages, self._queues)}
+
+    async def run(self, source: Iterable[T] | AsyncIterable[T]) -> int:
+        """Feed ``source`` through every stage; return the number of items fed."""
+        tasks: list[asyncio.Task[None]] = []
+        for index, stage in enumerate(self.stages):
+            workers = [
+                asyncio.create_task(self._work(index), name=f"{stage.name}-{n}") for n in range(max(1, stage.workers))
+            ]
+            tasks.extend(workers)
+            tasks.append(asyncio.create_task(self._close_after(index, workers)))
+        try:
+            fed = await self._feed(source)
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+        return fed
+
+    async def _feed(self, source: Iterable[T] | AsyncIterable[T]) -> int:
+        head = self._queues[0]
+        fed = 0
+        if isinstance(source, AsyncIterable):
+            async for item in source:
+                await head.put(item)
+                fed += 1
+        else:
+            for item in source:
+                await head.put(item)
+                fed += 1
+        for _ in range(max(1, self.stages[0].workers)):
+            await head.put(_DONE)
+        return fed
+
+    async def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self._queues) else None
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            try:
+                result = await stage.handler(item)
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Pipeline stage %s failed", stage.name)
+                if self._on_error is not None:
+                    self._on_error(item, exc)
+                result = None
+            if result is not None and outbox is not None:
+                await outbox.put(result)
+            elif self._on_done is not None:
+                self._on_done(item)
+
+    async def _close_after(self, index: int, workers: list[asyncio.Task[None]]) -> None:
+        await asyncio.gather(*workers)
+        if index + 1 < len(self.stages):
+            for _ in range(max(1, self.stages[index + 1].workers)):
+                await self._queues[index + 1].put(_DONE)
+
+
+__all__ = ["Pipeline", "Stage"]
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from .config import Settings
+from .database import Database
+from .filesystem import discover_files
+from .html_utils import infer_from_filename, normalize_url
+from .models import FileIndexEntry, FileMeta, HostBreaker, PushMode
+from .prepare import prepare_document
+from .state_cache import DocumentCache
+from .sync import add_time, determine_action, in_window, push_window
+from .title_fetcher import cache_is_fresh
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class Plan:
+    """What a push would do, derived from local state only."""
+
+    mode: str
+    candidates: int = 0
+    create: int = 0
+    update: int = 0
+    skip: int = 0
+    linked: int = 0
+    # Files without a current file_index entry; classified from their filename alone.
+    unindexed: int = 0
+    save_calls: int = 0
+    update_calls: int = 0
+    title_fetches: int = 0
+    title_cache_hits: int = 0
+    # Seconds each stage needs on its own; the slowest one bounds the run.
+    bounds: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def eta_seconds(self) -> float:
+        return max(self.bounds.values(), default=0.0)
+
+    @property
+    def bottleneck(self) -> str | None:
+        if not self.bounds or self.eta_seconds <= 0:
+            return None
+        return max(self.bounds, key=self.bounds.__getitem__)
+
+    def summary(self) -> dict[str, int | float | str | None]:
+        return {
+            "mode": self.mode,
+            "candidates": self.candidates,
+            "create": self.create,
+            "update": self.update,
+            "skip": self.skip,
+            "linked": self.linked,
+            "unindexed": self.unindexed,
+            "save_calls": self.save_calls,
+            "update_calls": self.update_calls,
+            "title_fetches": self.title_fetches,
+            "title_cache_hits": self.title_cache_hits,
+            "eta_seconds": round(self.eta_seconds, 1),
+            "bottleneck": self.bottleneck,
+        }
+
+
+class Planner:
+    """Classify push candidates from the state DB without touching the network.
+
+    Indexed files reuse their cached URL and hash. Unindexed files are
+    classified by the URL in their filename, or assumed new, unless ``exact``
+    is set, in which case they are read and prepared locally (never indexed).
+    The ETA assumes ``request_latency`` seconds per Reader call and
+    ``title_latency`` seconds per title fetch.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        db: Database,
+        *,
+        exact: bool = False,
+        request_latency: float = 1.0,
+        title_latency: float | None = None,
+    ) -> None:
+        self.settings = settings
+        self.db = db
+        self.exact = exact
+        self.request_latency = max(0.0, request_latency)
+        self.title_latency = min(1.0, settings.title_timeout) if title_latency is None else max(0.0, title_latency)
+
+    def plan(self, mode: PushMode, *, since: float | None = None, max_items: int | None = None) -> Plan:
+        settings = self.settings
+        start, end = push_window(self.db, mode, since)
+        files = [
+            meta
+            for meta in discover_files(
+                settings.watch_dir,
+                settings.patterns,
+                exclude=settings.exclude,
+                max_depth=settings.max_depth,
+            )
+            if in_window(meta, start, end)
+        ]
+        if mode == "new" or max_items is not None:
+            files.sort(key=add_time)
+            if max_items is not None:
+                files = files[:max_items]
+
+        documents = DocumentCache(self.db)
+        documents.load()
+        index = self.db.all_files()
+        titles = self.db.all_remote_titles()
+        breakers: dict[str, HostBreaker | None] = {}
+        now = time.time()
+        claimed: set[str] = set()
+        plan = Plan(mode=mode, candidates=len(files))
+
+        for meta in files:
+            norm_url, url, url_source, sha1, local_title = self._identify(meta, index, plan)
+            existing = documents.get(norm_url) if norm_url else None
+            if existing is None or not existing.readwise_id:
+                if sha1 and documents.by_content(sha1) is not None:
+                    plan.skip += 1
+                    plan.linked += 1
+                    continue
+                if sha1 and sha1 in claimed:
+                    plan.skip += 1
+                    continue
+                if sha1:
+                    claimed.add(sha1)
+            elif documents.is_alias(existing):
+                plan.skip += 1
+                continue
+            action = determine_action(existing, mode=mode)
+            if action == "skip":
+                plan.skip += 1
+                continue
+
+            title_known = False
+            if url_source != "synthetic":
+                cached = titles.get(norm_url) if norm_url else None
+                if cached is not None and cache_is_fresh(
+                    cached, now, ttl=settings.title_cache_ttl, negative_ttl=settings.title_negative_ttl
+                ):
+                    plan.title_cache_hits += 1
+                    title_known = bool(cached.title)
+                elif self._host_open(url, breakers, now):
+                    title_known = bool(cached and cached.title)
+                else:
+                    # Assume the fetch (or revalidation) succeeds.
+                    plan.title_fetches += 1
+                    title_known = True
+
+            if action == "create":
+                plan.create += 1
+                plan.save_calls += 1
+            else:
+                plan.update += 1
+                # Mirrors the upload stage: an update is only sent when there is a title to set.
+                if title_known or (local_title and (existing.title or "") != local_title):
+                    plan.update_calls += 1
+
+        plan.bounds = self._bounds(plan)
+        return plan
+
+    def _identify(
+        self, meta: FileMeta, index: dict[str, FileIndexEntry], plan: Plan
+    ) -> tuple[str | None, str | None, str | None, str | None, str | None]:
+        """(norm_url, source url, url source, sha1, local title) as far as known offline."""
+        keep, drop = self.settings.keep_params, self.settings.drop_params
+        entry = index.get(str(meta.path))
+        if entry is not None and entry.matches(meta):
+            norm_url = normalize_url(entry.source_url, keep, drop)
+            return norm_url, entry.source_url, entry.url_source, entry.sha1, entry.local_title
+        if self.exact:
+            try:
+                document = prepare_document(meta, keep, drop)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Could not prepare %s for planning: %s", meta.path, exc)
+            else:
+                return (
+                    document.normalized_url,
+                    document.original_url,
+                    document.original_source,
+                    document.sha1,
+                    document.local_title,
+                )
+        plan.unindexed += 1
+        inferred = infer_from_filename(meta.path.name)
+        if inferred is None:
+            return None, None, None, None, None
+        url, source = inferred
+        return normalize_url(url, keep, drop), url, source, None, None
+
+    def _host_open(self, url: str | None, breakers: dict[str, HostBreaker | None], now: float) -> bool:
+        if not url:
+            return False
+        host = (urlsplit(url).hostname or "").lower()
+        if host not in breakers:
+            breakers[host] = self.db.lookup_host_breaker(host)
+        breaker = breakers[host]
+        return breaker is not None and breaker.is_open(now)
+
+    def _bounds(self, plan: Plan) -> dict[str, float]:
+        settings = self.settings
+        calls = plan.save_calls + plan.update_calls
+        return {
+            # The save and update limiters are independent, so they drain in parallel.
+            "rate_limit": max(
+                plan.save_calls * 60.0 / max(1, settings.rpm_save),
+                plan.update_calls * 60.0 / max(1, settings.rpm_update),
+            ),
+            "upload_workers": calls * self.request_latency / max(1, settings.upload_concurrency),
+            "title_workers": plan.title_fetches * self.title_latency / max(1, settings.title_concurrency),
+        }
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m"
+    if minutes:
+        return f"{minutes}m{secs:02d}s"
+    return f"{secs}s"
+
+
+__all__ = ["Plan", "Planner", "format_duration"]
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import re
+import threading
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+from .filesystem import read_head
+from .html_utils import HEAD_SCAN_LIMIT, extract_metadata, infer_from_filename, normalize_url, synthetic_url, tidy_extracted_url
+from .models import FileMeta, PreparedDocument
+
+logger = logging.getLogger(__name__)
+
+_HEAD_END_RE = re.compile(rb"</head\s*>|<body[\s>]", re.I)
+
+# Normalization settings installed once per worker process by `_init_worker`.
+_worker_params: tuple[frozenset[str], frozenset[str]] | None = None
+
+
+def prepare_document(
+    file_meta: FileMeta,
+    keep_params: Iterable[str],
+    drop_params: Iterable[str],
+) -> PreparedDocument:
+    """Read a file and derive its source URL, normalized URL, sha1 and local title.
+
+    The hash covers the on-disk bytes and metadata is read from the raw head;
+    only the first ``HEAD_SCAN_LIMIT`` bytes are kept and the body is neither
+    kept nor decoded (it is read again at upload time).
+    """
+    data, sha1, complete = read_head(file_meta.path, HEAD_SCAN_LIMIT)
+    if not complete and not _HEAD_END_RE.search(data):
+        # The head runs past the scan limit, so the metadata fallback needs the whole document.
+        data = file_meta.path.read_bytes()
+    metadata = extract_metadata(data)
+    # Prefer explicit URL embedded in filename per agreed convention.
+    inferred = infer_from_filename(file_meta.path.name)
+    if inferred:
+        inferred_url, source = inferred
+        primary_url = inferred_url
+    else:
+        # Fall back to HTML-based signals
+        candidate_url, source = metadata.best_url()
+        primary_url = tidy_extracted_url(candidate_url)
+
+    if not primary_url:
+        primary_url = synthetic_url(sha1)
+        source = "synthetic"
+
+    norm_url = normalize_url(primary_url, keep_params, drop_params)
+    return PreparedDocument(
+        file=file_meta,
+        html=None,
+        original_url=primary_url,
+        original_source=source,
+        normalized_url=norm_url,
+        sha1=sha1,
+        local_title=metadata.title,
+    )
+
+
+def _init_worker(keep_params: frozenset[str], drop_params: frozenset[str]) -> None:
+    global _worker_params
+    _worker_params = (keep_params, drop_params)
+
+
+def _warm_up() -> None:
+    """No-op task that forces a worker process to start and finish importing."""
+
+
+def _prepare_in_worker(file_meta: FileMeta) -> tuple[PreparedDocument, float]:
+    keep_params, drop_params = _worker_params or (frozenset(), frozenset())
+    started = time.thread_time()
+    # Only metadata crosses the process boundary; the body is read when an upload needs it.
+    document = prepare_document(file_meta, keep_params, drop_params)
+    return document, time.thread_time() - started
+
+
+class DocumentPreparer:
+    """Run document preparation on worker threads or on a warm process pool.
+
+    With ``workers`` of 0 preparation uses ``asyncio.to_thread``. Otherwise a
+    ``ProcessPoolExecutor`` is started on first use, receives the
+    normalization settings once per worker, and is reused until ``close``.
+    ``cpu_seconds`` accumulates the CPU time spent preparing, in either mode.
+    """
+
+    def __init__(self, keep_params: frozenset[str], drop_params: frozenset[str], *, workers: int = 0) -> None:
+        self.keep_params = keep_params
+        self.drop_params = drop_params
+        self.workers = max(0, workers)
+        self._pool: ProcessPoolExecutor | None = None
+        self.cpu_seconds = 0.0
+        self._lock = threading.Lock()
+
+    async def start(self) -> None:
+        if not self.workers or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.keep_params, self.drop_params),
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers)))
+        logger.debug("Started %d document preparation processes", self.workers)
+
+    async def prepare(self, file_meta: FileMeta) -> PreparedDocument:
+        if self.workers:
+            await self.start()
+            loop = asyncio.get_running_loop()
+            document, cpu = await loop.run_in_executor(self._pool, _prepare_in_worker, file_meta)
+            self._charge(cpu)
+            return document
+        return await asyncio.to_thread(self._prepare_here, file_meta)
+
+    def _prepare_here(self, file_meta: FileMeta) -> PreparedDocument:
+        started = time.thread_time()
+        try:
+            return prepare_document(file_meta, self.keep_params, self.drop_params)
+        finally:
+            self._charge(time.thread_time() - started)
+
+    def _charge(self, seconds: float) -> None:
+        with self._lock:
+            self.cpu_seconds += seconds
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+__all__ = ["DocumentPreparer", "prepare_document"]
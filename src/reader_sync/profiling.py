@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import collections
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from types import CodeType, FrameType
+
+from . import database, filesystem, html_utils, prepare, rate_limit, readwise_client, slimming, title_fetcher
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.005
+DEFAULT_FRAMES = 25
+TOP_FUNCTIONS = 15
+TOP_ALLOCATIONS = 25
+# Take a new peak snapshot once traced memory grows this much past the last one.
+_SNAPSHOT_GROWTH = 1.2
+_SNAPSHOT_MIN_INTERVAL = 1.0
+# Innermost frames of threads that are parked rather than working.
+_IDLE_FILES = (
+    "threading.py",
+    "queue.py",
+    "selectors.py",
+    os.path.join("concurrent", "futures", "thread.py"),
+    "socketserver.py",
+)
+
+_active: StageProfiler | None = None
+
+
+def _span(code: CodeType) -> tuple[int, int]:
+    lines = [line for _, _, line in code.co_lines() if line is not None]
+    return code.co_firstlineno, max(lines, default=code.co_firstlineno)
+
+
+_Rule = tuple[str, tuple[int, int] | None, str]
+_rules: tuple[_Rule, ...] = ()
+
+
+def _stage_rules() -> tuple[_Rule, ...]:
+    """Where code running outside a tagged stage belongs: (file, line span or None for all, stage)."""
+    global _rules
+    if not _rules:
+        from . import sync  # imports reports, which imports this module
+
+        _rules = (
+            (filesystem.__file__, _span(filesystem.discover_files.__code__), "discover"),
+            (filesystem.__file__, None, "prepare"),
+            (prepare.__file__, None, "prepare"),
+            (html_utils.__file__, None, "prepare"),
+            (slimming.__file__, None, "prepare"),
+            (title_fetcher.__file__, None, "title"),
+            (readwise_client.__file__, None, "upload"),
+            (rate_limit.__file__, None, "upload"),
+            (database.__file__, None, "db_write"),
+            *(
+                (sync.__file__, _span(getattr(sync.SyncService, f"_stage_{stage}").__code__), stage)
+                for stage in ("prepare", "title", "upload", "persist")
+            ),
+        )
+    return _rules
+
+
+def _rule_stage(filename: str, lineno: int) -> str | None:
+    for path, span, stage in _stage_rules():
+        if filename == path and (span is None or span[0] <= lineno <= span[1]):
+            return stage
+    return None
+
+
+def _thread_cpu(ident: int) -> float | None:
+    """CPU seconds used by the thread ``ident`` so far, where the platform exposes it."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError, OverflowError):
+        return None
+
+
+def scope(stage: str) -> contextlib.AbstractContextManager[None]:
+    """Attribute what the current thread runs inside the block to ``stage`` (no-op unless profiling)."""
+    profiler = _active
+    return profiler.scope(stage) if profiler is not None else contextlib.nullcontext()
+
+
+def active() -> StageProfiler | None:
+    return _active
+
+
+@dataclass(slots=True)
+class ProfileOutput:
+    folded: Path
+    cpu: Path
+    memory: Path | None
+
+
+class StageProfiler:
+    """Sampling CPU profiler and ``tracemalloc`` tracer that attribute work to sync stages.
+
+    A background thread samples the stack of every thread that used CPU
+    since the previous sample, each ``interval`` seconds. A sample is
+    charged to the stage its thread is tagged with through :func:`scope`
+    (pipeline steps, offloaded calls and discovery, via :class:`RunRecorder`);
+    other samples are charged by the code they are running, so the database
+    writer counts as ``db_write`` and preparation threads as ``prepare``.
+    Preparation in a process pool (``prepare_workers`` > 0) runs outside
+    this process and is not seen.
+
+    With ``memory`` the heap is traced with ``frames`` frames per
+    allocation and snapshotted as it grows, so the report shows the
+    allocation sites alive near the peak.
+
+    cProfile is not used because only one of its profilers can be active
+    per thread (per process since 3.12), which rules out per-stage profiles
+    of interleaved asyncio steps and worker threads.
+    """
+
+    def __init__(self, *, interval: float = DEFAULT_INTERVAL, memory: bool = True, frames: int = DEFAULT_FRAMES) -> None:
+        self.interval = max(0.001, interval)
+        self.memory = memory
+        self.frames = max(1, frames)
+        self.samples: collections.Counter[tuple[str, ...]] = collections.Counter()
+        self.started_at: float | None = None
+        self.duration = 0.0
+        self._tags: dict[int, str] = {}
+        self._cpu: dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._snapshot_size = 0
+        self._snapshot_at = 0.0
+        self._peak = 0
+        self._started_tracemalloc = False
+
+    @contextlib.contextmanager
+    def scope(self, stage: str) -> Iterator[None]:
+        ident = threading.get_ident()
+        previous = self._tags.get(ident)
+        self._tags[ident] = stage
+        try:
+            yield
+        finally:
+            if previous is None:
+                self._tags.pop(ident, None)
+            else:
+                self._tags[ident] = previous
+
+    def start(self) -> None:
+        global _active
+        _stage_rules()  # resolve (and import) before tracing starts
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracemalloc = True
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rw-sync-profiler", daemon=True)
+        self._thread.start()
+        _active = self
+
+    def stop(self) -> None:
+        global _active
+        if _active is self:
+            _active = None
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.started_at is not None:
+            self.duration = time.time() - self.started_at
+        if tracemalloc.is_tracing():
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            self._maybe_snapshot(force=self._snapshot is None)
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+    # --- sampling thread ---
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            alive = {thread.ident for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            for ident, frame in frames.items():
+                if ident != own and ident in alive:
+                    self._sample(ident, frame)
+            del frames
+            if self.memory and tracemalloc.is_tracing():
+                self._maybe_snapshot()
+
+    def _busy(self, ident: int, frame: FrameType, tagged: bool) -> bool:
+        cpu = _thread_cpu(ident)
+        if cpu is not None:
+            previous = self._cpu.get(ident)
+            self._cpu[ident] = cpu
+            if previous is None or cpu <= previous:
+                return False
+        # A parked untagged thread spent that CPU on work it has already finished; its stack says nothing.
+        return tagged or not frame.f_code.co_filename.endswith(_IDLE_FILES)
+
+    def _sample(self, ident: int, frame: FrameType) -> None:
+        stage = self._tags.get(ident)
+        if not self._busy(ident, frame, stage is not None):
+            return
+        stack: list[str] = []
+        current: FrameType | None = frame
+        while current is not None:
+            code = current.f_code
+            if stage is None:
+                stage = _rule_stage(code.co_filename, current.f_lineno)
+            stack.append(f"{Path(code.co_filename).stem}:{code.co_qualname}")
+            current = current.f_back
+        stack.append(stage or "other")
+        self.samples[tuple(reversed(stack))] += 1
+
+    def _maybe_snapshot(self, *, force: bool = False) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        self._peak = max(self._peak, peak)
+        now = time.monotonic()
+        grown = current > self._snapshot_size * _SNAPSHOT_GROWTH and now - self._snapshot_at >= _SNAPSHOT_MIN_INTERVAL
+        if not (force or grown):
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            )
+        )
+        self._snapshot, self._snapshot_size, self._snapshot_at = snapshot, current, now
+
+    # --- reports ---
+    def stage_samples(self) -> dict[str, int]:
+        totals: collections.Counter[str] = collections.Counter()
+        for stack, count in self.samples.items():
+            totals[stack[0]] += count
+        return dict(totals.most_common())
+
+    def write(self, directory: Path, name: str) -> ProfileOutput:
+        """Write ``<name>.folded`` (flamegraph stacks), ``<name>.cpu.txt`` and ``<name>.memory.txt``."""
+        directory.mkdir(parents=True, exist_ok=True)
+        folded = directory / f"{name}.folded"
+        folded.write_text(
+            "".join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.samples.items())), encoding="utf-8"
+        )
+        cpu = directory / f"{name}.cpu.txt"
+        cpu.write_text(self._cpu_report(), encoding="utf-8")
+        memory = None
+        if self._snapshot is not None:
+            memory = directory / f"{name}.memory.txt"
+            memory.write_text(self._memory_report(self._snapshot), encoding="utf-8")
+        return ProfileOutput(folded=folded, cpu=cpu, memory=memory)
+
+    def _cpu_report(self) -> str:
+        total = sum(self.samples.values())
+        lines = [
+            f"{total} samples every {self.interval * 1000:g} ms over {self.duration:.1f} s "
+            f"(~{total * self.interval:.1f} thread-seconds busy)",
+            "",
+            f"{'stage':<12}{'samples':>9}{'share':>8}{'~seconds':>10}",
+        ]
+        stages = self.stage_samples()
+        for stage, count in stages.items():
+            lines.append(f"{stage:<12}{count:>9}{count / total:>8.1%}{count * self.interval:>10.2f}")
+        for stage in stages:
+            own: collections.Counter[str] = collections.Counter()
+            inclusive: collections.Counter[str] = collections.Counter()
+            for stack, count in self.samples.items():
+                if stack[0] != stage:
+                    continue
+                own[stack[-1]] += count
+                for function in set(stack[1:]):
+                    inclusive[function] += count
+            lines += ["", f"[{stage}] top functions by own samples", f"{'own':>7}{'incl':>7}  function"]
+            lines += [f"{count:>7}{inclusive[fn]:>7}  {fn}" for fn, count in own.most_common(TOP_FUNCTIONS)]
+        return "\n".join(lines) + "\n"
+
+    def _memory_report(self, snapshot: tracemalloc.Snapshot) -> str:
+        by_stage: collections.Counter[str] = collections.Counter()
+        sites: collections.Counter[tuple[str, int, str]] = collections.Counter()
+        counts: collections.Counter[tuple[str, int, str]] = collections.Counter()
+        for trace in snapshot.traces:
+            # Tracebacks run from the oldest frame to the allocating one.
+            stage = next(
+                (found for frame in reversed(trace.traceback) if (found := _rule_stage(frame.filename, frame.lineno))),
+                "other",
+            )
+            site = trace.traceback[-1]
+            key = (site.filename, site.lineno, stage)
+            by_stage[stage] += trace.size
+            sites[key] += trace.size
+            counts[key] += 1
+        total = sum(by_stage.values())
+        lines = [
+            f"peak traced memory: {_mib(self._peak)}; snapshot near the peak: {_mib(total)}",
+            "",
+            f"{'stage':<12}{'MiB':>10}{'share':>8}",
+        ]
+        lines += [f"{stage:<12}{size / 2**20:>10.2f}{size / total:>8.1%}" for stage, size in by_stage.most_common()]
+        lines += ["", f"top {TOP_ALLOCATIONS} allocation sites", f"{'MiB':>9}{'blocks':>9}  {'stage':<10}site"]
+        for (filename, lineno, stage), size in sites.most_common(TOP_ALLOCATIONS):
+            lines.append(f"{size / 2**20:>9.2f}{counts[filename, lineno, stage]:>9}  {stage:<10}{filename}:{lineno}")
+        return "\n".join(lines) + "\n"
+
+
+def _mib(size: int) -> str:
+    return f"{size / 2**20:.1f} MiB"
+
+
+def profile_name(command: str | None) -> str:
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{command or 'run'}.profile"
+
+
+__all__ = ["ProfileOutput", "StageProfiler", "active", "profile_name", "scope"]
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+# Reset values this large are Unix timestamps rather than seconds to wait.
+_EPOCH_THRESHOLD = 1e9
+
+
+class AdaptiveLimiter:
+    """Leaky-bucket rate limiter whose rate follows server feedback (AIMD).
+
+    Starts at ``ceiling`` requests per ``time_period`` seconds. A 429 cuts the
+    rate by ``decrease`` (never below ``floor``) and pauses every caller for
+    ``Retry-After``; each healthy response adds ``increase`` back up to the
+    ceiling, which may be lowered further by ``X-RateLimit-Limit``.
+    ``X-RateLimit-Remaining: 0`` pauses until ``X-RateLimit-Reset``, which
+    may be seconds to wait or an epoch timestamp. No pause lasts longer than
+    ``max_pause`` seconds, whatever the server says.
+
+    ``waited`` (seconds callers spent in :meth:`acquire`) and ``throttled``
+    (429 responses seen) are cumulative, for metrics.
+    """
+
+    def __init__(
+        self,
+        ceiling: float,
+        *,
+        time_period: float = 60.0,
+        floor: float = 1.0,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        max_pause: float = 300.0,
+        name: str = "",
+    ) -> None:
+        self.ceiling = max(1.0, float(ceiling))
+        self.time_period = time_period
+        self.floor = min(self.ceiling, max(0.1, float(floor)))
+        self.increase = increase
+        self.decrease = decrease
+        self.max_pause = max(0.0, max_pause)
+        self.name = name
+        self.rate = self.ceiling
+        self._server_ceiling: float | None = None
+        self._level = 0.0
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self.waited = 0.0
+        self.throttled = 0
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
+
+    async def acquire(self) -> None:
+        started = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            self._leak(now)
+            if self._level + 1 <= self.rate:
+                self._level += 1
+                self.waited += now - started
+                return
+            await asyncio.sleep((self._level + 1 - self.rate) * self.time_period / self.rate)
+
+    def on_response(self, status: int, headers: Mapping[str, str]) -> None:
+        limit = _header_float(headers, "X-RateLimit-Limit", "RateLimit-Limit")
+        if limit is not None and limit > 0:
+            self._server_ceiling = limit
+        remaining = _header_float(headers, "X-RateLimit-Remaining", "RateLimit-Remaining")
+        reset = _header_float(headers, "X-RateLimit-Reset", "RateLimit-Reset")
+        if remaining is not None and remaining <= 0 and reset is not None:
+            self._pause(reset - time.time() if reset > _EPOCH_THRESHOLD else reset)
+
+        if status == 429:
+            self.throttled += 1
+            previous = self.rate
+            self.rate = max(self.floor, self.rate * self.decrease)
+            # Treat the bucket as full so requests resume at the new pace instead of bursting.
+            self._level = self.rate
+            self._last = time.monotonic()
+            retry_after = _header_float(headers, "Retry-After")
+            if retry_after is not None:
+                self._pause(retry_after)
+            logger.warning("%s rate limited: %.1f -> %.1f requests/min", self.name or "Reader", previous, self.rpm)
+        elif status < 500:
+            ceiling = min(self.ceiling, self._server_ceiling or self.ceiling)
+            if self.rate < ceiling:
+                self.rate = min(ceiling, self.rate + self.increase)
+                logger.debug("%s rate raised to %.1f requests/min", self.name or "Reader", self.rpm)
+            elif self.rate > ceiling:
+                self.rate = max(self.floor, ceiling)
+
+    @property
+    def rpm(self) -> float:
+        """Effective rate in requests per minute."""
+        return self.rate * 60.0 / self.time_period
+
+    def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + min(self.max_pause, max(0.0, seconds)))
+
+    def _leak(self, now: float) -> None:
+        elapsed = now - self._last
+        self._last = now
+        self._level = max(0.0, self._level - elapsed * self.rate / self.time_period)
+
+
+def _header_float(headers: Mapping[str, str], *names: str) -> float | None:
+    for name in names:
+        raw = headers.get(name)
+        if raw is None:
+            continue
+        try:
+            return float(raw)
+        except ValueError:
+            continue
+    return None
+
+
+__all__ = ["AdaptiveLimiter"]
@@ -2,26 +2,66 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import gzip
+import json
 import logging
+import random
 import time
+from collections.abc import Callable
+from datetime import timezone
+from email.utils import parsedate_to_datetime
 from typing import Any
 
 import httpx
-from aiolimiter import AsyncLimiter
+
+from .rate_limit import AdaptiveLimiter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
-SAVE_URL = "https://readwise.io/api/v3/save/"
-UPDATE_URL_TEMPLATE = "https://readwise.io/api/v3/update/{id}/"
-AUTH_URL = "https://readwise.io/api/v2/auth/"
+DEFAULT_BASE_URL = "https://readwise.io"
+SAVE_PATH = "/api/v3/save/"
+UPDATE_PATH_TEMPLATE = "/api/v3/update/{id}/"
+AUTH_PATH = "/api/v2/auth/"
 
 
 class ReadwiseError(Exception):
     pass
 
 
+def encode_json(payload: dict[str, Any]) -> bytes:
+    """Serialize a request body to UTF-8 JSON, with ``orjson`` when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
 class ReaderClient:
-    """Async Readwise Reader API client with per-endpoint rate limiting."""
+    """Async Readwise Reader API client with per-endpoint adaptive rate limiting.
+
+    ``rpm_save``/``rpm_update`` are ceilings: each endpoint's limiter backs off
+    on 429 and creeps back up while responses are healthy (see
+    :class:`AdaptiveLimiter`), never dropping below ``rpm_floor``.
+
+    429, 5xx and transport errors are retried up to ``max_retries`` times per
+    request with decorrelated-jitter backoff between ``backoff_base`` and
+    ``backoff_cap`` seconds, never sooner than ``Retry-After``. All requests
+    share ``retry_budget`` retries until ``reset_retry_budget`` is called,
+    so an outage cannot stretch a run indefinitely.
+
+    Bodies are serialized once per request (see :func:`encode_json`) and
+    reused across retries. With ``gzip_min_bytes`` set, bodies at least that
+    large are sent gzip-compressed; if the server answers 400/415 and the
+    same body succeeds uncompressed, compression is switched off for the
+    rest of the session. ``http2`` multiplexes requests over one connection
+    when the ``h2`` package is available. ``base_url`` points the client at
+    another server, such as a local stand-in for benchmarks. ``observe`` is
+    called with ``"save"``/``"update"`` and the seconds each call took.
+    """
 
     def __init__(
         self,
@@ -30,58 +70,218 @@ class ReaderClient:
         rpm_save: int,
         rpm_update: int,
         concurrency: int,
+        max_retries: int = 4,
+        retry_budget: int = 100,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 60.0,
+        rpm_floor: float = 5.0,
+        http2: bool = False,
+        gzip_min_bytes: int | None = None,
+        gzip_level: int = 6,
+        base_url: str = DEFAULT_BASE_URL,
+        observe: Callable[[str, float], None] | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
     ) -> None:
         if not token:
             raise ReadwiseError("READWISE_TOKEN is required")
         headers = {"Authorization": f"Token {token}"}
         limits = httpx.Limits(max_connections=max(5, concurrency * 2), max_keepalive_connections=max(5, concurrency))
         timeout = httpx.Timeout(connect=5.0, read=10.0, write=10.0, pool=5.0)
-        self._client = httpx.AsyncClient(headers=headers, timeout=timeout, limits=limits, follow_redirects=True)
-        self._save_limiter = AsyncLimiter(max(1, rpm_save), time_period=60)
-        self._update_limiter = AsyncLimiter(max(1, rpm_update), time_period=60)
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but the h2 package is missing; using HTTP/1.1")
+                http2 = False
+        self.http2 = http2
+        self.base_url = base_url.rstrip("/")
+        self._observe = observe
+        self._client = httpx.AsyncClient(
+            headers=headers,
+            timeout=timeout,
+            limits=limits,
+            follow_redirects=True,
+            http2=http2,
+            transport=transport,
+        )
+        self.gzip_min_bytes = gzip_min_bytes if gzip_min_bytes is None else max(0, gzip_min_bytes)
+        self.gzip_level = min(9, max(1, gzip_level))
+        self.max_retries = max(0, max_retries)
+        self.retry_budget = max(0, retry_budget)
+        self.backoff_base = max(0.0, backoff_base)
+        self.backoff_cap = max(self.backoff_base, backoff_cap)
+        self._save_limiter = AdaptiveLimiter(max(1, rpm_save), floor=rpm_floor, max_pause=self.backoff_cap, name="save")
+        self._update_limiter = AdaptiveLimiter(max(1, rpm_update), floor=rpm_floor, max_pause=self.backoff_cap, name="update")
+        self._budget_left = self.retry_budget
+        # Cumulative counters; callers diff them to attribute retries to a run.
+        self.retries = 0
+        self.backoff_seconds = 0.0
+        # Request body bytes put on the wire (after compression, including retries).
+        self.bytes_sent = 0
 
     async def close(self) -> None:
         await self._client.aclose()
 
+    def reset_retry_budget(self) -> None:
+        self._budget_left = self.retry_budget
+
+    @property
+    def limiters(self) -> dict[str, AdaptiveLimiter]:
+        return {"save": self._save_limiter, "update": self._update_limiter}
+
+    @property
+    def save_rpm(self) -> float:
+        return self._save_limiter.rpm
+
+    @property
+    def update_rpm(self) -> float:
+        return self._update_limiter.rpm
+
     async def auth_check(self) -> bool:
-        response = await self._client.get(AUTH_URL)
+        response = await self._client.get(self.base_url + AUTH_PATH)
         logger.debug("Auth check status %s", response.status_code)
         return response.status_code == 204
 
+    async def warm_up(self, connections: int = 1) -> None:
+        """Open (TLS) connections ahead of the first upload; failures are only logged.
+
+        Each connection costs one auth request. With HTTP/2 a single
+        connection carries every request, so one is always enough.
+        """
+        count = 1 if self.http2 else max(1, connections)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self._client.get(self.base_url + AUTH_PATH) for _ in range(count)), return_exceptions=True)
+        failed = [result for result in results if isinstance(result, BaseException)]
+        if failed:
+            logger.debug("Connection warm-up failed: %r", failed[0])
+        else:
+            logger.debug("Warmed %d Reader connection(s) in %.2fs", count, time.perf_counter() - started)
+
     async def save(self, payload: dict[str, Any]) -> tuple[int, dict[str, Any] | None, float]:
-        async with self._save_limiter:
-            start = time.perf_counter()
-            response = await self._client.post(SAVE_URL, json=payload)
-            if response.status_code == 429:
-                await self._respect_retry_after(response)
-            duration = time.perf_counter() - start
-            content = None
-            if response.content:
-                with contextlib.suppress(Exception):
-                    content = response.json()
-            return response.status_code, content, duration
+        start = time.perf_counter()
+        # Multi-megabyte bodies are encoded (and compressed) off the event loop.
+        body, compressed = await asyncio.to_thread(self._encode, payload)
+        response = await self._send("POST", self.base_url + SAVE_PATH, self._save_limiter, body, compressed)
+        duration = time.perf_counter() - start
+        if self._observe is not None:
+            self._observe("save", duration)
+        return response.status_code, _json_or_none(response), duration
 
     async def update(self, reader_id: str, payload: dict[str, Any]) -> tuple[int, dict[str, Any] | None]:
-        async with self._update_limiter:
-            response = await self._client.patch(UPDATE_URL_TEMPLATE.format(id=reader_id), json=payload)
-            if response.status_code == 429:
-                await self._respect_retry_after(response)
-            data = None
-            if response.content:
-                with contextlib.suppress(Exception):
-                    data = response.json()
-            return response.status_code, data
-
-    async def _respect_retry_after(self, response: httpx.Response) -> None:
-        retry_after = response.headers.get("Retry-After")
-        delay = 1.0
-        if retry_after:
+        start = time.perf_counter()
+        body, compressed = self._encode(payload)
+        response = await self._send(
+            "PATCH", self.base_url + UPDATE_PATH_TEMPLATE.format(id=reader_id), self._update_limiter, body, compressed
+        )
+        if self._observe is not None:
+            self._observe("update", time.perf_counter() - start)
+        return response.status_code, _json_or_none(response)
+
+    def _encode(self, payload: dict[str, Any]) -> tuple[bytes, bytes | None]:
+        """Return the JSON body and, when compression applies, its gzipped form."""
+        body = encode_json(payload)
+        if self.gzip_min_bytes is None or len(body) < self.gzip_min_bytes:
+            return body, None
+        return body, gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def _request(self, method: str, url: str, body: bytes, *, gzipped: bool) -> httpx.Response:
+        headers = {"Content-Type": "application/json"}
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+        self.bytes_sent += len(body)
+        return await self._client.request(method, url, content=body, headers=headers)
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        limiter: AdaptiveLimiter,
+        body: bytes,
+        compressed: bytes | None = None,
+    ) -> httpx.Response:
+        attempt = 0
+        delay = self.backoff_base
+        while True:
+            error: httpx.TransportError | None = None
+            response: httpx.Response | None = None
             try:
-                delay = max(1.0, float(retry_after))
-            except ValueError:
-                delay = 1.0
-        logger.warning("Rate limited by Readwise, sleeping for %.1fs", delay)
-        await asyncio.sleep(delay)
+                async with limiter:
+                    if compressed is not None and self.gzip_min_bytes is not None:
+                        response = await self._request(method, url, compressed, gzipped=True)
+                        if response.status_code in (400, 415):
+                            response = await self._gzip_fallback(method, url, body, response)
+                    else:
+                        response = await self._request(method, url, body, gzipped=False)
+            except httpx.TransportError as exc:
+                error = exc
+            else:
+                limiter.on_response(response.status_code, response.headers)
+                if response.status_code != 429 and response.status_code < 500:
+                    return response
+
+            if attempt >= self.max_retries or self._budget_left <= 0:
+                if response is not None:
+                    return response
+                raise error
+            delay = self._next_delay(delay, response)
+            attempt += 1
+            self._budget_left -= 1
+            self.retries += 1
+            self.backoff_seconds += delay
+            reason = f"status {response.status_code}" if response is not None else repr(error)
+            logger.warning(
+                "%s %s failed (%s); retry %d/%d in %.1fs",
+                method,
+                url,
+                reason,
+                attempt,
+                self.max_retries,
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+    async def _gzip_fallback(self, method: str, url: str, body: bytes, rejected: httpx.Response) -> httpx.Response:
+        response = await self._request(method, url, body, gzipped=False)
+        if response.status_code < 400:
+            # The body was fine; the server just doesn't take compressed requests.
+            logger.warning("Server rejected gzip request bodies (status %s); sending them uncompressed", rejected.status_code)
+            self.gzip_min_bytes = None
+        return response
+
+    def _next_delay(self, previous: float, response: httpx.Response | None) -> float:
+        # Decorrelated jitter: grow from the previous sleep, randomized, capped.
+        delay = min(self.backoff_cap, random.uniform(self.backoff_base, max(self.backoff_base, previous * 3)))
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            # Honour the server's wait, but never park a worker longer than the cap.
+            delay = min(self.backoff_cap, max(delay, retry_after))
+        return delay
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Seconds to wait from ``Retry-After``, given as seconds or as an HTTP date."""
+    raw = response.headers.get("Retry-After")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _json_or_none(response: httpx.Response) -> dict[str, Any] | None:
+    data = None
+    if response.content:
+        with contextlib.suppress(Exception):
+            data = response.json()
+    return data
 
 
-__all__ = ["ReaderClient", "ReadwiseError"]
+__all__ = ["ReaderClient", "ReadwiseError", "encode_json"]
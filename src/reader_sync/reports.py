@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import statistics
+import threading
+import time
+import uuid
+from collections.abc import Callable, Coroutine, Generator, Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TypeVar
+
+from . import profiling
+from .models import SyncStats
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REPORT_VERSION = 1
+PERCENTILES = (50, 95, 99)
+# Stages in processing order; "discover" is the inbox walk feeding the pipeline.
+STAGE_ORDER = ("discover", "prepare", "title", "upload", "persist")
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile of ``values`` (``None`` when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+@dataclass(slots=True)
+class StageTiming:
+    wall: float = 0.0
+    cpu: float = 0.0
+    calls: int = 0
+
+
+class _Metered:
+    """Drive a coroutine step by step, charging the CPU time of each step to a stage.
+
+    Steps of different coroutines interleave on the event loop thread, so
+    measuring around a whole ``await`` would also count everyone else's work.
+    """
+
+    __slots__ = ("_coro", "_charge", "_stage")
+
+    def __init__(self, coro: Coroutine[Any, Any, T], charge: Callable[[float], None], stage: str) -> None:
+        self._coro = coro
+        self._charge = charge
+        self._stage = stage
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        coro = self._coro
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            started = time.thread_time()
+            try:
+                with profiling.scope(self._stage):
+                    step = coro.throw(error) if error is not None else coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self._charge(time.thread_time() - started)
+            try:
+                value, error = (yield step), None
+            except BaseException as exc:  # noqa: BLE001 - forwarded into the coroutine
+                value, error = None, exc
+
+
+class RunRecorder:
+    """Collect the timings of one run and turn them into a report.
+
+    Stage wall time is the summed duration of the stage's handler calls
+    (they overlap when a stage has several workers), CPU time is measured
+    only while the stage's code actually runs, including work it offloads to
+    threads through :meth:`offload`. Request latencies are fed in with
+    :meth:`observe`, possibly from other threads. The same stage scopes tag
+    samples of a running :class:`~reader_sync.profiling.StageProfiler`.
+    """
+
+    def __init__(self, command: str, mode: str, *, dry_run: bool = False) -> None:
+        self.command = command
+        self.mode = mode
+        self.dry_run = dry_run
+        self.started_at = time.time()
+        self.candidates: int | None = None
+        self.processed = 0
+        self.stages: dict[str, StageTiming] = {}
+        self.latencies: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+
+    def _stage(self, name: str) -> StageTiming:
+        timing = self.stages.get(name)
+        if timing is None:
+            timing = self.stages[name] = StageTiming()
+        return timing
+
+    def add_cpu(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._stage(stage).cpu += seconds
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.latencies.setdefault(name, []).append(seconds)
+
+    def metered(self, stage: str, handler: Callable[..., Coroutine[Any, Any, T]]) -> Callable[..., Coroutine[Any, Any, T]]:
+        """Wrap an async handler so its calls are charged to ``stage``."""
+
+        async def _metered(*args: Any) -> T:
+            started = time.perf_counter()
+            try:
+                return await _Metered(handler(*args), lambda cpu: self.add_cpu(stage, cpu), stage)
+            finally:
+                with self._lock:
+                    timing = self._stage(stage)
+                    timing.wall += time.perf_counter() - started
+                    timing.calls += 1
+
+        return _metered
+
+    async def offload(self, stage: str, fn: Callable[..., T], *args: Any, wall: bool = True, **kwargs: Any) -> T:
+        """``asyncio.to_thread`` that charges the thread's CPU time to ``stage``.
+
+        Pass ``wall=False`` from inside a :meth:`metered` handler of the same
+        stage, whose wall time already covers the call.
+        """
+
+        def _call() -> T:
+            started = time.thread_time()
+            try:
+                with profiling.scope(stage):
+                    return fn(*args, **kwargs)
+            finally:
+                self.add_cpu(stage, time.thread_time() - started)
+
+        started = time.perf_counter()
+        try:
+            return await asyncio.to_thread(_call)
+        finally:
+            if wall:
+                with self._lock:
+                    self._stage(stage).wall += time.perf_counter() - started
+
+    def iterate(self, stage: str, items: Iterable[T]) -> Iterator[T]:
+        """Yield from ``items``, charging the time spent producing each one to ``stage``."""
+        iterator = iter(items)
+        timing = self._stage(stage)
+        while True:
+            wall, cpu = time.perf_counter(), time.thread_time()
+            try:
+                with profiling.scope(stage):
+                    item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                with self._lock:
+                    timing.wall += time.perf_counter() - wall
+                    timing.cpu += time.thread_time() - cpu
+            timing.calls += 1
+            yield item
+
+    def build(self, stats: SyncStats, *, status: str) -> dict[str, Any]:
+        wall = time.perf_counter() - self._wall0
+        with self._lock:
+            stages = {name: self.stages[name] for name in sorted(self.stages, key=_stage_key)}
+            latencies = {name: list(values) for name, values in sorted(self.latencies.items())}
+        return {
+            "version": REPORT_VERSION,
+            "run_id": stats.run_id,
+            "command": self.command,
+            "mode": self.mode,
+            "dry_run": self.dry_run,
+            "status": status,
+            "started_at": datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(timespec="milliseconds"),
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(time.process_time() - self._cpu0, 3),
+            "counts": {
+                "candidates": self.candidates if self.candidates is not None else self.processed,
+                "processed": self.processed,
+                "created": stats.created,
+                "updated": stats.updated,
+                "skipped": stats.skipped,
+                "failed": stats.failed,
+                "linked": stats.linked,
+            },
+            "docs_per_min": round(self.processed * 60 / wall, 1) if wall > 0 else None,
+            "uploaded_bytes": stats.uploaded_bytes,
+            "slimmed_bytes": stats.slimmed_bytes,
+            "retries": stats.retries,
+            "backoff_seconds": round(stats.backoff_seconds, 2),
+            "stages": {
+                name: {"wall": round(t.wall, 4), "cpu": round(t.cpu, 4), "calls": t.calls} for name, t in stages.items()
+            },
+            "latency": {name: _latency_summary(values) for name, values in latencies.items()},
+        }
+
+
+def _stage_key(name: str) -> tuple[int, str]:
+    return (STAGE_ORDER.index(name) if name in STAGE_ORDER else len(STAGE_ORDER), name)
+
+
+def _latency_summary(values: list[float]) -> dict[str, float | int | None]:
+    summary: dict[str, float | int | None] = {"count": len(values)}
+    for pct in PERCENTILES:
+        value = percentile(values, pct)
+        summary[f"p{pct}"] = round(value, 4) if value is not None else None
+    summary["max"] = round(max(values), 4) if values else None
+    return summary
+
+
+def write_report(report: dict[str, Any], directory: Path) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    name = report.get("run_id")
+    if not name:
+        # Dry runs and replays have no journal run ID; name them the same way.
+        stamp = datetime.fromisoformat(report["started_at"]).astimezone().strftime("%Y%m%d-%H%M%S")
+        name = f"{stamp}-{uuid.uuid4().hex[:6]}-{report['command']}"
+    path = directory / f"{name}.json"
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+    return path
+
+
+def load_reports(directory: Path, *, limit: int | None = None) -> list[dict[str, Any]]:
+    """Reports in ``directory``, oldest first; unreadable files are skipped."""
+    reports = []
+    for path in sorted(directory.glob("*.json")):
+        try:
+            report = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            logger.warning("Skipping unreadable report %s: %s", path, exc)
+            continue
+        if isinstance(report, dict) and report.get("version") == REPORT_VERSION:
+            reports.append(report)
+    reports.sort(key=lambda report: report.get("started_at", ""))
+    return reports[-limit:] if limit else reports
+
+
+# Trend metrics: name, how to read it from a report, and whether a higher value is worse.
+def _discover_ms_per_1k(report: dict[str, Any]) -> float | None:
+    candidates = report["counts"].get("candidates") or 0
+    wall = report["stages"].get("discover", {}).get("wall")
+    return wall * 1000 * 1000 / candidates if candidates and wall is not None else None
+
+
+def _stage_cpu_ms_per_doc(stage: str) -> Callable[[dict[str, Any]], float | None]:
+    def _read(report: dict[str, Any]) -> float | None:
+        processed = report["counts"].get("processed") or 0
+        cpu = report["stages"].get(stage, {}).get("cpu")
+        return cpu * 1000 / processed if processed and cpu is not None else None
+
+    return _read
+
+
+def _latency(name: str, pct: int) -> Callable[[dict[str, Any]], float | None]:
+    return lambda report: report["latency"].get(name, {}).get(f"p{pct}")
+
+
+TREND_METRICS: tuple[tuple[str, Callable[[dict[str, Any]], float | None], bool], ...] = (
+    ("discover ms/1k files", _discover_ms_per_1k, True),
+    ("prepare cpu ms/doc", _stage_cpu_ms_per_doc("prepare"), True),
+    ("save p95 s", _latency("save", 95), True),
+    ("update p95 s", _latency("update", 95), True),
+    ("db_write p95 s", _latency("db_write", 95), True),
+    ("docs/min", lambda report: report.get("docs_per_min"), False),
+)
+
+
+@dataclass(slots=True)
+class Trend:
+    name: str
+    latest: float
+    baseline: float
+    higher_is_worse: bool
+
+    @property
+    def change(self) -> float | None:
+        return (self.latest - self.baseline) / self.baseline if self.baseline else None
+
+    def regressed(self, threshold: float) -> bool:
+        change = self.change
+        if change is None:
+            return False
+        return change > threshold if self.higher_is_worse else change < -threshold
+
+
+def run_kind(report: dict[str, Any]) -> tuple[str, str, bool]:
+    """(command, mode, dry_run): reports are only comparable within one kind."""
+    return report.get("command", ""), report.get("mode", ""), bool(report.get("dry_run"))
+
+
+def trends(reports: list[dict[str, Any]], *, window: int | None = None) -> list[Trend]:
+    """Compare the newest report with the median of earlier reports of the same kind, per metric.
+
+    A ``flush`` or a dry run is never measured against ``push --all`` runs.
+    At most ``window`` earlier reports form the baseline. Metrics the newest
+    report has no value for are skipped.
+    """
+    if not reports:
+        return []
+    latest = reports[-1]
+    kind = run_kind(latest)
+    earlier = [report for report in reports[:-1] if run_kind(report) == kind]
+    if window:
+        earlier = earlier[-window:]
+    result = []
+    for name, read, higher_is_worse in TREND_METRICS:
+        value = read(latest)
+        if value is None:
+            continue
+        baseline = [past for past in map(read, earlier) if past is not None]
+        if not baseline:
+            continue
+        result.append(Trend(name, value, statistics.median(baseline), higher_is_worse))
+    return result
+
+
+__all__ = [
+    "RunRecorder",
+    "Trend",
+    "load_reports",
+    "percentile",
+    "run_kind",
+    "trends",
+    "write_report",
+]
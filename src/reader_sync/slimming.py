@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import re
+from collections.abc import Mapping
+from dataclasses import dataclass
+
+DEFAULT_ELEMENTS: dict[str, int] = {"script": 0, "style": 0, "noscript": 0, "template": 0}
+DEFAULT_MAX_DATA_URI = 32 * 1024
+
+# Stand-in for dropped data URIs: still a valid URL, so src/href attributes stay well formed.
+_EMPTY_DATA_URI = "data:,"
+_DATA_URI_RE = re.compile(r"(?<![\w-])data:[\w.+/-]*(?:;[\w.+-]+=[^;,\"'\s)]*)*(?:;base64)?,[^\"'\s)<>]*", re.I)
+_FONT_DATA_URI_RE = re.compile(r"(?<![\w-])data:(?:font/|application/(?:x-)?font|application/vnd\.ms-fontobject)", re.I)
+_FONT_FACE_RE = re.compile(r"@font-face\s*\{[^}]*\}", re.I)
+_LINK_RE = re.compile(r"<link\b[^>]*>", re.I)
+_REL_RE = re.compile(r"""\brel\s*=\s*["']?([^"'>]+)""", re.I)
+_AS_FONT_RE = re.compile(r"""\bas\s*=\s*["']?font\b""", re.I)
+
+
+@dataclass(slots=True)
+class SlimResult:
+    html: str
+    bytes_before: int
+    bytes_after: int
+
+    @property
+    def saved(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+class HtmlSlimmer:
+    """Strip payload weight that Reader's cleaner would discard anyway.
+
+    ``elements`` maps tag names to a size threshold in bytes: an element is
+    removed when its markup is larger than the threshold (0 removes every
+    one). Data URIs longer than ``max_data_uri`` are replaced by an empty
+    ``data:,`` URI. With ``strip_fonts`` font data URIs, ``@font-face``
+    rules and font preload links are removed regardless of size. When
+    ``style`` elements are removed, stylesheet links go with them.
+
+    Rules are regular-expression passes over the text rather than a parse,
+    so multi-megabyte SingleFile archives are slimmed in milliseconds.
+    """
+
+    def __init__(
+        self,
+        elements: Mapping[str, int] | None = None,
+        *,
+        max_data_uri: int = DEFAULT_MAX_DATA_URI,
+        strip_fonts: bool = True,
+    ) -> None:
+        self.elements = dict(DEFAULT_ELEMENTS if elements is None else elements)
+        self.max_data_uri = max(0, max_data_uri)
+        self.strip_fonts = strip_fonts
+        self._element_res = [
+            (re.compile(rf"<{re.escape(tag)}\b[^>]*>.*?</{re.escape(tag)}\s*>", re.I | re.S), max(0, limit))
+            for tag, limit in self.elements.items()
+        ]
+        self._strip_stylesheets = self.elements.get("style") == 0
+
+    def slim(self, html: str) -> SlimResult:
+        before = _utf8_len(html)
+        for pattern, limit in self._element_res:
+            html = pattern.sub(lambda m, limit=limit: "" if _utf8_len(m.group(0)) > limit else m.group(0), html)
+        if self.strip_fonts:
+            html = _FONT_FACE_RE.sub("", html)
+        if self._strip_stylesheets or self.strip_fonts:
+            html = _LINK_RE.sub(self._drop_link, html)
+        html = _DATA_URI_RE.sub(self._shrink_data_uri, html)
+        return SlimResult(html=html, bytes_before=before, bytes_after=_utf8_len(html))
+
+    def _drop_link(self, match: re.Match[str]) -> str:
+        tag = match.group(0)
+        rel = _REL_RE.search(tag)
+        rels = set(rel.group(1).lower().split()) if rel else set()
+        if self._strip_stylesheets and "stylesheet" in rels:
+            return ""
+        if self.strip_fonts and "preload" in rels and _AS_FONT_RE.search(tag):
+            return ""
+        return tag
+
+    def _shrink_data_uri(self, match: re.Match[str]) -> str:
+        uri = match.group(0)
+        if len(uri) > self.max_data_uri or (self.strip_fonts and _FONT_DATA_URI_RE.match(uri)):
+            return _EMPTY_DATA_URI
+        return uri
+
+
+def _utf8_len(text: str) -> int:
+    # ASCII-only text (the common case for archives) needs no encode to measure.
+    return len(text) if text.isascii() else len(text.encode("utf-8", errors="ignore"))
+
+
+__all__ = ["DEFAULT_ELEMENTS", "DEFAULT_MAX_DATA_URI", "HtmlSlimmer", "SlimResult"]
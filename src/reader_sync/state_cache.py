@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import logging
+import sys
+import time
+from dataclasses import fields
+from datetime import datetime, timezone
+
+from .database import Database
+from .models import DocumentState, FileIndexEntry, TitleSource
+
+logger = logging.getLogger(__name__)
+
+_COMPARED = (
+    "source_url",
+    "title",
+    "title_source",
+    "file_path",
+    "file_mtime",
+    "readwise_id",
+    "last_status",
+    "last_error",
+    "sha1",
+)
+
+
+class DocumentCache:
+    """In-memory copy of the ``documents`` table keyed by ``norm_url``.
+
+    :meth:`load` reads every row once; afterwards lookups never touch SQLite
+    and writes are forwarded to the database only when a stored field would
+    actually change, so re-scanning an unchanged library writes nothing.
+    All document writes must go through the cache to keep it authoritative.
+    Rows that reached Reader are also indexed by content ``sha1``.
+    """
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self._rows: dict[str, DocumentState] = {}
+        self._by_sha1: dict[str, str] = {}
+        self.loaded = False
+        self.writes = 0
+        self.writes_skipped = 0
+
+    def load(self) -> int:
+        started = time.perf_counter()
+        self._rows = {state.norm_url: state for state in self.db.all_documents()}
+        self._by_sha1 = {}
+        for state in self._rows.values():
+            self._index(state)
+        self.loaded = True
+        logger.info(
+            "Loaded %d document states (%.1f MiB) in %.2fs",
+            len(self._rows),
+            self.memory_bytes() / (1024 * 1024),
+            time.perf_counter() - started,
+        )
+        return len(self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, norm_url: str) -> DocumentState | None:
+        return self._rows.get(norm_url)
+
+    def by_content(self, sha1: str) -> DocumentState | None:
+        """A document with identical content that already has a Reader id."""
+        norm_url = self._by_sha1.get(sha1)
+        return self._rows.get(norm_url) if norm_url is not None else None
+
+    def is_alias(self, state: DocumentState) -> bool:
+        """Whether ``state`` was linked to another URL's upload of the same content."""
+        if not state.sha1:
+            return False
+        original = self.by_content(state.sha1)
+        return (
+            original is not None
+            and original.norm_url != state.norm_url
+            and original.readwise_id == state.readwise_id
+        )
+
+    def _index(self, state: DocumentState) -> None:
+        # First synced copy wins so aliases keep pointing at the original upload.
+        if state.sha1 and state.readwise_id:
+            self._by_sha1.setdefault(state.sha1, state.norm_url)
+
+    def upsert(
+        self,
+        *,
+        norm_url: str,
+        source_url: str,
+        title: str | None,
+        title_source: TitleSource | None,
+        file_path: str,
+        file_mtime: float,
+        readwise_id: str | None,
+        last_status: int | None,
+        last_error: str | None,
+        sha1: str | None = None,
+    ) -> bool:
+        """Store the row if anything differs; return whether a write was issued."""
+        current = self._rows.get(norm_url)
+        # Mirrors the COALESCEs in Database.upsert: a known Reader id or hash is never cleared.
+        if current is not None and readwise_id is None:
+            readwise_id = current.readwise_id
+        if current is not None and sha1 is None:
+            sha1 = current.sha1
+        values = dict(
+            source_url=source_url,
+            title=title,
+            title_source=title_source,
+            file_path=file_path,
+            file_mtime=file_mtime,
+            readwise_id=readwise_id,
+            last_status=last_status,
+            last_error=last_error,
+            sha1=sha1,
+        )
+        if current is not None and all(getattr(current, name) == values[name] for name in _COMPARED):
+            self.writes_skipped += 1
+            return False
+        now = datetime.now(timezone.utc)
+        state = DocumentState(
+            norm_url=norm_url,
+            created_at=current.created_at if current is not None else now,
+            updated_at=now,
+            **values,
+        )
+        self._rows[norm_url] = state
+        self._index(state)
+        self.db.upsert(norm_url=norm_url, **values)
+        self.writes += 1
+        return True
+
+    def update_status(self, norm_url: str, *, status: int | None, error: str | None) -> bool:
+        current = self._rows.get(norm_url)
+        if current is None:
+            # Database.update_status is a no-op for unknown rows as well.
+            self.writes_skipped += 1
+            return False
+        if current.last_status == status and current.last_error == error:
+            self.writes_skipped += 1
+            return False
+        current.last_status = status
+        current.last_error = error
+        current.updated_at = datetime.now(timezone.utc)
+        self.db.update_status(norm_url, status=status, error=error)
+        self.writes += 1
+        return True
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the cache (dict, row objects and their values)."""
+        total = sys.getsizeof(self._rows) + sys.getsizeof(self._by_sha1)
+        seen: set[int] = set()
+        for key, state in self._rows.items():
+            total += sys.getsizeof(key) + sys.getsizeof(state)
+            seen.add(id(key))
+            for field in fields(state):
+                value = getattr(state, field.name)
+                # Small ints, None and interned strings are shared; count each object once.
+                if value is None or id(value) in seen:
+                    continue
+                seen.add(id(value))
+                total += sys.getsizeof(value)
+        return total
+
+
+class FileIndex:
+    """In-memory copy of the ``file_index`` table keyed by path.
+
+    Like :class:`DocumentCache`, :meth:`load` reads every row once so the
+    per-file "unchanged since last scan?" check never waits on the database
+    writer; :meth:`upsert` updates the copy and queues the write.
+    """
+
+    def __init__(self, db: Database) -> None:
+        self.db = db
+        self._entries: dict[str, FileIndexEntry] = {}
+        self.loaded = False
+
+    def load(self) -> int:
+        self._entries = self.db.all_files()
+        self.loaded = True
+        return len(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, path: str) -> FileIndexEntry | None:
+        return self._entries.get(path)
+
+    def upsert(self, entry: FileIndexEntry) -> None:
+        self._entries[entry.path] = entry
+        self.db.upsert_file(entry)
+
+
+__all__ = ["DocumentCache", "FileIndex"]
@@ -1,125 +1,364 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import datetime as dt
+import functools
 import logging
 import time
-from typing import Literal
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Literal, TypeVar
 
 import httpx
 
 from .config import Settings
 from .database import Database
-from .failures import append_failure, read_failures
-from .filesystem import compute_sha1, discover_files, read_html
-from .html_utils import (
-    choose_url_from_html,
-    extract_local_title,
-    infer_from_filename,
-    normalize_url,
-    synthetic_url,
-    tidy_extracted_url,
+from .failures import read_failures
+from .filesystem import discover_files, read_html, stat_file
+from .html_utils import normalize_url
+from .journal import RunJournal, is_after, position, walk_order
+from .metrics import MetricsServer, SyncMetrics, TextfileExporter
+from .models import (
+    DocumentState,
+    FileIndexEntry,
+    FileMeta,
+    PreparedDocument,
+    PushMode,
+    RunRecord,
+    SyncAction,
+    SyncResult,
+    SyncStats,
 )
-from .models import FileMeta, PreparedDocument, SyncResult, SyncStats
+from .outbox import Outbox, classify_error
+from .pipeline import Pipeline, Stage
+from .prepare import DocumentPreparer, prepare_document
 from .readwise_client import ReaderClient, ReadwiseError
-from .title_fetcher import fetch_remote_title
+from .reports import RunRecorder, write_report
+from .slimming import HtmlSlimmer, SlimResult
+from .state_cache import DocumentCache, FileIndex
+from .title_fetcher import TitleResolver
+from .watcher import Debouncer, DirectoryWatcher
 
 logger = logging.getLogger(__name__)
 
-_MODE = Literal["all", "new"]
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class _Run:
+    mode: PushMode
+    dry_run: bool
+    stats: SyncStats
+    # Whether files arrive sorted by add time (journal positions then include it).
+    ordered: bool = False
+    # Content hashes being uploaded right now, so identical copies are sent once.
+    # Released when the upload settles; afterwards the document cache knows the content.
+    claimed: set[str] = field(default_factory=set)
+
+
+@dataclass(slots=True)
+class _Job:
+    """A file travelling through the pipeline, accumulating what each stage learned."""
+
+    file: FileMeta
+    seq: int = -1
+    document: PreparedDocument | None = None
+    existing: DocumentState | None = None
+    action: SyncAction = "skip"
+    remote_title: str | None = None
+    status: int | None = None
+    data: dict[str, Any] | None = None
+    error: str | None = None
+    error_class: str | None = None
+    slimmed: SlimResult | None = None
+    result: SyncResult | None = None
+    claimed: bool = False
 
 
 class SyncService:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
-        self.db = Database(settings.db_path)
+        self.metrics = SyncMetrics()
+        self._recorder: RunRecorder | None = None
+        self.db = Database(
+            settings.db_path,
+            batch_size=settings.db_batch_size,
+            batch_interval=settings.db_batch_interval,
+            observe=self._observe,
+        )
+        self.documents = DocumentCache(self.db)
+        self.file_index = FileIndex(self.db)
+        self.outbox = Outbox(
+            self.db,
+            backoff_base=settings.outbox_backoff_base,
+            backoff_cap=settings.outbox_backoff_cap,
+        )
         try:
             self.reader = ReaderClient(
                 settings.token,
                 rpm_save=settings.rpm_save,
                 rpm_update=settings.rpm_update,
-                concurrency=settings.concurrency,
+                concurrency=settings.upload_concurrency,
+                max_retries=settings.max_retries,
+                retry_budget=settings.retry_budget,
+                backoff_base=settings.backoff_base,
+                backoff_cap=settings.backoff_cap,
+                rpm_floor=settings.rpm_floor,
+                http2=settings.http2,
+                gzip_min_bytes=settings.gzip_min_bytes if settings.gzip_requests else None,
+                base_url=settings.reader_base_url,
+                observe=self._observe,
             )
         except ReadwiseError as exc:
             logger.error("Failed to initialize Reader client: %s", exc)
             raise
+        self._preparer = DocumentPreparer(
+            settings.keep_params,
+            settings.drop_params,
+            workers=settings.prepare_workers,
+        )
+        self._slimmer = (
+            HtmlSlimmer(
+                settings.slim_elements,
+                max_data_uri=settings.slim_max_data_uri,
+                strip_fonts=settings.slim_strip_fonts,
+            )
+            if settings.slim_html
+            else None
+        )
+        self._warm_up: asyncio.Task[None] | None = None
+        self._pipeline: Pipeline[_Job] | None = None
+        self._textfile: TextfileExporter | None = None
+        self._textfile_task: asyncio.Task[None] | None = None
+        self._metrics_server: MetricsServer | None = None
+        self.metrics.add_collector(self._collect_metrics)
         timeout = self.settings.title_timeout
         self._title_client = httpx.AsyncClient(
             follow_redirects=True,
             timeout=httpx.Timeout(timeout, connect=timeout, read=timeout, write=timeout, pool=timeout),
         )
+        self._titles = TitleResolver(
+            self.db,
+            self._title_client,
+            timeout=timeout,
+            ttl=settings.title_cache_ttl,
+            negative_ttl=settings.title_negative_ttl,
+            max_bytes=settings.title_max_bytes,
+            per_host=settings.title_per_host,
+            breaker_threshold=settings.title_breaker_threshold,
+            breaker_cooldown=settings.title_breaker_cooldown,
+        )
 
     async def close(self) -> None:
+        for task in (self._warm_up, self._textfile_task):
+            if task is not None and not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        if self._textfile is not None:
+            # Final snapshot so the file reflects the finished run.
+            with contextlib.suppress(OSError):
+                self._textfile.write()
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
         await self.reader.close()
         await self._title_client.aclose()
+        self._preparer.close()
         self.db.close()
 
+    def start_metrics(self, *, serve: bool = False) -> None:
+        """Start the configured exporters: the textfile always, the HTTP port only with ``serve``."""
+        settings = self.settings
+        if settings.metrics_textfile is not None and self._textfile_task is None:
+            self._textfile = TextfileExporter(self.metrics, settings.metrics_textfile, interval=settings.metrics_interval)
+            self._textfile_task = asyncio.create_task(self._textfile.run())
+        if serve and settings.metrics_port is not None and self._metrics_server is None:
+            server = MetricsServer(self.metrics, host=settings.metrics_host, port=settings.metrics_port)
+            try:
+                server.start()
+            except OSError as exc:
+                logger.error("Could not serve metrics on %s:%s: %s", settings.metrics_host, settings.metrics_port, exc)
+            else:
+                self._metrics_server = server
+
+    def _observe(self, stage: str, seconds: float) -> None:
+        # Called from the database writer thread as well as the event loop.
+        self.metrics.observe(stage, seconds)
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.observe(stage, seconds)
+
+    @contextlib.contextmanager
+    def _reporting(self, command: str, mode: str, dry_run: bool, stats: SyncStats) -> Iterator[RunRecorder]:
+        """Record a run's timings and write its JSON report to ``data/reports`` when it ends."""
+        recorder = RunRecorder(command, mode, dry_run=dry_run)
+        self._recorder = recorder
+        status = "failed"
+        try:
+            yield recorder
+            status = "completed"
+        except (asyncio.CancelledError, KeyboardInterrupt):
+            status = "interrupted"
+            raise
+        finally:
+            self._recorder = None
+            try:
+                path = write_report(recorder.build(stats, status=status), self.settings.reports_dir)
+            except OSError as exc:
+                logger.warning("Could not write run report: %s", exc)
+            else:
+                logger.info("Run report written to %s", path)
+
+    async def _offload(self, stage: str, fn: Callable[..., T], *args: Any) -> T:
+        recorder = self._recorder
+        if recorder is None:
+            return await asyncio.to_thread(fn, *args)
+        return await recorder.offload(stage, fn, *args, wall=False)
+
+    def _collect_metrics(self) -> None:
+        metrics = self.metrics
+        for name, limiter in self.reader.limiters.items():
+            metrics.limiter_wait.set_total(limiter.waited, endpoint=name)
+            metrics.rate_limited.set_total(limiter.throttled, endpoint=name)
+        metrics.retries.set_total(self.reader.retries)
+        metrics.uploaded_bytes.set_total(self.reader.bytes_sent)
+        pipeline = self._pipeline
+        for stage in ("prepare", "title", "upload", "persist"):
+            depth = pipeline.depths().get(stage, 0) if pipeline is not None else 0
+            metrics.queue_depth.set(depth, stage=stage)
+
     async def auth_check(self) -> bool:
         return await self.reader.auth_check()
 
     async def push(
         self,
-        mode: _MODE,
+        mode: PushMode,
         *,
         dry_run: bool = False,
         max_items: int | None = None,
         since: float | None = None,
+        resume: bool = False,
     ) -> SyncStats:
         stats = SyncStats()
-        files = discover_files(self.settings.watch_dir, self.settings.patterns)
+        with self._reporting("push", mode, dry_run, stats) as recorder:
+            await self._push(stats, recorder, mode, dry_run=dry_run, max_items=max_items, since=since, resume=resume)
+        return stats
 
-        # Incremental windowing for --new: if no --since provided, start from last watermark.
-        window_start: float | None = since
-        window_end: float | None = None
-        if mode == "new" and since is None:
-            raw = self.db.get_meta("last_push_new_end_ts")
-            try:
-                window_start = float(raw) if raw is not None else None
-            except (TypeError, ValueError):
-                window_start = None
-            # Bound upper window at collection time to avoid racing with concurrently-added files
-            window_end = time.time()
-
-        def _add_time(meta) -> float:
-            return meta.birthtime if meta.birthtime is not None else meta.mtime
-
-        # Apply time-window filtering when requested
-        if window_start is not None:
-            files = [m for m in files if _add_time(m) > window_start]
-        if window_end is not None:
-            files = [m for m in files if _add_time(m) <= window_end]
-
-        # Process in ascending add-time order so the watermark advances correctly with --max
-        files.sort(key=_add_time)
-        total_candidates = len(files)
-
-        if max_items is not None:
-            files = files[:max_items]
-        if not files:
-            logger.info("No files discovered under %s", self.settings.watch_dir)
-            return stats
+    async def _push(
+        self,
+        stats: SyncStats,
+        recorder: RunRecorder,
+        mode: PushMode,
+        *,
+        dry_run: bool,
+        max_items: int | None,
+        since: float | None,
+        resume: bool,
+    ) -> None:
+        previous: RunRecord | None = None
+        if resume:
+            previous = self.db.latest_run()
+            if previous is None or previous.status == "completed":
+                logger.info("No interrupted push run to resume")
+                return
+            params = previous.params
+            mode = previous.mode  # type: ignore[assignment]
+            recorder.mode = mode
+            since = params.get("since")
+            window_start, window_end = params.get("window_start"), params.get("window_end")
+            if params.get("max_items") is not None:
+                max_items = max(0, params["max_items"] - previous.done)
+        else:
+            window_start, window_end = push_window(self.db, mode, since)
+        watermark = mode == "new" and since is None and not dry_run
+        if not dry_run and self.settings.warm_connections and self._warm_up is None:
+            # Open Reader connections while the inbox is walked so the first upload skips the handshakes.
+            self._warm_up = asyncio.create_task(self.reader.warm_up(self.settings.warm_connections))
+        ordered = mode == "new" or max_items is not None
+        root = self.settings.watch_dir
+
+        discovered = discover_files(
+            root,
+            self.settings.patterns,
+            exclude=self.settings.exclude,
+            max_depth=self.settings.max_depth,
+        )
+        # Apply time-window filtering while walking so out-of-window files are never retained
+        candidates = (m for m in discovered if in_window(m, window_start, window_end))
+        checkpoint = previous.checkpoint if previous else None
+        if checkpoint is not None:
+            candidates = (m for m in candidates if is_after(position(m, root, add_time(m) if ordered else None), checkpoint))
+
+        files: list[FileMeta] | None = None
+        if ordered:
+            # Process in ascending add-time order so the watermark advances correctly with --max;
+            # ties keep walk order so checkpoints are well defined.
+            # The walk runs on a worker thread so connection warm-up proceeds meanwhile.
+            files = await recorder.offload(
+                "discover",
+                sorted,
+                candidates,
+                key=lambda m: (add_time(m), walk_order(m.path.relative_to(root).as_posix())),
+            )
+            recorder.candidates = len(files)
+            if max_items is not None:
+                files = files[:max_items]
+
+        journal: RunJournal | None = None
+        if not dry_run:
+            options: dict[str, Any] = dict(interval=self.settings.checkpoint_interval)
+            if watermark and files is not None:
+                options.update(
+                    add_times=[add_time(m) for m in files],
+                    on_mark=lambda mark: self.db.set_meta("last_push_new_end_ts", str(mark)),
+                )
+            if previous is not None:
+                journal = RunJournal.resume(self.db, previous, **options)
+            else:
+                params = dict(since=since, max_items=max_items, window_start=window_start, window_end=window_end)
+                journal = RunJournal.start(self.db, mode, params, **options)
+            stats.run_id = journal.run_id
 
-        semaphore = asyncio.Semaphore(self.settings.concurrency)
-        tasks = []
-        for meta in files:
-            tasks.append(self._process_file(meta, semaphore, mode=mode, dry_run=dry_run, stats=stats))
-        await asyncio.gather(*tasks)
+        if files is not None and not files:
+            logger.info("No files discovered under %s", root)
+            processed = 0
+        else:
+            # A plain --all run streams straight from the walker so memory stays flat.
+            run = _Run(mode, dry_run, stats, ordered=ordered)
+            try:
+                source = files if files is not None else recorder.iterate("discover", candidates)
+                processed = await self._run_pipeline(source, run, journal=journal)
+            except BaseException:
+                if journal is not None:
+                    journal.finish("interrupted")
+                    self.db.flush()
+                raise
+            if not processed:
+                logger.info("No files discovered under %s", root)
+
+        if journal is not None:
+            try:
+                # Only advance the watermark and complete the run once every document row is committed.
+                await self.db.wait_durable()
+            except BaseException:
+                journal.finish("interrupted")
+                self.db.flush()
+                raise
 
         # Advance watermark for --new auto-incremental runs (not in dry-run)
-        if mode == "new" and since is None and not dry_run:
+        if watermark and files is not None:
             if files:
-                new_mark = max(_add_time(m) for m in files)
+                new_mark = max(add_time(m) for m in files)
             else:
                 # If nothing to process, advance to collection time to avoid re-scanning old files
                 new_mark = window_end or time.time()
             self.db.set_meta("last_push_new_end_ts", str(new_mark))
-            logger.debug(
-                "Updated last_push_new_end_ts=%s (processed=%d/%d)",
-                new_mark,
-                len(files),
-                total_candidates,
-            )
-        return stats
+            logger.debug("Updated last_push_new_end_ts=%s (processed=%d)", new_mark, len(files))
+        if journal is not None:
+            journal.finish("completed")
+            await self.db.wait_durable()
 
     async def replay(self, *, date: dt.date, dry_run: bool = False) -> SyncStats:
         stats = SyncStats()
@@ -127,145 +366,481 @@ class SyncService:
         if not entries:
             logger.info("No failure entries for %s", date.isoformat())
             return stats
-        semaphore = asyncio.Semaphore(self.settings.concurrency)
-        tasks = []
-        for url, filename in entries:
-            path = self.settings.watch_dir / filename
-            if not path.exists():
-                logger.warning("Replay skip: file %s missing", filename)
-                continue
-            stat = path.stat()
-            file_meta = FileMeta(path=path, mtime=stat.st_mtime, size=stat.st_size)
-            tasks.append(
-                self._process_file(
-                    file_meta,
-                    semaphore,
-                    mode="all",
-                    dry_run=dry_run,
-                    stats=stats,
-                )
-            )
-        await asyncio.gather(*tasks)
+        with self._reporting("replay", "replay", dry_run, stats) as recorder:
+            files: list[FileMeta] = []
+            for url, filename in entries:
+                path = self.settings.watch_dir / filename
+                if not path.exists():
+                    logger.warning("Replay skip: file %s missing", filename)
+                    continue
+                files.append(stat_file(path))
+            recorder.candidates = len(entries)
+            await self._run_pipeline(files, _Run("all", dry_run, stats))
         return stats
 
-    async def _process_file(self, file_meta, semaphore: asyncio.Semaphore, *, mode: _MODE, dry_run: bool, stats: SyncStats) -> None:
-        async with semaphore:
-            try:
-                document = await asyncio.to_thread(self._prepare_document, file_meta)
-            except Exception as exc:  # noqa: BLE001
-                logger.exception("Failed to prepare document %s: %s", file_meta.path, exc)
-                append_failure(self.settings.root, "", file_meta.path.name)
-                stats.failed += 1
-                return
+    async def flush(self, *, dry_run: bool = False, force: bool = False) -> SyncStats:
+        """Retry every outbox entry whose backoff has elapsed (all of them with ``force``) in one pass."""
+        stats = SyncStats()
+        entries = self.outbox.due(include_waiting=force)
+        if not entries:
+            logger.info("Outbox has nothing due")
+            return stats
+        with self._reporting("flush", "flush", dry_run, stats) as recorder:
+            files: list[FileMeta] = []
+            for entry in entries:
+                path = Path(entry.file_path)
+                try:
+                    files.append(stat_file(path))
+                except FileNotFoundError:
+                    logger.warning("Outbox file %s no longer exists; dropping it", path)
+                    if not dry_run:
+                        self.outbox.drop(entry.file_path)
+            recorder.candidates = len(entries)
+            logger.info("Flushing %d outbox entries", len(files))
+            await self._run_pipeline(files, _Run("all", dry_run, stats))
+        return stats
 
-            existing = self.db.lookup(document.normalized_url)
-            action = self._determine_action(existing, mode=mode)
+    async def watch(
+        self,
+        *,
+        dry_run: bool = False,
+        catch_up: bool = True,
+        stop: asyncio.Event | None = None,
+        stats: SyncStats | None = None,
+    ) -> SyncStats:
+        """Sync files as they appear until ``stop`` is set.
+
+        Filesystem events are debounced per path and streamed into a long-lived
+        pipeline while the Reader/title clients and the database stay open.
+        """
+        stats = stats if stats is not None else SyncStats()
+        stop = stop or asyncio.Event()
+        loop = asyncio.get_running_loop()
+        debouncer = Debouncer(self.settings.watch_debounce)
+        watcher = DirectoryWatcher(
+            self.settings.watch_dir,
+            self.settings.patterns,
+            exclude=self.settings.exclude,
+            max_depth=self.settings.max_depth,
+            on_path=lambda path: loop.call_soon_threadsafe(debouncer.touch, path),
+        )
 
-            if action == "skip":
-                self.db.upsert(
-                    norm_url=document.normalized_url,
-                    source_url=document.original_url,
-                    title=existing.title if existing else document.local_title,
-                    title_source=existing.title_source if existing else "local",
-                    file_path=str(document.file.path),
-                    file_mtime=document.file.mtime,
-                    readwise_id=existing.readwise_id if existing else None,
-                    last_status=existing.last_status if existing else None,
-                    last_error=existing.last_error if existing else None,
-                )
-                stats.skipped += 1
-                return
+        async def _changed_files() -> AsyncIterator[FileMeta]:
+            while (path := await debouncer.get()) is not None:
+                try:
+                    file_meta = stat_file(path)
+                except OSError:
+                    logger.debug("Watch skip: %s vanished before processing", path)
+                    continue
+                if self._document_from_index(file_meta) is not None:
+                    # Already processed at this exact stat tuple (e.g. during catch-up).
+                    continue
+                logger.info("Detected %s", path)
+                yield file_meta
+
+        self.start_metrics(serve=True)
+        # Subscribe before catching up so files saved meanwhile are not missed.
+        watcher.start()
+        stopper = asyncio.create_task(stop.wait())
+        stopper.add_done_callback(lambda _: debouncer.close())
+        catching_up: asyncio.Task[SyncStats] | None = None
+        try:
+            if catch_up:
+                # Race the catch-up against stop so a signal interrupts a long first push;
+                # cancelling it finishes the run's journal as "interrupted" for push --resume.
+                catching_up = asyncio.create_task(self.push("new", dry_run=dry_run))
+                await asyncio.wait((catching_up, stopper), return_when=asyncio.FIRST_COMPLETED)
+                if not catching_up.done():
+                    catching_up.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await catching_up
+                    logger.info("Watch stopped during catch-up")
+                    return stats
+                caught = catching_up.result()
+                for key in (
+                    "created",
+                    "updated",
+                    "skipped",
+                    "failed",
+                    "linked",
+                    "retries",
+                    "backoff_seconds",
+                    "writes_skipped",
+                    "slimmed_bytes",
+                    "uploaded_bytes",
+                ):
+                    setattr(stats, key, getattr(stats, key) + getattr(caught, key))
+            await self._run_pipeline(_changed_files(), _Run("all", dry_run, stats))
+        finally:
+            watcher.stop()
+            stopper.cancel()
+            if catching_up is not None:
+                catching_up.cancel()
+        return stats
 
-            result = await self._execute_action(document, action=action, dry_run=dry_run, existing=existing)
-            self._update_stats(stats, result)
-
-    def _determine_action(self, existing, *, mode: _MODE) -> Literal["create", "update", "skip"]:
-        if existing is None or not existing.readwise_id:
-            return "create"
-        if mode == "new":
-            return "skip"
-        return "update"
-
-    async def _execute_action(self, document: PreparedDocument, *, action: Literal["create", "update"], dry_run: bool, existing) -> SyncResult:
-        if dry_run:
-            logger.info("[DRY-RUN] %s %s", action.upper(), document.file.path)
-            return SyncResult(action=action, status_code=None, readwise_id=existing.readwise_id if existing else None, error=None, document=document)
-
-        target_url = document.original_url if document.original_source != "synthetic" else ""
-        remote_title = await fetch_remote_title(
-            target_url or document.normalized_url,
-            timeout=self.settings.title_timeout,
-            client=self._title_client,
+    async def _run_pipeline(
+        self,
+        files: Iterable[FileMeta] | AsyncIterator[FileMeta],
+        run: _Run,
+        *,
+        journal: RunJournal | None = None,
+    ) -> int:
+        """Run files through prepare → title → upload → persist; return how many were fed."""
+        settings = self.settings
+        root = settings.watch_dir
+
+        def _job(meta: FileMeta) -> _Job:
+            job = _Job(file=meta)
+            if journal is not None:
+                job.seq = journal.assign(position(meta, root, add_time(meta) if run.ordered else None))
+            return job
+
+        async def _jobs() -> AsyncIterator[_Job]:
+            if isinstance(files, AsyncIterator):
+                async for meta in files:
+                    yield _job(meta)
+            else:
+                for meta in files:
+                    yield _job(meta)
+
+        recorder = self._recorder
+
+        def _handler(name: str, handler: Callable[[_Job], Awaitable[Any]]) -> Callable[[_Job], Awaitable[Any]]:
+            return recorder.metered(name, handler) if recorder is not None else handler
+
+        pipeline: Pipeline[_Job] = Pipeline(
+            [
+                Stage(
+                    "prepare",
+                    settings.prepare_concurrency,
+                    self.metrics.timed("prepare", _handler("prepare", functools.partial(self._stage_prepare, run))),
+                ),
+                Stage("title", settings.title_concurrency, _handler("title", functools.partial(self._stage_title, run))),
+                Stage(
+                    "upload", settings.upload_concurrency, _handler("upload", functools.partial(self._stage_upload, run))
+                ),
+                # A single persister keeps SQLite writes ordered on one connection.
+                Stage("persist", 1, _handler("persist", functools.partial(self._stage_persist, run))),
+            ],
+            queue_size=settings.queue_size,
+            on_done=(lambda job: journal.complete(job.seq)) if journal is not None else None,
+            # Failures are recorded in the outbox for retry and then complete like any other job.
+            on_error=functools.partial(self._record_error, run),
         )
-        payload_title = remote_title or document.local_title
-        payload = {
-            "url": document.original_url or document.normalized_url,
-            "html": document.html,
-            "should_clean_html": self.settings.should_clean_html,
-        }
-        if self.settings.default_category:
-            payload["category"] = self.settings.default_category
-        if payload_title:
-            payload["title"] = payload_title
-
-        if action == "create":
+        # One bulk read of each table up front; per-file lookups are then served from memory
+        # instead of queueing behind pending writes.
+        for cache in (self.documents, self.file_index, self.outbox, self._titles):
+            if not cache.loaded:
+                await asyncio.to_thread(cache.load)
+        run.stats.state_rows = len(self.documents)
+        run.stats.state_mib = self.documents.memory_bytes() / (1024 * 1024)
+        await self._preparer.start()
+        self.reader.reset_retry_budget()
+        retries, backoff = self.reader.retries, self.reader.backoff_seconds
+        sent = self.reader.bytes_sent
+        prepare_cpu = self._preparer.cpu_seconds
+        skipped_writes = self.documents.writes_skipped
+        checkpoints = asyncio.create_task(journal.autosave()) if journal is not None else None
+        self.start_metrics()
+        self._pipeline = pipeline
+        fed = 0
+        try:
+            fed = await pipeline.run(_jobs())
+            if checkpoints is not None and checkpoints.done():
+                # A checkpoint found rows that failed to commit; do not report the run as done.
+                checkpoints.result()
+            return fed
+        finally:
+            self._pipeline = None
+            if recorder is not None:
+                recorder.processed += fed
+                recorder.add_cpu("prepare", self._preparer.cpu_seconds - prepare_cpu)
+            if checkpoints is not None:
+                checkpoints.cancel()
+            run.stats.retries += self.reader.retries - retries
+            run.stats.backoff_seconds += self.reader.backoff_seconds - backoff
+            run.stats.uploaded_bytes += self.reader.bytes_sent - sent
+            run.stats.writes_skipped += self.documents.writes_skipped - skipped_writes
+            run.stats.save_rpm = self.reader.save_rpm
+            run.stats.update_rpm = self.reader.update_rpm
+            logger.debug("Effective Reader rates: save=%.1f/min update=%.1f/min", run.stats.save_rpm, run.stats.update_rpm)
+
+    async def _stage_prepare(self, run: _Run, job: _Job) -> _Job | None:
+        file_meta = job.file
+        # Unchanged files are decided from the index without touching their contents.
+        document = self._document_from_index(file_meta)
+        if document is None:
             try:
-                status, data, duration = await self.reader.save(payload)
+                document = await self._preparer.prepare(file_meta)
             except Exception as exc:  # noqa: BLE001
-                logger.error("Save failed for %s: %s", document.file.path, exc)
-                append_failure(self.settings.root, payload["url"], document.file.path.name)
-                self.db.upsert(
-                    norm_url=document.normalized_url,
-                    source_url=document.original_url,
-                    title=document.local_title,
-                    title_source="local" if document.local_title else "unknown",
-                    file_path=str(document.file.path),
-                    file_mtime=document.file.mtime,
-                    readwise_id=None,
-                    last_status=None,
-                    last_error=str(exc),
-                )
-                return SyncResult(action="create", status_code=None, readwise_id=None, error=str(exc), document=document)
-            logger.info("Saved %s status=%s duration=%.2fs", document.file.path, status, duration)
-            return self._handle_save_response(status, data, document, remote_title)
+                logger.exception("Failed to prepare document %s: %s", file_meta.path, exc)
+                if not run.dry_run:
+                    self.outbox.record(file_meta.path, action="prepare", error=str(exc), error_class="prepare")
+                run.stats.failed += 1
+                return None
+            self._index_document(document)
+        job.document = document
+
+        job.existing = self.documents.get(document.normalized_url)
+        if job.existing is None or not job.existing.readwise_id:
+            # Same bytes under another URL or filename: already in Reader, just re-link.
+            twin = self.documents.by_content(document.sha1)
+            if twin is not None:
+                self._link_copy(run, document, twin)
+                return None
+            if document.sha1 in run.claimed:
+                logger.info("Skipping %s: identical content is already being uploaded in this run", file_meta.path)
+                run.stats.skipped += 1
+                return None
+            run.claimed.add(document.sha1)
+            job.claimed = True
+        elif self.documents.is_alias(job.existing):
+            # Linked copies share the original's Reader document; only the original is updated.
+            self.outbox.resolve(file_meta.path, document.normalized_url)
+            run.stats.skipped += 1
+            return None
+        job.action = determine_action(job.existing, mode=run.mode)
+        if job.action == "skip":
+            self._persist_skip(document, job.existing)
+            self.outbox.resolve(file_meta.path, document.normalized_url)
+            run.stats.skipped += 1
+            return None
+
+        # Load content here so upload workers only ever wait on the network.
+        if job.action == "create" and not run.dry_run:
+            try:
+                await self._load_body(job)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Failed to read %s for upload: %s", file_meta.path, exc)
+                self._record_error(run, job, exc)
+                return None
+        return job
+
+    async def _load_body(self, job: _Job) -> None:
+        """Read the HTML to upload (if not already in memory) and slim it when enabled."""
+        document = job.document
+        if document.html is None:
+            document.html = await self._offload("prepare", read_html, document.file.path)
+        if self._slimmer is not None and job.slimmed is None:
+            job.slimmed = await self._offload("prepare", self._slimmer.slim, document.html)
+            document.html = job.slimmed.html
+
+    async def _stage_title(self, run: _Run, job: _Job) -> _Job:
+        if run.dry_run:
+            return job
+        document = job.document
+        # Synthetic https://local/doc/<sha1> URLs have no page to fetch.
+        if document.original_source != "synthetic":
+            started = time.perf_counter()
+            job.remote_title = await self._titles.resolve(document.normalized_url, document.original_url)
+            self._observe("title", time.perf_counter() - started)
+        return job
+
+    async def _stage_upload(self, run: _Run, job: _Job) -> _Job:
+        document = job.document
+        existing = job.existing
+        if run.dry_run:
+            logger.info("[DRY-RUN] %s %s", job.action.upper(), document.file.path)
+            job.result = SyncResult(
+                action=job.action,
+                status_code=None,
+                readwise_id=existing.readwise_id if existing else None,
+                error=None,
+                document=document,
+            )
+            return job
 
-        reader_id = existing.readwise_id if existing else None
-        if not reader_id:
+        if job.action == "update" and not (existing and existing.readwise_id):
             logger.warning("Missing readwise_id for %s, falling back to create", document.file.path)
-            return await self._execute_action(document, action="create", dry_run=dry_run, existing=None)
+            job.action = "create"
+            job.existing = existing = None
+            try:
+                await self._load_body(job)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Failed to read %s for upload: %s", document.file.path, exc)
+                job.error = str(exc)
+                job.error_class = "prepare"
+                return job
+
+        if job.action == "create":
+            payload_title = job.remote_title or document.local_title
+            payload = {
+                "url": document.original_url or document.normalized_url,
+                "html": document.html,
+                "should_clean_html": self.settings.should_clean_html,
+            }
+            if self.settings.default_category:
+                payload["category"] = self.settings.default_category
+            if payload_title:
+                payload["title"] = payload_title
+            try:
+                job.status, job.data, duration = await self.reader.save(payload)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Save failed for %s: %s", document.file.path, exc)
+                job.error = str(exc)
+                job.error_class = classify_error(getattr(exc, "status_code", None), exc)
+            else:
+                slimmed = ""
+                if job.slimmed is not None:
+                    run.stats.slimmed_bytes += job.slimmed.saved
+                    slimmed = f" slimmed {job.slimmed.bytes_before} -> {job.slimmed.bytes_after} bytes"
+                logger.info("Saved %s status=%s duration=%.2fs%s", document.file.path, job.status, duration, slimmed)
+            # The upload is done; drop the body so queued jobs don't pin it in memory.
+            document.html = None
+            return job
 
         update_payload = {}
-        if remote_title:
-            update_payload["title"] = remote_title
+        if job.remote_title:
+            update_payload["title"] = job.remote_title
         elif document.local_title and (existing.title or "") != document.local_title:
             update_payload["title"] = document.local_title
         if not update_payload:
             logger.info("No metadata changes for %s", document.file.path)
-            return SyncResult(action="skip", status_code=None, readwise_id=reader_id, error=None, document=document)
+            job.result = SyncResult(
+                action="skip", status_code=None, readwise_id=existing.readwise_id, error=None, document=document
+            )
+            return job
 
         try:
-            status, data = await self.reader.update(reader_id, update_payload)
+            job.status, job.data = await self.reader.update(existing.readwise_id, update_payload)
         except Exception as exc:  # noqa: BLE001
             logger.error("Update failed for %s: %s", document.file.path, exc)
-            append_failure(self.settings.root, document.original_url, document.file.path.name)
-            self.db.update_status(document.normalized_url, status=None, error=str(exc))
-            return SyncResult(action="update", status_code=None, readwise_id=reader_id, error=str(exc), document=document)
+            job.error = str(exc)
+            job.error_class = classify_error(getattr(exc, "status_code", None), exc)
+        else:
+            logger.info("Updated %s status=%s", document.file.path, job.status)
+        return job
+
+    async def _stage_persist(self, run: _Run, job: _Job) -> None:
+        if job.result is None:
+            job.result = self._record_response(job)
+        if not run.dry_run and not job.result.error:
+            self.outbox.resolve(job.document.file.path, job.document.normalized_url)
+        if not run.dry_run or job.result.error:
+            # A stored upload is found by content from now on; a failed one may be retried by any copy.
+            self._release(run, job)
+        self._update_stats(run.stats, job.result)
+        return None
+
+    def _release(self, run: _Run, job: _Job) -> None:
+        if job.claimed:
+            run.claimed.discard(job.document.sha1)
+            job.claimed = False
+
+    def _persist_skip(self, document: PreparedDocument, existing: DocumentState | None) -> None:
+        self.documents.upsert(
+            norm_url=document.normalized_url,
+            source_url=document.original_url,
+            title=existing.title if existing else document.local_title,
+            title_source=existing.title_source if existing else "local",
+            file_path=str(document.file.path),
+            file_mtime=document.file.mtime,
+            readwise_id=existing.readwise_id if existing else None,
+            last_status=existing.last_status if existing else None,
+            last_error=existing.last_error if existing else None,
+            # Keep the hash of what was uploaded; only rows synced before hashes
+            # were stored are backfilled from the file.
+            sha1=existing.sha1 if existing and existing.sha1 else document.sha1,
+        )
+
+    def _link_copy(self, run: _Run, document: PreparedDocument, twin: DocumentState) -> None:
+        run.stats.skipped += 1
+        run.stats.linked += 1
+        if run.dry_run:
+            logger.info("[DRY-RUN] LINK %s -> %s", document.file.path, twin.readwise_id)
+            return
+        logger.info(
+            "Linked %s to Reader document %s (same content as %s)",
+            document.file.path,
+            twin.readwise_id,
+            twin.file_path,
+        )
+        self.outbox.resolve(document.file.path, document.normalized_url)
+        self.documents.upsert(
+            norm_url=document.normalized_url,
+            source_url=document.original_url,
+            title=twin.title,
+            title_source=twin.title_source,
+            file_path=str(document.file.path),
+            file_mtime=document.file.mtime,
+            readwise_id=twin.readwise_id,
+            last_status=twin.last_status,
+            last_error=None,
+            sha1=document.sha1,
+        )
+
+    def _record_failure(
+        self,
+        document: PreparedDocument,
+        action: str,
+        error: str,
+        error_class: str,
+        *,
+        status: int | None = None,
+    ) -> None:
+        self.outbox.record(
+            document.file.path,
+            action=action,
+            error=error,
+            error_class=error_class,
+            status=status,
+            norm_url=document.normalized_url,
+            source_url=document.original_url,
+        )
 
-        logger.info("Updated %s status=%s", document.file.path, status)
-        return self._handle_update_response(status, data, document, reader_id, remote_title or document.local_title)
+    def _record_error(self, run: _Run, job: _Job, exc: Exception) -> None:
+        """Count a job whose stage raised as failed and queue its file for retry."""
+        run.stats.failed += 1
+        self._release(run, job)
+        if run.dry_run:
+            return
+        document = job.document
+        if document is None:
+            self.outbox.record(job.file.path, action="prepare", error=str(exc), error_class="prepare")
+        else:
+            self._record_failure(document, job.action, str(exc), classify_error(None, exc))
+
+    def _record_response(self, job: _Job) -> SyncResult:
+        document = job.document
+        if job.action == "create":
+            if job.error is not None:
+                self._record_failure(document, "create", job.error, job.error_class or "unknown")
+                self.documents.upsert(
+                    norm_url=document.normalized_url,
+                    source_url=document.original_url,
+                    title=document.local_title,
+                    title_source="local" if document.local_title else "unknown",
+                    file_path=str(document.file.path),
+                    file_mtime=document.file.mtime,
+                    readwise_id=None,
+                    last_status=None,
+                    last_error=job.error,
+                    sha1=document.sha1,
+                )
+                return SyncResult(action="create", status_code=None, readwise_id=None, error=job.error, document=document)
+            return self._handle_save_response(job.status, job.data, document, job.remote_title)
+
+        reader_id = job.existing.readwise_id
+        if job.error is not None:
+            self._record_failure(document, "update", job.error, job.error_class or "unknown")
+            self.documents.update_status(document.normalized_url, status=None, error=job.error)
+            return SyncResult(action="update", status_code=None, readwise_id=reader_id, error=job.error, document=document)
+        return self._handle_update_response(
+            job.status, job.data, document, reader_id, job.remote_title or document.local_title
+        )
 
     def _handle_save_response(self, status: int, data, document: PreparedDocument, remote_title: str | None) -> SyncResult:
         if status not in (200, 201):
             error = f"unexpected status {status}"
-            append_failure(self.settings.root, document.original_url, document.file.path.name)
-            self.db.update_status(document.normalized_url, status=status, error=error)
+            self._record_failure(document, "create", error, classify_error(status), status=status)
+            self.documents.update_status(document.normalized_url, status=status, error=error)
             return SyncResult(action="create", status_code=status, readwise_id=None, error=error, document=document)
 
         readwise_id = _extract_id(data)
         reader_title = _extract_title(data)
         title = remote_title or reader_title or document.local_title
         title_source = "online" if remote_title else "reader" if reader_title else "local" if document.local_title else "unknown"
-        self.db.upsert(
+        self.documents.upsert(
             norm_url=document.normalized_url,
             source_url=document.original_url,
             title=title,
@@ -275,19 +850,20 @@ class SyncService:
             readwise_id=readwise_id,
             last_status=status,
             last_error=None,
+            sha1=document.sha1,
         )
         return SyncResult(action="create" if status == 201 else "update", status_code=status, readwise_id=readwise_id, error=None, document=document)
 
     def _handle_update_response(self, status: int, data, document: PreparedDocument, reader_id: str, title: str | None) -> SyncResult:
         if status not in (200, 201, 204):
             error = f"unexpected status {status}"
-            append_failure(self.settings.root, document.original_url, document.file.path.name)
-            self.db.update_status(document.normalized_url, status=status, error=error)
+            self._record_failure(document, "update", error, classify_error(status), status=status)
+            self.documents.update_status(document.normalized_url, status=status, error=error)
             return SyncResult(action="update", status_code=status, readwise_id=reader_id, error=error, document=document)
         reader_title = _extract_title(data)
         final_title = reader_title or title or document.local_title
         title_source = "reader" if reader_title else "online" if title and title == reader_title else "local" if document.local_title else "unknown"
-        self.db.upsert(
+        self.documents.upsert(
             norm_url=document.normalized_url,
             source_url=document.original_url,
             title=final_title,
@@ -297,6 +873,7 @@ class SyncService:
             readwise_id=reader_id,
             last_status=status,
             last_error=None,
+            sha1=document.sha1,
         )
         return SyncResult(action="update", status_code=status, readwise_id=reader_id, error=None, document=document)
 
@@ -311,35 +888,77 @@ class SyncService:
         else:
             stats.skipped += 1
 
-    def _prepare_document(self, file_meta: FileMeta) -> PreparedDocument:
-        html = read_html(file_meta.path)
-        sha1 = compute_sha1(html)
-        # Prefer explicit URL embedded in filename per agreed convention.
-        inferred = infer_from_filename(file_meta.path.name)
-        if inferred:
-            inferred_url, source = inferred
-            primary_url = inferred_url
-        else:
-            # Fall back to HTML-based signals
-            candidate_url, source = choose_url_from_html(html)
-            primary_url = tidy_extracted_url(candidate_url)
-
-        if not primary_url:
-            primary_url = synthetic_url(sha1)
-            source = "synthetic"
-
-        norm_url = normalize_url(primary_url, self.settings.keep_params, self.settings.drop_params)
-        local_title = extract_local_title(html)
+    def _document_from_index(self, file_meta: FileMeta) -> PreparedDocument | None:
+        if not self.file_index.loaded:
+            self.file_index.load()
+        entry = self.file_index.get(str(file_meta.path))
+        if entry is None or not entry.matches(file_meta):
+            return None
+        # Re-normalize so url_norm changes apply without invalidating the index.
+        norm_url = normalize_url(entry.source_url, self.settings.keep_params, self.settings.drop_params)
         return PreparedDocument(
             file=file_meta,
-            html=html,
-            original_url=primary_url,
-            original_source=source,
+            html=None,
+            original_url=entry.source_url,
+            original_source=entry.url_source,
             normalized_url=norm_url,
-            sha1=sha1,
-            local_title=local_title,
+            sha1=entry.sha1,
+            local_title=entry.local_title,
+        )
+
+    def _index_document(self, document: PreparedDocument) -> None:
+        meta = document.file
+        self.file_index.upsert(
+            FileIndexEntry(
+                path=str(meta.path),
+                size=meta.size,
+                mtime=meta.mtime,
+                inode=meta.inode,
+                sha1=document.sha1,
+                norm_url=document.normalized_url,
+                source_url=document.original_url,
+                url_source=document.original_source,
+                local_title=document.local_title,
+            )
         )
 
+    def _prepare_document(self, file_meta: FileMeta) -> PreparedDocument:
+        return prepare_document(file_meta, self.settings.keep_params, self.settings.drop_params)
+
+
+def add_time(meta: FileMeta) -> float:
+    """When a file entered the inbox: birth time where the platform has it, else mtime."""
+    return meta.birthtime if meta.birthtime is not None else meta.mtime
+
+
+def push_window(db: Database, mode: PushMode, since: float | None) -> tuple[float | None, float | None]:
+    """(exclusive start, inclusive end) of the add-time window a push covers."""
+    # Incremental windowing for --new: if no --since provided, start from last watermark.
+    window_start: float | None = since
+    window_end: float | None = None
+    if mode == "new" and since is None:
+        raw = db.get_meta("last_push_new_end_ts")
+        try:
+            window_start = float(raw) if raw is not None else None
+        except (TypeError, ValueError):
+            window_start = None
+        # Bound upper window at collection time to avoid racing with concurrently-added files
+        window_end = time.time()
+    return window_start, window_end
+
+
+def in_window(meta: FileMeta, start: float | None, end: float | None) -> bool:
+    added = add_time(meta)
+    return (start is None or added > start) and (end is None or added <= end)
+
+
+def determine_action(existing: DocumentState | None, *, mode: PushMode) -> Literal["create", "update", "skip"]:
+    if existing is None or not existing.readwise_id:
+        return "create"
+    if mode == "new":
+        return "skip"
+    return "update"
+
 
 def _extract_id(data) -> str | None:
     if isinstance(data, dict):
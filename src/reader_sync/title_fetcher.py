@@ -1,14 +1,139 @@
 from __future__ import annotations
 
+import asyncio
+import codecs
+import html
 import logging
+import re
+import time
+from dataclasses import dataclass
+from urllib.parse import urlsplit
 
 import httpx
-from bs4 import BeautifulSoup
+
+from .database import Database
+from .models import HostBreaker, RemoteTitle
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MAX_BYTES = 256 * 1024
+_HTML_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+_TITLE_END_RE = re.compile(rb"</title\s*>", re.I)
+_TITLE_RE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.I | re.S)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([A-Za-z0-9._:-]+)", re.I)
+
+
+@dataclass(slots=True)
+class TitleFetch:
+    """Result of one (possibly conditional) title request."""
+
+    title: str | None
+    status: int | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    error: str | None = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
 
-async def fetch_remote_title(url: str, *, timeout: float = 3.0, client: httpx.AsyncClient | None = None) -> str | None:
+    @property
+    def host_failure(self) -> bool:
+        """Whether the outcome suggests the host is down, slow or throttling us."""
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+async def fetch_title(
+    url: str,
+    *,
+    client: httpx.AsyncClient,
+    timeout: float = 3.0,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    etag: str | None = None,
+    last_modified: str | None = None,
+) -> TitleFetch:
+    """Stream ``url`` just far enough to read its <title>.
+
+    The body is read until ``</title>`` appears or ``max_bytes`` have
+    arrived, non-HTML responses are dropped before reading, and ``timeout``
+    bounds the whole exchange. Validators make the request conditional.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        async with asyncio.timeout(timeout):
+            async with client.stream("GET", url, timeout=timeout, headers=headers) as response:
+                validators = dict(
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
+                if response.status_code == 304:
+                    return TitleFetch(title=None, status=304, **validators)
+                if response.is_error:
+                    return TitleFetch(
+                        title=None,
+                        status=response.status_code,
+                        error=f"HTTP {response.status_code}",
+                        **validators,
+                    )
+                content_type = response.headers.get("Content-Type", "")
+                mime = content_type.split(";", 1)[0].strip().lower()
+                if mime and mime not in _HTML_TYPES:
+                    return TitleFetch(title=None, status=response.status_code, error=f"not HTML: {mime}", **validators)
+                body, complete = await _read_head(response, max_bytes)
+                encoding = response.charset_encoding
+    except (httpx.HTTPError, httpx.TimeoutException, TimeoutError) as exc:
+        logger.debug("Title fetch failed for %s: %r", url, exc)
+        return TitleFetch(title=None, error=str(exc) or exc.__class__.__name__)
+
+    title = None
+    if complete or _TITLE_END_RE.search(body):
+        text = body.decode(_pick_encoding(encoding, body), errors="replace")
+        match = _TITLE_RE.search(text)
+        title = html.unescape(match.group(1)).strip() if match else None
+    return TitleFetch(title=title, status=response.status_code, **validators)
+
+
+async def _read_head(response: httpx.Response, max_bytes: int) -> tuple[bytes, bool]:
+    """Return (bytes read, whether the whole body was read)."""
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes():
+        # Re-scan a little of the previous tail in case the tag straddles chunks.
+        start = max(0, len(buffer) - 8)
+        buffer.extend(chunk)
+        if _TITLE_END_RE.search(buffer, start) or len(buffer) >= max_bytes:
+            return bytes(buffer[:max_bytes]), False
+    return bytes(buffer), True
+
+
+def _pick_encoding(declared: str | None, body: bytes) -> str:
+    candidates = [declared]
+    match = _META_CHARSET_RE.search(body)
+    if match:
+        candidates.append(match.group(1).decode("ascii", errors="ignore"))
+    for name in candidates:
+        if not name:
+            continue
+        try:
+            info = codecs.lookup(name)
+        except LookupError:
+            continue
+        # hex, base64, rot13 and friends are codecs too, but not text encodings.
+        if info._is_text_encoding:
+            return info.name
+    return "utf-8"
+
+
+async def fetch_remote_title(
+    url: str,
+    *,
+    timeout: float = 3.0,
+    client: httpx.AsyncClient | None = None,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+) -> str | None:
     if not url:
         return None
     owns_client = client is None
@@ -18,20 +143,169 @@ async def fetch_remote_title(url: str, *, timeout: float = 3.0, client: httpx.As
         limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
     )
     try:
-        response = await http_client.get(url, timeout=timeout)
-        response.raise_for_status()
-    except (httpx.HTTPError, httpx.TimeoutException) as exc:
-        logger.debug("Title fetch failed for %s: %s", url, exc)
-        if owns_client:
-            await http_client.aclose()
-        return None
-    else:
-        soup = BeautifulSoup(response.text, "lxml")
-        tag = soup.find("title")
-        title = tag.get_text(strip=True) if tag else None
+        result = await fetch_title(url, client=http_client, timeout=timeout, max_bytes=max_bytes)
+    finally:
         if owns_client:
             await http_client.aclose()
-        return title or None
+    return result.title
+
+
+def cache_is_fresh(cached: RemoteTitle, now: float, *, ttl: float, negative_ttl: float) -> bool:
+    """Whether a cached title (or remembered failure) can be used without a request."""
+    if cached.failures:
+        return now - cached.checked_at < negative_ttl
+    return bool(cached.title) and cached.fetched_at is not None and now - cached.fetched_at < ttl
+
+
+class TitleResolver:
+    """Remote title lookup backed by the ``remote_titles`` cache table.
+
+    Titles younger than ``ttl`` seconds are served without any request, and
+    failures are remembered for ``negative_ttl`` seconds. Stale entries are
+    revalidated with ``If-None-Match``/``If-Modified-Since``; if revalidation
+    fails the stale title is still returned.
+
+    At most ``per_host`` fetches run against one host at a time. After
+    ``breaker_threshold`` consecutive timeouts, connection errors, 429s or
+    5xx responses a host's breaker opens for ``breaker_cooldown`` seconds,
+    during which lookups return immediately so callers use local titles.
+    Breaker state lives in the ``host_breakers`` table and survives runs.
+
+    :meth:`load` reads the whole title cache into memory so lookups do not
+    wait behind queued database writes; without it the table is loaded on
+    first use.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        client: httpx.AsyncClient,
+        *,
+        timeout: float,
+        ttl: float,
+        negative_ttl: float,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        per_host: int = 2,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 1800.0,
+    ) -> None:
+        self.db = db
+        self.client = client
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.per_host = max(1, per_host)
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.breaker_cooldown = breaker_cooldown
+        self._host_slots: dict[str, asyncio.Semaphore] = {}
+        self._breakers: dict[str, HostBreaker] = {}
+        self._cache: dict[str, RemoteTitle] = {}
+        self.loaded = False
+
+    def load(self) -> int:
+        self._cache = self.db.all_remote_titles()
+        self.loaded = True
+        return len(self._cache)
+
+    def _store(self, entry: RemoteTitle) -> None:
+        self._cache[entry.norm_url] = entry
+        self.db.upsert_remote_title(entry)
+
+    async def resolve(self, norm_url: str, url: str) -> str | None:
+        if not url:
+            return None
+        if not self.loaded:
+            self.load()
+        now = time.time()
+        cached = self._cache.get(norm_url)
+        if cached is not None and cache_is_fresh(cached, now, ttl=self.ttl, negative_ttl=self.negative_ttl):
+            return cached.title
+
+        stale = cached.title if cached else None
+        host = (urlsplit(url).hostname or "").lower()
+        breaker = await self._breaker(host)
+        if breaker.is_open(now):
+            return stale
+        revalidate = cached is not None and bool(cached.title)
+        slot = self._host_slots.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with slot:
+            # The breaker may have opened while we queued behind other fetches to this host.
+            if breaker.is_open(time.time()):
+                return stale
+            result = await fetch_title(
+                url,
+                client=self.client,
+                timeout=self.timeout,
+                max_bytes=self.max_bytes,
+                etag=cached.etag if revalidate else None,
+                last_modified=cached.last_modified if revalidate else None,
+            )
+        self._record_outcome(breaker, result)
+        if result.not_modified and revalidate:
+            self._store(
+                RemoteTitle(
+                    norm_url=norm_url,
+                    title=cached.title,
+                    etag=result.etag or cached.etag,
+                    last_modified=result.last_modified or cached.last_modified,
+                    fetched_at=now,
+                    checked_at=now,
+                )
+            )
+            return cached.title
+        if result.title:
+            self._store(
+                RemoteTitle(
+                    norm_url=norm_url,
+                    title=result.title,
+                    etag=result.etag,
+                    last_modified=result.last_modified,
+                    fetched_at=now,
+                    checked_at=now,
+                )
+            )
+            return result.title
+
+        self._store(
+            RemoteTitle(
+                norm_url=norm_url,
+                title=stale,
+                etag=cached.etag if cached else None,
+                last_modified=cached.last_modified if cached else None,
+                fetched_at=cached.fetched_at if cached else None,
+                checked_at=now,
+                failures=(cached.failures if cached else 0) + 1,
+                last_error=result.error or "no title",
+            )
+        )
+        return stale
+
+    async def _breaker(self, host: str) -> HostBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            stored = await self.db.lookup_host_breaker_async(host)
+            # Another lookup for the host may have finished while this one waited.
+            breaker = self._breakers.setdefault(host, stored or HostBreaker(host=host))
+        return breaker
+
+    def _record_outcome(self, breaker: HostBreaker, result: TitleFetch) -> None:
+        if not result.host_failure:
+            if breaker.failures or breaker.opened_until is not None:
+                breaker.failures = 0
+                breaker.opened_until = None
+                self.db.upsert_host_breaker(breaker)
+            return
+        breaker.failures += 1
+        if breaker.failures >= self.breaker_threshold:
+            breaker.opened_until = time.time() + self.breaker_cooldown
+            logger.warning(
+                "Title fetches to %s failed %d times in a row; skipping host for %.0fs",
+                breaker.host,
+                breaker.failures,
+                self.breaker_cooldown,
+            )
+        self.db.upsert_host_breaker(breaker)
 
 
-__all__ = ["fetch_remote_title"]
+__all__ = ["TitleFetch", "TitleResolver", "cache_is_fresh", "fetch_remote_title", "fetch_title"]
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .filesystem import is_candidate
+
+logger = logging.getLogger(__name__)
+
+
+class Debouncer:
+    """Coalesce bursts of events per path into one emission after a quiet period.
+
+    ``touch`` must be called from the event loop thread; ``get`` returns paths
+    whose last event is at least ``delay`` seconds old, or ``None`` once closed.
+    """
+
+    def __init__(self, delay: float) -> None:
+        self.delay = max(0.0, delay)
+        self._pending: dict[Path, asyncio.TimerHandle] = {}
+        self._ready: asyncio.Queue[Path | None] = asyncio.Queue()
+
+    def touch(self, path: Path) -> None:
+        handle = self._pending.pop(path, None)
+        if handle is not None:
+            handle.cancel()
+        loop = asyncio.get_running_loop()
+        self._pending[path] = loop.call_later(self.delay, self._fire, path)
+
+    def _fire(self, path: Path) -> None:
+        self._pending.pop(path, None)
+        self._ready.put_nowait(path)
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def get(self) -> Path | None:
+        return await self._ready.get()
+
+    def close(self) -> None:
+        for handle in self._pending.values():
+            handle.cancel()
+        self._pending.clear()
+        self._ready.put_nowait(None)
+
+
+class DirectoryWatcher:
+    """Forward filesystem events for candidate files under ``root`` to a callback.
+
+    Backed by ``watchdog`` (inotify on Linux, FSEvents on macOS), so idle cost
+    is a blocked observer thread. ``on_path`` is invoked from that thread.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        patterns: Iterable[str],
+        *,
+        on_path: Callable[[Path], None],
+        exclude: Iterable[str] = (),
+        max_depth: int | None = None,
+    ) -> None:
+        self.root = root
+        self.patterns = tuple(patterns)
+        self.exclude = tuple(exclude)
+        self.max_depth = max_depth
+        self._on_path = on_path
+        self._observer = None
+
+    def start(self) -> None:
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError as exc:
+            raise RuntimeError(
+                "watchdog is required for `rw-sync watch`; install it with `pip install 'reader-sync[watch]'`"
+            ) from exc
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_created(self, event) -> None:
+                watcher._dispatch(event.src_path, event.is_directory)
+
+            def on_modified(self, event) -> None:
+                watcher._dispatch(event.src_path, event.is_directory)
+
+            def on_moved(self, event) -> None:
+                watcher._dispatch(event.dest_path, event.is_directory)
+
+        observer = Observer()
+        observer.schedule(_Handler(), str(self.root), recursive=True)
+        observer.daemon = True
+        observer.start()
+        self._observer = observer
+        logger.info("Watching %s for %s", self.root, ", ".join(self.patterns))
+
+    def stop(self) -> None:
+        if self._observer is None:
+            return
+        self._observer.stop()
+        self._observer.join(timeout=5)
+        self._observer = None
+
+    def _dispatch(self, raw_path: str | bytes, is_directory: bool) -> None:
+        if is_directory:
+            return
+        path = Path(raw_path.decode() if isinstance(raw_path, bytes) else raw_path)
+        if is_candidate(path, self.root, self.patterns, exclude=self.exclude, max_depth=self.max_depth):
+            self._on_path(path)
+
+
+__all__ = ["Debouncer", "DirectoryWatcher"]
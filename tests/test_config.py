@@ -31,3 +31,22 @@ network:
     assert settings.watch_dir == (cfg.parent / "html").resolve()
     assert settings.concurrency == 3
     assert settings.token == "token123"
+
+
+def test_load_settings_slim_rules(tmp_path: Path) -> None:
+    cfg = tmp_path / ".rw-sync.yaml"
+    cfg.write_text("slim:\n  enabled: true\n  elements: [script, SVG]\n  max_data_uri_bytes: 100\n", encoding="utf-8")
+    settings = load_settings(cfg)
+    assert settings.slim_html is True
+    assert settings.slim_elements == {"script": 0, "svg": 0}
+    assert settings.slim_max_data_uri == 100
+    assert load_settings(None).slim_elements["style"] == 0
+
+
+def test_reader_base_url_from_config_and_env(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.delenv("RW_SYNC_READER_URL", raising=False)
+    cfg = tmp_path / ".rw-sync.yaml"
+    cfg.write_text("readwise:\n  base_url: http://127.0.0.1:8787/\n", encoding="utf-8")
+    assert load_settings(cfg).reader_base_url == "http://127.0.0.1:8787"
+    monkeypatch.setenv("RW_SYNC_READER_URL", "http://localhost:9000")
+    assert load_settings(cfg).reader_base_url == "http://localhost:9000"
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from reader_sync.database import Database
+from reader_sync.models import FileIndexEntry, FileMeta
+
+
+def _entry(**overrides) -> FileIndexEntry:
+    values = dict(
+        path="/inbox/a.html",
+        size=10,
+        mtime=1700000000.123456,
+        inode=42,
+        sha1="abc",
+        norm_url="https://example.com/a",
+        source_url="https://example.com/a?utm_source=x",
+        url_source="canonical",
+        local_title="A",
+    )
+    values.update(overrides)
+    return FileIndexEntry(**values)
+
+
+def test_file_index_roundtrip(tmp_path: Path) -> None:
+    db = Database(tmp_path / "state.db")
+    db.upsert_file(_entry())
+    db.upsert_file(_entry(size=11, local_title="B"))
+    stored = db.lookup_file("/inbox/a.html")
+    db.close()
+    assert stored == _entry(size=11, local_title="B")
+
+
+def test_file_index_entry_matches_stat_tuple() -> None:
+    entry = _entry()
+    meta = FileMeta(path=Path(entry.path), mtime=entry.mtime, size=entry.size, inode=42)
+    assert entry.matches(meta)
+    meta.inode = 43
+    assert not entry.matches(meta)
+    meta.inode = None
+    assert entry.matches(meta)
+    meta.size = 12
+    assert not entry.matches(meta)
+
+
+def test_writes_are_batched_until_flush(tmp_path: Path) -> None:
+    path = tmp_path / "state.db"
+    db = Database(path, batch_size=1000, batch_interval=60)
+    db.set_meta("k", "v")
+    assert db.get_meta("k") == "v"
+    other = sqlite3.connect(path)
+    assert other.execute("SELECT value FROM meta WHERE key = 'k'").fetchone() is None
+    db.flush().result(timeout=5)
+    assert other.execute("SELECT value FROM meta WHERE key = 'k'").fetchone() == ("v",)
+    other.close()
+    db.close()
+
+
+def test_flush_raises_the_first_failed_write_once(tmp_path: Path) -> None:
+    db = Database(tmp_path / "state.db", batch_size=1000, batch_interval=60)
+    db.set_meta("k", "v")
+    db._write("INSERT INTO missing_table VALUES (?)", (1,))
+    with pytest.raises(sqlite3.OperationalError):
+        db.flush().result(timeout=5)
+    # Statements around the failed one still commit, and the error is reported only once.
+    assert db.get_meta("k") == "v"
+    db.flush().result(timeout=5)
+    db.close()
+
+
+def test_batch_size_commits_without_flush(tmp_path: Path) -> None:
+    path = tmp_path / "state.db"
+    db = Database(path, batch_size=2, batch_interval=60)
+    db.set_meta("a", "1")
+    db.set_meta("b", "2")
+    db.get_meta("b")  # round-trip through the writer so the batch has been handled
+    other = sqlite3.connect(path)
+    assert other.execute("SELECT COUNT(*) FROM meta").fetchone() == (2,)
+    other.close()
+    db.close()
+
+
+def test_documents_gain_sha1_column_and_keep_known_hashes(tmp_path: Path) -> None:
+    path = tmp_path / "state.db"
+    legacy = sqlite3.connect(path)
+    legacy.execute(
+        "CREATE TABLE documents (id INTEGER PRIMARY KEY, norm_url TEXT NOT NULL UNIQUE, source_url TEXT, "
+        "title TEXT, title_source TEXT, file_path TEXT, file_mtime REAL, readwise_id TEXT, "
+        "last_status INTEGER, last_error TEXT, created_at TEXT, updated_at TEXT)"
+    )
+    legacy.commit()
+    legacy.close()
+
+    db = Database(path)
+    common = dict(title=None, title_source="local", file_path="/a.html", file_mtime=1.0, last_status=201, last_error=None)
+    db.upsert(norm_url="https://a", source_url="https://a", readwise_id=None, sha1="abc", **common)
+    db.upsert(norm_url="https://b", source_url="https://b", readwise_id="rw-1", sha1="abc", **common)
+    db.upsert(norm_url="https://b", source_url="https://b", readwise_id=None, sha1=None, **common)
+    stored = db.lookup("https://b")
+    db.close()
+    assert stored is not None and stored.readwise_id == "rw-1" and stored.sha1 == "abc"
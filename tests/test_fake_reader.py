@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+
+from reader_sync.fake_reader import FakeOriginServer, FakeReaderServer, Faults, Latency
+from reader_sync.readwise_client import ReaderClient
+
+
+def _client(server: FakeReaderServer, **kwargs) -> ReaderClient:
+    options = dict(rpm_save=600, rpm_update=600, concurrency=2, backoff_base=0.001, backoff_cap=0.01)
+    options.update(kwargs)
+    return ReaderClient("token", base_url=server.url, **options)
+
+
+def test_fake_reader_saves_updates_and_checks_auth() -> None:
+    async def _run(client: ReaderClient):
+        try:
+            authed = await client.auth_check()
+            created = await client.save({"url": "https://e.com/a", "html": "<p>x</p>", "title": "A"})
+            again = await client.save({"url": "https://e.com/a", "html": "<p>x</p>"})
+            updated = await client.update(created[1]["id"], {"title": "B"})
+            missing = await client.update("nope", {"title": "C"})
+            return authed, created, again, updated, missing
+        finally:
+            await client.close()
+
+    with FakeReaderServer() as server:
+        authed, created, again, updated, missing = asyncio.run(_run(_client(server, gzip_min_bytes=0)))
+        assert httpx.get(server.url + "/api/v2/auth/").status_code == 401
+    assert authed is True
+    assert created[0] == 201 and again[0] == 200 and again[1]["id"] == created[1]["id"]
+    assert updated == (200, {"id": created[1]["id"], "url": "https://e.com/a", "title": "B"})
+    assert missing[0] == 404
+    assert server.stats.requests == {"auth": 1, "save": 2, "update": 2}
+
+
+def test_fake_reader_rate_limit_and_bursts_are_retried() -> None:
+    faults = Faults(rpm=2, window=0.3, burst_every=3, burst_length=1)
+
+    async def _run(client: ReaderClient):
+        try:
+            return [await client.save({"url": f"https://e.com/{i}"}) for i in range(4)]
+        finally:
+            await client.close()
+
+    with FakeReaderServer(faults, seed=1) as server:
+        client = _client(server, max_retries=10, retry_budget=50)
+        results = asyncio.run(_run(client))
+    assert [status for status, _, _ in results] == [201] * 4
+    assert server.stats.statuses[429] >= 1 and server.stats.statuses[503] >= 1
+    assert client.retries == server.stats.statuses[429] + server.stats.statuses[503]
+
+
+def test_fake_origin_serves_titles_with_etags() -> None:
+    with FakeOriginServer(Faults(latency=Latency.parse("uniform:0:0.01")), page_bytes=4096) as origin:
+        first = httpx.get(origin.url + "/post/1?x=1")
+        cached = httpx.get(origin.url + "/post/1", headers={"If-None-Match": first.headers["ETag"]})
+    assert "<title>Origin /post/1</title>" in first.text and len(first.content) >= 3000
+    assert cached.status_code == 304
+    assert Latency.parse("lognormal:0.2:0.5").kind == "lognormal"
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from reader_sync.filesystem import discover_files
+
+
+def _touch(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("<html></html>", encoding="utf-8")
+
+
+def test_discover_files_single_walk(tmp_path: Path) -> None:
+    for rel in ("a.html", "b.htm", "notes.txt", "sub/c.html", "sub/deep/d.html", "skip/e.html", "sub/tmp.html"):
+        _touch(tmp_path / rel)
+
+    found = discover_files(tmp_path, ("*.html", "*.htm"), exclude=("skip", "sub/tmp.html"))
+    rels = [meta.path.relative_to(tmp_path).as_posix() for meta in found]
+    assert rels == ["a.html", "b.htm", "sub/c.html", "sub/deep/d.html"]
+
+    shallow = discover_files(tmp_path, ("*.html",), max_depth=1)
+    assert [meta.path.name for meta in shallow] == ["a.html", "e.html", "c.html", "tmp.html"]
+
+
+def test_discover_files_missing_root(tmp_path: Path) -> None:
+    assert list(discover_files(tmp_path / "missing", ("*.html",))) == []
+
+
+def test_hash_and_body_follow_on_disk_bytes(tmp_path: Path) -> None:
+    import hashlib
+
+    from reader_sync.filesystem import read_head, read_html
+
+    raw = b"<html>\r\n<head><title>Caf\xc3\xa9</title></head>\r\n\xff</html>"
+    path = tmp_path / "crlf.html"
+    path.write_bytes(raw)
+    assert read_head(path, 1 << 20) == (raw, hashlib.sha1(raw).hexdigest(), True)
+    assert read_head(path, 6) == (raw[:6], hashlib.sha1(raw).hexdigest(), False)
+    assert read_html(path) == "<html>\r\n<head><title>Café</title></head>\r\n</html>"
+
+    empty = tmp_path / "empty.html"
+    empty.write_bytes(b"")
+    assert read_head(empty, 1 << 20) == (b"", hashlib.sha1(b"").hexdigest(), True)
+    assert read_html(empty) == ""
@@ -3,6 +3,7 @@ from __future__ import annotations
 from reader_sync.html_utils import (
     choose_url_from_html,
     extract_local_title,
+    extract_metadata,
     infer_from_filename,
     normalize_url,
     synthetic_url,
@@ -56,3 +57,43 @@ def test_tidy_extracted_url_handles_www() -> None:
 
 def test_tidy_extracted_url_rejects_relative() -> None:
     assert tidy_extracted_url("/about") is None
+
+
+def test_extract_metadata_matches_legacy_functions() -> None:
+    meta = extract_metadata(HTML_SAMPLE)
+    assert meta.best_url() == choose_url_from_html(HTML_SAMPLE)
+    assert meta.title == extract_local_title(HTML_SAMPLE)
+    assert meta.og_url == "https://example.com/articles?id=123"
+
+
+def test_extract_metadata_singlefile_and_raw_canonical() -> None:
+    html = (
+        "<!-- saved from url=https://example.org/saved -->\n"
+        "<html><head><title> A &amp; B </title>"
+        "<link rel='canonical' href='https://example.org/x?id=1&amp;p=2'></head>"
+        "<body><svg><title>ignored</title></svg></body></html>"
+    )
+    meta = extract_metadata(html)
+    assert meta.singlefile == "https://example.org/saved"
+    assert meta.canonical == choose_url_from_html(html)[0]
+    assert meta.title == "A & B"
+
+
+def test_extract_metadata_stops_at_head_and_falls_back_when_unbounded() -> None:
+    body_only = "<html><head><title>Head</title></head><body>" + "<p>x</p>" * 1000 + "</body></html>"
+    assert extract_metadata(body_only).title == "Head"
+
+    no_head_end = "<html><head><style>" + "a{}" * 100 + "</style><meta property='og:url' content='https://e.com/o'><title>Late</title>"
+    meta = extract_metadata(no_head_end, head_limit=64)
+    assert meta.best_url() == ("https://e.com/o", "og:url")
+    assert meta.title == "Late"
+
+
+def test_extract_metadata_reads_raw_bytes() -> None:
+    # A multi-byte character split across scan chunks must still decode.
+    head = "<html><head><title>" + "é" * 5000 + "</title>"
+    html = head + '<link rel="canonical" href="https://example.com/raw"></head><body>' + "x" * 100 + "</body></html>"
+    assert extract_metadata(html.encode("utf-8")) == extract_metadata(html)
+
+    no_head_end = b'<html><title>T</title><link rel="canonical" href="https://example.com/late">' + b"x" * 128
+    assert extract_metadata(no_head_end, head_limit=64).canonical == "https://example.com/late"
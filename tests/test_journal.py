@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from reader_sync.config import load_settings
+from reader_sync.database import Database
+from reader_sync.filesystem import discover_files
+from reader_sync.journal import RunJournal, is_after, position, walk_order
+from reader_sync.sync import SyncService
+
+
+def test_walk_order_matches_discovery(tmp_path: Path) -> None:
+    for rel in ("b.html", "a/z.html", "a/b/c.html", "a/a.html", "c.html", "0/x.html"):
+        path = tmp_path / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x", encoding="utf-8")
+    walked = [m.path.relative_to(tmp_path).as_posix() for m in discover_files(tmp_path, ["*.html"])]
+    assert walked == sorted(walked, key=walk_order)
+
+
+def test_checkpoint_is_contiguous_and_watermark_respects_ties(tmp_path: Path) -> None:
+    db = Database(tmp_path / "state.db")
+    marks: list[float] = []
+    journal = RunJournal.start(db, "new", {}, add_times=[1.0, 2.0, 2.0, 3.0], on_mark=marks.append)
+    seqs = [journal.assign({"t": t, "rel": f"{i}.html"}) for i, t in enumerate([1.0, 2.0, 2.0, 3.0])]
+
+    journal.complete(seqs[1])
+    assert journal.done == 0 and not journal.save()
+    journal.complete(seqs[0])
+    journal.complete(seqs[3])
+    assert journal.done == 2 and journal.save()
+    # File 2 shares add time 2.0 with a finished file, so the watermark may only reach 1.0.
+    assert marks == [1.0]
+    assert journal.record.checkpoint == {"t": 2.0, "rel": "1.html"}
+
+    journal.complete(seqs[2])
+    journal.finish("completed")
+    assert marks == [1.0, 3.0]
+    stored = db.latest_run()
+    db.close()
+    assert stored.status == "completed" and stored.done == 4 and stored.finished_at is not None
+
+
+def test_push_resume_continues_after_checkpoint(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("READWISE_TOKEN", "token123")
+    monkeypatch.delenv("RW_SYNC_WATCH_DIR", raising=False)
+    monkeypatch.delenv("RW_SYNC_DB_PATH", raising=False)
+    cfg = tmp_path / ".rw-sync.yaml"
+    cfg.write_text("{}", encoding="utf-8")
+    settings = load_settings(cfg)
+    settings.watch_dir.mkdir(parents=True)
+    for idx in range(4):
+        html = f'<html><head><title>T{idx}</title><link rel="canonical" href="https://example.com/{idx}"/></head></html>'
+        (settings.watch_dir / f"{idx}.html").write_text(html, encoding="utf-8")
+    service = SyncService(settings)
+    saved: list[str] = []
+
+    async def fake_save(payload):
+        saved.append(payload["url"])
+        return 201, {"id": payload["url"]}, 0.0
+
+    async def no_title(norm_url, url):
+        return None
+
+    monkeypatch.setattr(service.reader, "save", fake_save)
+    monkeypatch.setattr(service._titles, "resolve", no_title)
+
+    # A run that was killed after the first two files were checkpointed.
+    files = list(discover_files(settings.watch_dir, settings.patterns))
+    journal = RunJournal.start(service.db, "all", dict(since=None, max_items=None, window_start=None, window_end=None))
+    for meta in files[:2]:
+        journal.complete(journal.assign(position(meta, settings.watch_dir, None)))
+    journal.save()
+
+    async def _run():
+        try:
+            return await service.push("all", resume=True)
+        finally:
+            await service.close()
+
+    stats = asyncio.run(_run())
+    assert stats.run_id == journal.run_id
+    assert sorted(saved) == ["https://example.com/2", "https://example.com/3"]
+    assert is_after(position(files[3], settings.watch_dir, None), position(files[2], settings.watch_dir, None))
+    db = Database(settings.db_path)
+    run = db.latest_run()
+    db.close()
+    assert run.status == "completed" and run.done == 4
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import urllib.request
+from pathlib import Path
+
+from reader_sync.metrics import MetricsServer, Registry, SyncMetrics, TextfileExporter
+from reader_sync.rate_limit import AdaptiveLimiter
+
+
+def test_render_prometheus_and_openmetrics() -> None:
+    registry = Registry()
+    latency = registry.histogram("demo_seconds", "Demo latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value, stage="save")
+    sent = registry.counter("demo_bytes_total", "Demo bytes.")
+    sent.inc(10)
+    sent.inc(5)
+    registry.gauge("demo_depth", "Demo depth.").set(3, stage='a"b')
+
+    text = registry.render()
+    assert 'demo_seconds_bucket{stage="save",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="save",le="1"} 2' in text
+    assert 'demo_seconds_bucket{stage="save",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="save"} 3' in text
+    assert 'demo_seconds_sum{stage="save"} 5.55' in text
+    assert "# TYPE demo_bytes_total counter\ndemo_bytes_total 15" in text
+    assert 'demo_depth{stage="a\\"b"} 3' in text
+    assert "# EOF" not in text
+
+    openmetrics = registry.render(openmetrics=True)
+    assert "# TYPE demo_bytes counter\ndemo_bytes_total 15" in openmetrics
+    assert openmetrics.endswith("# EOF\n")
+
+
+def test_exporters_write_textfile_and_serve(tmp_path: Path) -> None:
+    metrics = SyncMetrics()
+    limiter = AdaptiveLimiter(60, name="save")
+    limiter.on_response(429, {})
+    metrics.add_collector(lambda: metrics.rate_limited.set_total(limiter.throttled, endpoint="save"))
+    metrics.observe("db_write", 0.002)
+
+    path = tmp_path / "textfile" / "rw_sync.prom"
+    TextfileExporter(metrics, path).write()
+    text = path.read_text(encoding="utf-8")
+    assert 'rw_sync_rate_limited_total{endpoint="save"} 1' in text
+    assert 'rw_sync_stage_seconds_count{stage="db_write"} 1' in text
+    assert [p.name for p in path.parent.iterdir()] == ["rw_sync.prom"]
+
+    server = MetricsServer(metrics, port=0)
+    server.start()
+    try:
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{server.port}/metrics", headers={"Accept": "application/openmetrics-text"}
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"].startswith("application/openmetrics-text")
+    finally:
+        server.stop()
+    assert "# TYPE rw_sync_rate_limited counter" in body
+    assert body.endswith("# EOF\n")
+
+
+def test_timed_handler_observes_stage() -> None:
+    metrics = SyncMetrics()
+
+    async def handler(value: int) -> int:
+        return value * 2
+
+    assert asyncio.run(metrics.timed("prepare", handler)(21)) == 42
+    assert 'rw_sync_stage_seconds_count{stage="prepare"} 1' in metrics.render()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import csv
+import time
+from pathlib import Path
+
+from reader_sync.database import Database
+from reader_sync.outbox import Outbox, classify_error
+
+
+def test_outbox_backoff_dedup_and_resolve(tmp_path: Path) -> None:
+    db = Database(tmp_path / "state.db")
+    outbox = Outbox(db, backoff_base=10, backoff_cap=25)
+    outbox.load()
+    url = "https://example.com/a"
+    outbox.record(Path("/inbox/a.html"), action="create", error="boom", error_class="server", status=502, norm_url=url)
+    outbox.record(Path("/inbox/a.html"), action="create", error="boom", error_class="server", status=502, norm_url=url)
+    outbox.record(Path("/inbox/a-copy.html"), action="create", error="t/o", error_class="timeout", norm_url=url)
+    outbox.record(Path("/inbox/b.html"), action="prepare", error="bad", error_class="prepare")
+
+    entries = {entry.file_path: entry for entry in db.all_outbox()}
+    first = entries["/inbox/a.html"]
+    assert first.attempts == 2 and first.error_class == "server"
+    assert 19 <= first.next_attempt_at - first.last_failed_at <= 21
+    assert entries["/inbox/a-copy.html"].attempts == 1
+
+    assert outbox.due() == []
+    due = outbox.due(now=time.time() + 60)
+    assert sorted(entry.file_path for entry in due) == ["/inbox/a-copy.html", "/inbox/b.html"]
+
+    export = tmp_path / "audit" / "outbox.csv"
+    assert outbox.export_csv(export) == 3
+    with open(export, encoding="utf-8") as fh:
+        assert {row["file_path"] for row in csv.DictReader(fh)} == set(entries)
+
+    # Syncing any copy of the URL clears every row for it.
+    outbox.resolve(Path("/inbox/a-copy.html"), url)
+    assert [entry.file_path for entry in db.all_outbox()] == ["/inbox/b.html"]
+    assert len(outbox) == 1
+    db.close()
+
+
+def test_classify_error() -> None:
+    assert classify_error(429) == "rate_limited"
+    assert classify_error(503) == "server"
+    assert classify_error(404) == "client"
+    assert classify_error(None, TimeoutError()) == "timeout"
+    assert classify_error(None) == "unknown"
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+
+from reader_sync.pipeline import Pipeline, Stage
+
+
+def test_pipeline_runs_stages_in_order_with_drops() -> None:
+    seen: list[int] = []
+
+    async def double(item: int) -> int:
+        return item * 2
+
+    async def drop_odd_input(item: int) -> int | None:
+        return None if item % 4 else item
+
+    async def collect(item: int) -> None:
+        seen.append(item)
+
+    async def _run() -> int:
+        pipeline = Pipeline(
+            [Stage("double", 3, double), Stage("filter", 2, drop_odd_input), Stage("collect", 1, collect)],
+            queue_size=2,
+        )
+        return await pipeline.run(range(10))
+
+    assert asyncio.run(_run()) == 10
+    assert sorted(seen) == [0, 4, 8, 12, 16]
+
+
+def test_pipeline_bounds_in_flight_items() -> None:
+    started = 0
+    release = None
+
+    async def slow(item: int) -> int:
+        await release.wait()
+        return item
+
+    async def produce():
+        nonlocal started
+        for i in range(100):
+            started += 1
+            yield i
+
+    async def _run() -> tuple[int, int]:
+        nonlocal release
+        release = asyncio.Event()
+        pipeline = Pipeline([Stage("slow", 1, slow)], queue_size=3)
+        task = asyncio.create_task(pipeline.run(produce()))
+        await asyncio.sleep(0.05)
+        backlog = started
+        release.set()
+        return backlog, await task
+
+    backlog, fed = asyncio.run(_run())
+    assert fed == 100
+    # One item held by the worker, three queued, one blocked in put().
+    assert backlog <= 5
+
+
+def test_pipeline_survives_handler_errors() -> None:
+    out: list[int] = []
+
+    async def explode(item: int) -> int:
+        if item == 1:
+            raise RuntimeError("boom")
+        return item
+
+    async def collect(item: int) -> None:
+        out.append(item)
+
+    done: list[int] = []
+    pipeline = Pipeline([Stage("a", 1, explode), Stage("b", 1, collect)], queue_size=1, on_done=done.append)
+    asyncio.run(pipeline.run([0, 1, 2]))
+    assert out == [0, 2]
+    # Failed items leave the pipeline too, so progress tracking never stalls on them.
+    assert sorted(done) == [0, 1, 2]
+
+
+def test_pipeline_reports_handler_errors_before_completing() -> None:
+    async def explode(item: int) -> int:
+        if item == 1:
+            raise RuntimeError("boom")
+        return item
+
+    done: list[int] = []
+    errors: list[tuple[int, str]] = []
+    pipeline = Pipeline(
+        [Stage("a", 1, explode)],
+        queue_size=1,
+        on_done=done.append,
+        on_error=lambda item, exc: errors.append((item, str(exc))),
+    )
+    asyncio.run(pipeline.run([0, 1, 2]))
+    # The failure is reported, then the item completes like a dropped one.
+    assert errors == [(1, "boom")]
+    assert sorted(done) == [0, 1, 2]
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from reader_sync.config import load_settings
+from reader_sync.database import Database
+from reader_sync.filesystem import discover_files
+from reader_sync.models import FileIndexEntry, RemoteTitle
+from reader_sync.planner import Planner, format_duration
+from reader_sync.prepare import prepare_document
+
+HTML = '<html><head><title>Known</title><link rel="canonical" href="https://example.com/known"/></head></html>'
+
+
+def test_plan_classifies_from_local_state(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.delenv("RW_SYNC_WATCH_DIR", raising=False)
+    monkeypatch.delenv("RW_SYNC_DB_PATH", raising=False)
+    cfg = tmp_path / ".rw-sync.yaml"
+    cfg.write_text("network:\n  rpm_save: 60\n  rpm_update: 60\n  concurrency: 2\n", encoding="utf-8")
+    settings = load_settings(cfg)
+    settings.watch_dir.mkdir(parents=True)
+    (settings.watch_dir / "known.html").write_text(HTML, encoding="utf-8")
+    (settings.watch_dir / "New [URL] https%3A%2F%2Fexample.com%2Fnew.html").write_text("<html></html>", encoding="utf-8")
+
+    db = Database(settings.db_path)
+    (known,) = [m for m in discover_files(settings.watch_dir, settings.patterns) if m.path.name == "known.html"]
+    document = prepare_document(known, settings.keep_params, settings.drop_params)
+    db.upsert(
+        norm_url=document.normalized_url,
+        source_url=document.original_url,
+        title="Old",
+        title_source="local",
+        file_path=str(known.path),
+        file_mtime=known.mtime,
+        readwise_id="rw-1",
+        last_status=201,
+        last_error=None,
+        sha1=document.sha1,
+    )
+    db.upsert_file(
+        FileIndexEntry(
+            path=str(known.path),
+            size=known.size,
+            mtime=known.mtime,
+            inode=known.inode,
+            sha1=document.sha1,
+            norm_url=document.normalized_url,
+            source_url=document.original_url,
+            url_source=document.original_source,
+            local_title=document.local_title,
+        )
+    )
+    now = time.time()
+    db.upsert_remote_title(
+        RemoteTitle(norm_url=document.normalized_url, title="Known", etag=None, last_modified=None, fetched_at=now, checked_at=now)
+    )
+
+    plan = Planner(settings, db, request_latency=0.5).plan("all")
+    db.close()
+    assert (plan.candidates, plan.create, plan.update, plan.skip, plan.unindexed) == (2, 1, 1, 0, 1)
+    assert (plan.save_calls, plan.update_calls, plan.title_fetches, plan.title_cache_hits) == (1, 1, 1, 1)
+    assert plan.bounds["rate_limit"] == 1.0
+    assert plan.bounds["upload_workers"] == 0.5
+    assert plan.bottleneck == "rate_limit"
+
+
+def test_format_duration() -> None:
+    assert format_duration(42) == "42s"
+    assert format_duration(125) == "2m05s"
+    assert format_duration(17 * 3600 + 60) == "17h01m"
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+from reader_sync import profiling
+from reader_sync.filesystem import discover_files
+from reader_sync.profiling import StageProfiler
+
+
+def _spin(seconds: float) -> int:
+    total = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_profiler_attributes_samples_and_allocations_to_stages(tmp_path: Path) -> None:
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    for index in range(50):
+        (inbox / f"{index}.html").write_text("<html></html>", encoding="utf-8")
+
+    def _discover() -> None:
+        deadline = time.monotonic() + 0.3
+        while time.monotonic() < deadline:
+            list(discover_files(inbox, ("*.html",)))
+
+    profiler = StageProfiler(interval=0.002)
+    profiler.start()
+    try:
+        with profiling.scope("title"):
+            _spin(0.3)
+        # Untagged threads are attributed by the code they run.
+        worker = threading.Thread(target=_discover)
+        worker.start()
+        worker.join()
+    finally:
+        profiler.stop()
+    assert profiling.active() is None
+    stages = profiler.stage_samples()
+    assert stages.get("title", 0) > 0 and stages.get("discover", 0) > 0
+
+    output = profiler.write(tmp_path / "reports", "run.profile")
+    folded = output.folded.read_text(encoding="utf-8").splitlines()
+    assert any(line.startswith("title;") and line.rsplit(" ", 1)[1].isdigit() for line in folded)
+    assert "[title] top functions" in output.cpu.read_text(encoding="utf-8")
+    assert output.memory is not None
+    assert "peak traced memory" in output.memory.read_text(encoding="utf-8")
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from reader_sync.rate_limit import AdaptiveLimiter
+
+
+def test_rate_halves_on_429_and_recovers_additively() -> None:
+    limiter = AdaptiveLimiter(50, floor=5)
+    limiter.on_response(429, {})
+    assert limiter.rpm == 25
+    for _ in range(10):
+        limiter.on_response(200, {})
+    assert limiter.rpm == 35
+    for _ in range(100):
+        limiter.on_response(201, {})
+    assert limiter.rpm == 50
+    for _ in range(10):
+        limiter.on_response(429, {})
+    assert limiter.rpm == 5
+
+
+def test_server_limit_header_lowers_the_ceiling() -> None:
+    limiter = AdaptiveLimiter(50)
+    limiter.on_response(200, {"X-RateLimit-Limit": "20"})
+    assert limiter.rpm == 20
+
+
+def test_acquire_paces_after_burst_and_honours_retry_after() -> None:
+    async def _run() -> tuple[float, float]:
+        limiter = AdaptiveLimiter(10, time_period=0.5)
+        start = time.monotonic()
+        for _ in range(11):
+            await limiter.acquire()
+        paced = time.monotonic() - start
+        limiter.on_response(429, {"Retry-After": "0.2"})
+        start = time.monotonic()
+        await limiter.acquire()
+        return paced, time.monotonic() - start
+
+    paced, paused = asyncio.run(_run())
+    assert 0.03 <= paced < 0.3
+    assert paused >= 0.2
+
+
+def test_reset_header_accepts_epoch_timestamps_and_is_capped() -> None:
+    limiter = AdaptiveLimiter(50, max_pause=30)
+    limiter.on_response(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(time.time() + 5)})
+    assert 3 < limiter._paused_until - time.monotonic() <= 5
+
+    capped = AdaptiveLimiter(50, max_pause=30)
+    capped.on_response(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "86400"})
+    assert capped._paused_until - time.monotonic() <= 30
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from reader_sync.readwise_client import ReaderClient
+
+
+def _client(handler, **kwargs) -> ReaderClient:
+    options = dict(rpm_save=600, rpm_update=600, concurrency=2, backoff_base=0.001, backoff_cap=0.01)
+    options.update(kwargs)
+    return ReaderClient("token", transport=httpx.MockTransport(handler), **options)
+
+
+def test_save_retries_rate_limits_and_server_errors() -> None:
+    responses = iter(
+        [
+            httpx.Response(429, headers={"Retry-After": "0"}),
+            httpx.Response(502),
+            httpx.Response(201, json={"id": "abc"}),
+        ]
+    )
+    client = _client(lambda request: next(responses))
+
+    async def _run():
+        try:
+            return await client.save({"url": "https://e.com"})
+        finally:
+            await client.close()
+
+    status, data, _ = asyncio.run(_run())
+    assert (status, data) == (201, {"id": "abc"})
+    assert client.retries == 2
+    assert client.backoff_seconds > 0
+
+
+def test_retry_after_is_parsed_as_seconds_or_date_and_capped() -> None:
+    from email.utils import formatdate
+
+    client = _client(lambda request: httpx.Response(200), backoff_base=1, backoff_cap=30)
+    in_a_minute = httpx.Response(429, headers={"Retry-After": formatdate(time.time() + 60, usegmt=True)})
+    tomorrow = httpx.Response(429, headers={"Retry-After": "86400"})
+    soon = httpx.Response(429, headers={"Retry-After": "20"})
+    assert client._next_delay(1, in_a_minute) == 30
+    assert client._next_delay(1, tomorrow) == 30
+    assert 20 <= client._next_delay(1, soon) <= 30
+    asyncio.run(client.close())
+
+
+def test_retries_stop_at_per_request_and_run_budgets() -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503)
+
+    client = _client(handler, max_retries=2, retry_budget=3)
+
+    async def _run():
+        try:
+            first = await client.update("1", {"title": "t"})
+            second = await client.update("2", {"title": "t"})
+            return first, second
+        finally:
+            await client.close()
+
+    first, second = asyncio.run(_run())
+    assert first[0] == second[0] == 503
+    # 1 + 2 retries for the first call, then 1 + the single retry left in the budget.
+    assert calls == 5
+    assert client.retries == 3
+
+
+def test_connection_errors_are_raised_after_retries() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("refused", request=request)
+
+    client = _client(handler, max_retries=1)
+
+    async def _run():
+        try:
+            await client.save({"url": "https://e.com"})
+        finally:
+            await client.close()
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(_run())
+    assert client.retries == 1
+
+
+def test_gzip_bodies_fall_back_when_rejected() -> None:
+    import gzip
+    import json
+
+    seen: list[tuple[str | None, dict]] = []
+    sent = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal sent
+        sent += len(request.content)
+        encoding = request.headers.get("Content-Encoding")
+        body = gzip.decompress(request.content) if encoding == "gzip" else request.content
+        seen.append((encoding, json.loads(body)))
+        return httpx.Response(415 if encoding == "gzip" else 201, json={"id": "x"})
+
+    client = _client(handler, gzip_min_bytes=64)
+    payload = {"url": "https://e.com", "html": "<p>é</p>" * 100}
+
+    async def _run():
+        try:
+            first = await client.save(payload)
+            second = await client.save(payload)
+            return first, second
+        finally:
+            await client.close()
+
+    first, second = asyncio.run(_run())
+    assert first[0] == second[0] == 201
+    # Rejected once compressed, then sent plain for the rest of the session.
+    assert [encoding for encoding, _ in seen] == ["gzip", None, None]
+    assert all(body == payload for _, body in seen)
+    assert client.gzip_min_bytes is None
+    assert client.retries == 0
+    assert client.bytes_sent == sent
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from reader_sync.config import load_settings
+from reader_sync.reports import RunRecorder, load_reports, percentile, trends, write_report
+from reader_sync.sync import SyncService
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0
+    assert percentile([], 50) is None
+
+
+def test_metered_cpu_is_charged_to_the_running_stage_only() -> None:
+    recorder = RunRecorder("push", "all")
+
+    async def busy() -> None:
+        deadline = time.thread_time() + 0.05
+        while time.thread_time() < deadline:
+            pass
+
+    async def idle() -> None:
+        await asyncio.sleep(0.1)
+
+    async def _run() -> None:
+        await asyncio.gather(recorder.metered("prepare", busy)(), recorder.metered("title", idle)())
+
+    asyncio.run(_run())
+    assert recorder.stages["prepare"].cpu >= 0.05
+    # The sleeping stage waited through the busy one without being charged for it.
+    assert recorder.stages["title"].wall >= 0.1
+    assert recorder.stages["title"].cpu < 0.02
+
+
+def test_push_writes_report_and_trends_compare_runs(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("READWISE_TOKEN", "token123")
+    monkeypatch.delenv("RW_SYNC_WATCH_DIR", raising=False)
+    monkeypatch.delenv("RW_SYNC_DB_PATH", raising=False)
+    cfg = tmp_path / ".rw-sync.yaml"
+    cfg.write_text("{}", encoding="utf-8")
+    settings = load_settings(cfg)
+    settings.watch_dir.mkdir(parents=True)
+    for idx in range(3):
+        html = f'<html><head><title>T{idx}</title><link rel="canonical" href="https://example.com/{idx}"/></head></html>'
+        (settings.watch_dir / f"{idx}.html").write_text(html, encoding="utf-8")
+    service = SyncService(settings)
+
+    async def fake_save(payload):
+        service._observe("save", 0.25)
+        return 201, {"id": payload["url"]}, 0.25
+
+    async def no_title(norm_url, url):
+        return None
+
+    monkeypatch.setattr(service.reader, "save", fake_save)
+    monkeypatch.setattr(service._titles, "resolve", no_title)
+
+    async def _run():
+        try:
+            return await service.push("all")
+        finally:
+            await service.close()
+
+    stats = asyncio.run(_run())
+    (path,) = settings.reports_dir.glob("*.json")
+    report = json.loads(path.read_text(encoding="utf-8"))
+    assert report["run_id"] == stats.run_id and path.stem == stats.run_id
+    assert (report["command"], report["mode"], report["status"]) == ("push", "all", "completed")
+    assert report["counts"]["processed"] == report["counts"]["candidates"] == 3
+    assert report["counts"]["created"] == 3
+    assert report["latency"]["save"] == {"count": 3, "p50": 0.25, "p95": 0.25, "p99": 0.25, "max": 0.25}
+    assert list(report["stages"]) == ["discover", "prepare", "title", "upload", "persist"]
+    assert report["stages"]["prepare"]["calls"] == 3
+
+    slower = dict(report, started_at="2099-01-01T00:00:00+00:00", run_id="later")
+    slower["latency"] = {"save": dict(report["latency"]["save"], p95=0.5)}
+    write_report(slower, settings.reports_dir)
+    reports = load_reports(settings.reports_dir)
+    assert [r["run_id"] for r in reports] == [stats.run_id, "later"]
+    (save,) = [trend for trend in trends(reports) if trend.name == "save p95 s"]
+    assert save.change == 1.0 and save.regressed(0.2)
+
+    # A run of another kind has its own baseline, and metrics it lacks are not compared.
+    dry = dict(slower, started_at="2099-01-02T00:00:00+00:00", run_id="dry", dry_run=True, latency={})
+    assert trends(reports + [dry]) == []
+    newer = dict(report, started_at="2099-01-03T00:00:00+00:00", run_id="newer")
+    (save,) = [trend for trend in trends(reports + [dry, newer]) if trend.name == "save p95 s"]
+    assert (save.latest, save.baseline) == (0.25, 0.375)
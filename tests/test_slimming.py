@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from reader_sync.slimming import HtmlSlimmer
+
+BIG_IMAGE = "data:image/png;base64," + "A" * 5000
+PAGE = f"""<html><head><title>Keep me</title>
+<script>var x = "</p>";</script>
+<style>@font-face {{ font-family: X; src: url(data:font/woff2;base64,AAAA); }} p {{ color: red }}</style>
+<link rel="stylesheet" href="site.css"><link rel="icon" href="/favicon.ico">
+<link rel="preload" as="font" href="x.woff2">
+</head><body><p>Body text about metadata:values, here.</p>
+<img src="{BIG_IMAGE}"><img src="data:image/gif;base64,R0lGOD">
+<svg><path d="M0 0"/></svg></body></html>"""
+
+
+def test_slimmer_strips_heavy_parts_and_reports_savings() -> None:
+    result = HtmlSlimmer(max_data_uri=1024).slim(PAGE)
+    html = result.html
+    assert "<title>Keep me</title>" in html
+    assert "<script" not in html and "<style" not in html
+    assert 'rel="stylesheet"' not in html and 'as="font"' not in html
+    assert 'rel="icon"' in html
+    assert BIG_IMAGE not in html and '<img src="data:,">' in html
+    assert "data:image/gif;base64,R0lGOD" in html
+    assert "metadata:values, here." in html
+    assert "<svg>" in html
+    assert result.saved == len(PAGE) - len(html) > 5000
+
+
+def test_per_element_thresholds() -> None:
+    slimmer = HtmlSlimmer({"svg": 20, "script": 1000}, max_data_uri=10_000, strip_fonts=False)
+    html = slimmer.slim(PAGE).html
+    assert "<svg>" not in html
+    assert "<script>" in html and "<style>" in html and 'rel="stylesheet"' in html
+    assert BIG_IMAGE in html and "@font-face" in html
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from reader_sync.database import Database
+from reader_sync.state_cache import DocumentCache
+
+
+def _row(**overrides) -> dict:
+    values = dict(
+        norm_url="https://example.com/a",
+        source_url="https://example.com/a",
+        title="A",
+        title_source="local",
+        file_path="/inbox/a.html",
+        file_mtime=1.0,
+        readwise_id="rw-1",
+        last_status=201,
+        last_error=None,
+    )
+    values.update(overrides)
+    return values
+
+
+def test_cache_serves_preloaded_rows_and_skips_noop_writes(tmp_path: Path) -> None:
+    db = Database(tmp_path / "state.db")
+    db.upsert(**_row())
+    db.upsert(**_row(norm_url="https://example.com/b", readwise_id="rw-2"))
+    db.flush().result()
+
+    cache = DocumentCache(db)
+    assert cache.load() == 2
+    assert cache.get("https://example.com/b").readwise_id == "rw-2"
+    assert cache.memory_bytes() > 0
+
+    assert not cache.upsert(**_row(readwise_id=None))  # COALESCE keeps rw-1, nothing else changed
+    assert not cache.update_status("https://example.com/a", status=201, error=None)
+    assert cache.writes == 0 and cache.writes_skipped == 2
+
+    assert cache.upsert(**_row(title="A2"))
+    assert cache.update_status("https://example.com/b", status=500, error="boom")
+    assert cache.writes == 2
+    stored = db.lookup("https://example.com/a")
+    assert stored.title == "A2" and stored.readwise_id == "rw-1"
+    assert db.lookup("https://example.com/b").last_error == "boom"
+    db.close()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from reader_sync import sync as sync_module
+from reader_sync.config import load_settings
+from reader_sync.filesystem import discover_files
+from reader_sync.sync import SyncService
+
+HTML = """<html><head><title>Indexed</title>
+<link rel="canonical" href="https://example.com/post"/></head><body>x</body></html>"""
+
+
+@pytest.fixture()
+def service(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("READWISE_TOKEN", "token123")
+    monkeypatch.delenv("RW_SYNC_WATCH_DIR", raising=False)
+    monkeypatch.delenv("RW_SYNC_DB_PATH", raising=False)
+    cfg = tmp_path / ".rw-sync.yaml"
+    cfg.write_text("{}", encoding="utf-8")
+    settings = load_settings(cfg)
+    settings.watch_dir.mkdir(parents=True)
+    svc = SyncService(settings)
+    yield svc
+    asyncio.run(svc.close())
+
+
+def test_unchanged_file_is_served_from_index(service: SyncService, monkeypatch) -> None:
+    path = service.settings.watch_dir / "post.html"
+    path.write_text(HTML, encoding="utf-8")
+    (meta,) = discover_files(service.settings.watch_dir, service.settings.patterns)
+    assert service._document_from_index(meta) is None
+
+    document = service._prepare_document(meta)
+    service._index_document(document)
+
+    def _no_read(_path):
+        raise AssertionError("indexed file must not be re-read")
+
+    monkeypatch.setattr(sync_module, "read_html", _no_read)
+    cached = service._document_from_index(meta)
+    assert cached is not None
+    assert cached.html is None
+    assert cached.normalized_url == document.normalized_url
+    assert cached.sha1 == document.sha1
+    assert cached.local_title == "Indexed"
+
+    path.write_text(HTML + "<!-- edited -->", encoding="utf-8")
+    (changed,) = discover_files(service.settings.watch_dir, service.settings.patterns)
+    assert service._document_from_index(changed) is None
+
+
+def test_process_pool_preparation_returns_compact_document(tmp_path: Path) -> None:
+    from reader_sync.prepare import DocumentPreparer
+
+    path = tmp_path / "post.html"
+    path.write_text(HTML, encoding="utf-8")
+    (meta,) = discover_files(tmp_path, ("*.html",))
+
+    async def _run():
+        preparer = DocumentPreparer(frozenset({"id"}), frozenset({"utm_"}), workers=1)
+        try:
+            return await preparer.prepare(meta)
+        finally:
+            preparer.close()
+
+    document = asyncio.run(_run())
+    assert document.html is None
+    assert document.normalized_url == "https://example.com/post"
+    assert document.local_title == "Indexed"
+
+
+def test_identical_content_under_new_url_is_linked_not_uploaded(service: SyncService) -> None:
+    body = "<html><head><title>Copy</title></head><body>same bytes</body></html>"
+    watch_dir = service.settings.watch_dir
+    (watch_dir / "Copy [URL] https%3A%2F%2Fexample.com%2Fone.html").write_text(body, encoding="utf-8")
+    (watch_dir / "Copy [URL] https%3A%2F%2Fexample.com%2Ftwo.html").write_text(body, encoding="utf-8")
+    first, second = discover_files(watch_dir, service.settings.patterns)
+    original = service._prepare_document(first)
+    service.documents.load()
+    service.documents.upsert(
+        norm_url=original.normalized_url,
+        source_url=original.original_url,
+        title="Copy",
+        title_source="reader",
+        file_path=str(first.path),
+        file_mtime=first.mtime,
+        readwise_id="rw-1",
+        last_status=201,
+        last_error=None,
+        sha1=original.sha1,
+    )
+
+    run = sync_module._Run("all", False, sync_module.SyncStats())
+    assert asyncio.run(service._stage_prepare(run, sync_module._Job(file=second))) is None
+    assert run.stats.linked == 1 and run.stats.skipped == 1
+    linked = service.documents.get("https://example.com/two")
+    assert linked is not None and linked.readwise_id == "rw-1" and linked.file_path == str(second.path)
+
+    # The alias row must not trigger a second update of the shared Reader document.
+    again = sync_module._Run("all", False, sync_module.SyncStats())
+    assert asyncio.run(service._stage_prepare(again, sync_module._Job(file=second))) is None
+    assert again.stats.skipped == 1 and again.stats.linked == 0
+
+
+def test_unreadable_body_is_counted_and_queued_for_retry(service: SyncService, monkeypatch) -> None:
+    path = service.settings.watch_dir / "post.html"
+    path.write_text(HTML, encoding="utf-8")
+    (meta,) = discover_files(service.settings.watch_dir, service.settings.patterns)
+    service._index_document(service._prepare_document(meta))
+    service.documents.load()
+
+    def _vanished(_path):
+        raise FileNotFoundError(_path)
+
+    monkeypatch.setattr(sync_module, "read_html", _vanished)
+    run = sync_module._Run("all", False, sync_module.SyncStats())
+    assert asyncio.run(service._stage_prepare(run, sync_module._Job(file=meta))) is None
+    assert run.stats.failed == 1
+    (entry,) = service.db.all_outbox()
+    assert entry.file_path == str(path) and entry.action == "create"
+
+
+def test_failed_upload_releases_its_content_claim(service: SyncService) -> None:
+    body = "<html><head><title>Copy</title></head><body>claimed</body></html>"
+    watch_dir = service.settings.watch_dir
+    (watch_dir / "Copy [URL] https%3A%2F%2Fexample.com%2Fone.html").write_text(body, encoding="utf-8")
+    (watch_dir / "Copy [URL] https%3A%2F%2Fexample.com%2Ftwo.html").write_text(body, encoding="utf-8")
+    first, second = discover_files(watch_dir, service.settings.patterns)
+    service.documents.load()
+    run = sync_module._Run("all", False, sync_module.SyncStats())
+
+    job = asyncio.run(service._stage_prepare(run, sync_module._Job(file=first)))
+    assert job is not None and job.action == "create"
+    assert asyncio.run(service._stage_prepare(run, sync_module._Job(file=second))) is None
+    assert run.stats.skipped == 1
+
+    job.error, job.error_class = "boom", "server"
+    asyncio.run(service._stage_persist(run, job))
+    assert run.stats.failed == 1 and not run.claimed
+    retry = asyncio.run(service._stage_prepare(run, sync_module._Job(file=second)))
+    assert retry is not None and retry.action == "create"
+
+
+def _fake_network(service: SyncService, monkeypatch, save) -> None:
+    async def no_title(norm_url, url):
+        return None
+
+    service.settings.warm_connections = 0
+    service.settings.watch_debounce = 0.05
+    monkeypatch.setattr(service.reader, "save", save)
+    monkeypatch.setattr(service._titles, "resolve", no_title)
+
+
+def test_watch_stop_interrupts_catch_up(service: SyncService, monkeypatch) -> None:
+    (service.settings.watch_dir / "post.html").write_text(HTML, encoding="utf-8")
+    uploading = None
+
+    async def hang(payload):
+        uploading.set()
+        await asyncio.Event().wait()
+
+    _fake_network(service, monkeypatch, hang)
+
+    async def _run() -> None:
+        nonlocal uploading
+        uploading, stop = asyncio.Event(), asyncio.Event()
+        task = asyncio.create_task(service.watch(stop=stop))
+        await asyncio.wait_for(uploading.wait(), 5)
+        stop.set()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(_run())
+    run = service.db.latest_run()
+    assert run is not None and run.status == "interrupted"
+
+
+def test_watch_syncs_files_written_while_watching(service: SyncService, monkeypatch) -> None:
+    async def save(payload):
+        return 201, {"id": "rw-1"}, 0.01
+
+    _fake_network(service, monkeypatch, save)
+
+    async def _run():
+        stop = asyncio.Event()
+        task = asyncio.create_task(service.watch(catch_up=False, stop=stop))
+        await asyncio.sleep(0.2)
+        (service.settings.watch_dir / "post.html").write_text(HTML, encoding="utf-8")
+        for _ in range(100):
+            if service.documents.get("https://example.com/post") is not None:
+                break
+            await asyncio.sleep(0.05)
+        stop.set()
+        return await asyncio.wait_for(task, 5)
+
+    stats = asyncio.run(_run())
+    assert stats.created == 1 and stats.failed == 0
+    assert service.documents.get("https://example.com/post").readwise_id == "rw-1"
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import httpx
+
+from reader_sync.database import Database
+from reader_sync.title_fetcher import TitleResolver
+
+PAGE = "<html><head><title>Remote Title</title></head><body></body></html>"
+
+
+def _resolver(tmp_path: Path, handler, **ttls) -> TitleResolver:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return TitleResolver(
+        Database(tmp_path / "state.db"),
+        client,
+        timeout=1.0,
+        ttl=ttls.get("ttl", 3600),
+        negative_ttl=ttls.get("negative_ttl", 3600),
+    )
+
+
+def test_fresh_titles_skip_the_network(tmp_path: Path) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, html=PAGE, headers={"ETag": '"v1"'})
+
+    resolver = _resolver(tmp_path, handler)
+    first = asyncio.run(resolver.resolve("https://e.com/a", "https://e.com/a?utm_source=x"))
+    second = asyncio.run(resolver.resolve("https://e.com/a", "https://e.com/a?utm_source=x"))
+    assert first == second == "Remote Title"
+    assert len(requests) == 1
+
+
+def test_stale_titles_revalidate_conditionally(tmp_path: Path) -> None:
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, html=PAGE, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+    resolver = _resolver(tmp_path, handler, ttl=0)
+    assert asyncio.run(resolver.resolve("https://e.com/a", "https://e.com/a")) == "Remote Title"
+    assert asyncio.run(resolver.resolve("https://e.com/a", "https://e.com/a")) == "Remote Title"
+    assert requests[1].headers["If-Modified-Since"] == "Mon, 01 Jan 2024 00:00:00 GMT"
+    entry = resolver.db.lookup_remote_title("https://e.com/a")
+    assert entry is not None and entry.failures == 0 and entry.etag == '"v1"'
+
+
+def test_failures_are_negatively_cached(tmp_path: Path) -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503)
+
+    resolver = _resolver(tmp_path, handler)
+    assert asyncio.run(resolver.resolve("https://down.example/a", "https://down.example/a")) is None
+    assert asyncio.run(resolver.resolve("https://down.example/a", "https://down.example/a")) is None
+    assert calls == 1
+    entry = resolver.db.lookup_remote_title("https://down.example/a")
+    assert entry is not None and entry.failures == 1 and "503" in (entry.last_error or "")
+
+
+class _EndlessPage(httpx.AsyncByteStream):
+    def __init__(self, head: bytes) -> None:
+        self.head = head
+        self.chunks_sent = 0
+
+    async def __aiter__(self):
+        yield self.head
+        while True:
+            self.chunks_sent += 1
+            yield b"<p>" + b"x" * 4096 + b"</p>"
+
+
+def test_fetch_title_stops_reading_after_title() -> None:
+    from reader_sync.title_fetcher import fetch_title
+
+    stream = _EndlessPage(b"<html><head><title>Caf\xe9 &amp; Bar</title>")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"Content-Type": "text/html; charset=ISO-8859-1"}, stream=stream)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_title("https://e.com/", client=client, timeout=1.0, max_bytes=8192)
+
+    result = asyncio.run(_run())
+    assert result.title == "Café & Bar"
+    assert stream.chunks_sent == 0
+
+
+def test_fetch_title_ignores_non_text_charsets() -> None:
+    from reader_sync.title_fetcher import fetch_title
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/meta":
+            body = b"<html><head><meta charset=base64><title>Meta</title></head>"
+            return httpx.Response(200, headers={"Content-Type": "text/html"}, content=body)
+        body = b"<html><head><title>Header</title></head>"
+        return httpx.Response(200, headers={"Content-Type": "text/html; charset=hex"}, content=body)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            header = await fetch_title("https://e.com/", client=client, timeout=1.0)
+            meta = await fetch_title("https://e.com/meta", client=client, timeout=1.0)
+            return header, meta
+
+    header, meta = asyncio.run(_run())
+    assert (header.title, meta.title) == ("Header", "Meta")
+
+
+def test_fetch_title_caps_bytes_and_skips_non_html() -> None:
+    from reader_sync.title_fetcher import fetch_title
+
+    endless = _EndlessPage(b"<html><head>")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/file.pdf":
+            return httpx.Response(200, headers={"Content-Type": "application/pdf"}, content=b"%PDF")
+        return httpx.Response(200, headers={"Content-Type": "text/html"}, stream=endless)
+
+    async def _run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            capped = await fetch_title("https://e.com/", client=client, timeout=1.0, max_bytes=16 * 1024)
+            pdf = await fetch_title("https://e.com/file.pdf", client=client, timeout=1.0)
+            return capped, pdf
+
+    capped, pdf = asyncio.run(_run())
+    assert capped.title is None and capped.status == 200
+    assert endless.chunks_sent <= 5
+    assert pdf.title is None and pdf.error == "not HTML: application/pdf"
+
+
+def test_breaker_opens_after_consecutive_failures_and_persists(tmp_path: Path) -> None:
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if request.url.host == "dead.example":
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return httpx.Response(200, html=PAGE)
+
+    resolver = _resolver(tmp_path, handler)
+    resolver.breaker_threshold = 2
+    for idx in range(4):
+        assert asyncio.run(resolver.resolve(f"https://dead.example/{idx}", f"https://dead.example/{idx}")) is None
+    assert calls == 2
+    assert asyncio.run(resolver.resolve("https://live.example/", "https://live.example/")) == "Remote Title"
+
+    resolver.db.flush().result()
+    reopened = _resolver(tmp_path, handler)
+    assert asyncio.run(reopened.resolve("https://dead.example/9", "https://dead.example/9")) is None
+    assert calls == 3
+    breaker = reopened.db.lookup_host_breaker("dead.example")
+    assert breaker is not None and breaker.failures == 2 and breaker.opened_until is not None
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from reader_sync.filesystem import is_candidate
+from reader_sync.watcher import Debouncer
+
+
+def test_debouncer_coalesces_bursts() -> None:
+    async def _run() -> list[Path | None]:
+        debouncer = Debouncer(0.05)
+        a, b = Path("/inbox/a.html"), Path("/inbox/b.html")
+        for _ in range(5):
+            debouncer.touch(a)
+            await asyncio.sleep(0.01)
+        debouncer.touch(b)
+        first = await asyncio.wait_for(debouncer.get(), 1)
+        second = await asyncio.wait_for(debouncer.get(), 1)
+        debouncer.touch(a)
+        debouncer.close()
+        return [first, second, await debouncer.get()]
+
+    assert asyncio.run(_run()) == [Path("/inbox/a.html"), Path("/inbox/b.html"), None]
+
+
+def test_is_candidate_applies_walker_rules(tmp_path: Path) -> None:
+    patterns = ("*.html", "*.htm")
+    assert is_candidate(tmp_path / "a.html", tmp_path, patterns)
+    assert not is_candidate(tmp_path / "a.txt", tmp_path, patterns)
+    assert not is_candidate(tmp_path / "skip" / "a.html", tmp_path, patterns, exclude=("skip",))
+    assert not is_candidate(tmp_path / "x" / "y" / "a.html", tmp_path, patterns, max_depth=1)
+    assert not is_candidate(Path("/elsewhere/a.html"), tmp_path, patterns)